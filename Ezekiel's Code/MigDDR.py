@@ -31,12 +31,20 @@ class ReadDataDriver(Driver):
 class MigDDR:
     """
     class MigDDR: simulates connections to DRAM memory
+
+    trace: optional ddr_trace.TraceRecorder that receives one record per
+    accepted command (reads are recorded when their data returns, with the
+    latency). verbose=False skips the per-command log lines.
     """
     CMD_READ = 1
     CMD_WRITE = 0
     
-    def __init__(self,dut,clock):
+    def __init__(self,dut,clock,trace=None,client=0,verbose=True):
         self.memory = {}
+        self.trace = trace
+        self.client = client
+        self.verbose = verbose
+        self.cycle = 0
 
         self.dut = dut
         self.clock = clock
@@ -84,13 +92,17 @@ class MigDDR:
                 if (self.bus.cmd.value == MigDDR.CMD_READ):
                     # accept a read command!
                     addr = self.bus.addr.value.integer
-                    self.log.info(f"Read Request submitted: [addr = 0x{addr:X}]")
+                    if self.verbose:
+                        self.log.info(f"Read Request submitted: [addr = 0x{addr:X}]")
                     cocotb.start_soon( self.read_command( addr ) )
                 elif (self.bus.cmd.value == MigDDR.CMD_WRITE):
                     if (self.bus.wdf_rdy.value == 1 and self.bus.wdf_wren.value == 1):
                         addr = self.bus.addr.value.integer
                         data = self.bus.wdf_data.value.integer
-                        self.log.info(f"Write Request submitted: [addr = 0x{addr:X}, data = 0x{data:032X}]")
+                        if self.verbose:
+                            self.log.info(f"Write Request submitted: [addr = 0x{addr:X}, data = 0x{data:032X}]")
+                        if self.trace is not None:
+                            self.trace.record(self.cycle, self.client, MigDDR.CMD_WRITE, addr, data, self._write_cycles)
                         cocotb.start_soon( self.write_command( addr, data ) )
                     else:
                         self.log.info("Warning: write command not accepted!")
@@ -99,6 +111,7 @@ class MigDDR:
                 
             
             await self._drive_phase
+            self.cycle += 1
 
     async def write_command(self,addr,data):
         # writing to an address with a non-zero offset isn't supported here
@@ -110,14 +123,19 @@ class MigDDR:
     async def read_command(self,addr):
         # writing to an address with a non-zero offset isn't supported here
         assert (addr%8 == 0), "Attempted to read to address with non-zero offset."
+        issued = self.cycle
+        app_addr = addr
         addr = addr//8
         
         await ClockCycles(self.clock, self._read_cycles ,rising=False)
         if (addr in self.memory):
             data = self.memory[addr]
         else:
-            self.log.info(f"Reading from unwritten memory address 0x{addr:X}. (this might be fine)")
+            if self.verbose:
+                self.log.info(f"Reading from unwritten memory address 0x{addr:X}. (this might be fine)")
             data = 0xAAAA_AAAA_AAAA_AAAA_AAAA_AAAA_AAAA_AAAA
+        if self.trace is not None:
+            self.trace.record(issued, self.client, MigDDR.CMD_READ, app_addr, data, self.cycle - issued)
         self.rd_data_driver.append( data )
         
             
@@ -0,0 +1,350 @@
+"""
+Adaptive running background model and a streaming evaluator against the
+train-once CombinedBackgroundModel.
+
+CombinedBackgroundModel accumulates 48/64-bit sums over NUM_FRAMES frames
+(a DRAM read-modify-write of the 336-bit sum word per pixel per frame) and
+then freezes until btn0 retrains it, so the model goes stale as the lighting
+drifts. EwmaBackground instead keeps an exponentially weighted mean and
+variance per pixel in one 128-bit MIG word and updates it every frame from
+the word the classifier already fetched:
+
+    d      = (I << MEAN_FRAC) - mean
+    mean  += (d + round) >>> k
+    var   += (sat16(d * d >> (2 * MEAN_FRAC - VAR_FRAC)) - var + round) >>> k
+    ms    += (sat8(|dev| >> shift)^2 - ms + round) >>> k     (alpha and CD)
+
+with round = 2^(k-1). Only pixels passing the update gate are written back.
+During warm-up every pixel is updated with k = min(shift, bit_length(frame)),
+which is a running average of the frames seen so far, so the model is usable
+after the same NUM_FRAMES as the train-once path. E, sigma, SD_alpha and
+SD_CD for the classifier come from the state with an integer square root.
+
+    python adaptive_background.py --frames 1800 --drift 0.15
+    python adaptive_background.py --raw capture.rgb --width 320 --height 180
+"""
+import argparse
+from collections import namedtuple
+
+import numpy as np
+
+from bg_format_study import FORMATS, Field, decode_and_classify, encode, pack, train_background, words_per_pixel
+from pixel_models import BACKGROUND, E_ALPHA, FOREGROUND, SHADOW, brightness_distortion, \
+    chromaticity_distortion, pixel_classification
+from scenes import read_rgb_frames, rgb_scene_frames, rgb_scene_truth, static_background
+from video_timing import ACTIVE_H, ACTIVE_V, FRAME_RATE
+
+
+NUM_FRAMES = 10          # top_level's CombinedBackgroundModel
+WORD_BYTES = 16
+SUM_WORD_BITS = 336      # {sum_sq_R, sum_sq_G, sum_sq_B, sum_R, sum_G, sum_B}
+
+CHANNELS = "RGB"
+STATE_FIELDS = ([Field(f"M_{c}", "mean", 16, 8) for c in CHANNELS]
+                + [Field(f"V_{c}", "var", 16, 6) for c in CHANNELS]
+                + [Field("MS_alpha", "ms", 16, 0), Field("MS_CD", "ms", 16, 0)])
+
+Metrics = namedtuple("Metrics", ["name", "frames", "classified", "fg_recall", "fg_false", "fg_false_worst",
+                                 "flagged", "bg_correct", "shadow_recall", "read_bytes", "write_bytes"])
+
+
+def isqrt(value):
+    """Floor square root of a non-negative integer array, exact up to 2^62."""
+    value = np.asarray(value, dtype=np.int64)
+    root = np.floor(np.sqrt(value.astype(np.float64))).astype(np.int64)
+    root -= root * root > value
+    root += (root + 1) * (root + 1) <= value
+    return root
+
+
+def _ewma(state, sample, k):
+    """state + (sample - state) >>> k with round-to-nearest; k may be an array."""
+    k = np.asarray(k, dtype=np.int64)
+    delta = sample - state
+    rounding = np.where(k > 0, np.int64(1) << np.maximum(k - 1, 0), 0)
+    return state + ((delta + rounding) >> k)
+
+
+class EwmaBackground:
+    """
+    class EwmaBackground: bit-exact running mean/variance background model
+
+    Holds the STATE_FIELDS registers as int64 arrays. shift is the steady
+    state k (time constant 2^k frames). gate selects the pixels that update
+    the model after warm-up: 0 means PixelClassification's BACKGROUND class;
+    g > 0 means |alpha - 1| <= g * SD_alpha and CD <= g * SD_CD, a wider gate
+    that still keeps foreground out.
+    """
+
+    def __init__(self, shift=5, gate=4, warmup=NUM_FRAMES, mean_frac=8, var_frac=6, alpha_shift=4, cd_shift=10,
+                 name=None):
+        self.shift = shift
+        self.gate = gate
+        self.warmup = warmup
+        self.mean_frac = mean_frac
+        self.var_frac = var_frac
+        self.alpha_shift = alpha_shift
+        self.cd_shift = cd_shift
+        self.name = name or f"ewma_k{shift}_" + (f"gate{gate}" if gate else "bg")
+        self.reset()
+
+    def reset(self):
+        self.frame = 0
+        self.mean = self.var = self.ms_alpha = self.ms_cd = None
+        self.read_bytes = 0
+        self.write_bytes = 0
+
+    def ports(self):
+        """(E, sigma, SD_alpha, SD_CD) as the classifier's ports would see them."""
+        E = self.mean >> self.mean_frac
+        sigma = isqrt(self.var >> self.var_frac)
+        sd_alpha = isqrt(self.ms_alpha) << self.alpha_shift
+        sd_cd = isqrt(self.ms_cd) << self.cd_shift
+        return E, sigma, sd_alpha, sd_cd
+
+    def state(self):
+        """Current registers as {field name: uint64 array}, ready for bg_format_study.pack()."""
+        values = {}
+        for i, c in enumerate(CHANNELS):
+            values[f"M_{c}"] = self.mean[..., i].astype(np.uint64)
+            values[f"V_{c}"] = self.var[..., i].astype(np.uint64)
+        values["MS_alpha"] = self.ms_alpha.astype(np.uint64)
+        values["MS_CD"] = self.ms_cd.astype(np.uint64)
+        return values
+
+    def packed(self):
+        """The (height, width, 2) uint64 lanes of each pixel's 128-bit state word."""
+        return pack(self.state(), STATE_FIELDS)
+
+    def step(self, frame):
+        """
+        Classify one frame with the current state, then update it.
+
+        Returns the class codes, or None while warming up.
+        """
+        I = np.asarray(frame, dtype=np.int64)
+        pixels = I.shape[0] * I.shape[1]
+        if self.mean is None:
+            # first frame: the state words are written, not read
+            self.mean = I << self.mean_frac
+            self.var = np.zeros_like(I)
+            self.ms_alpha = np.zeros(I.shape[:-1], dtype=np.int64)
+            self.ms_cd = np.zeros(I.shape[:-1], dtype=np.int64)
+            self.frame = 1
+            self.write_bytes += pixels * WORD_BYTES
+            return None
+
+        self.read_bytes += pixels * WORD_BYTES
+        E, sigma, sd_alpha, sd_cd = self.ports()
+        alpha = brightness_distortion(I, E, sigma)
+        cd = chromaticity_distortion(I, E, alpha)
+        warm = self.frame >= self.warmup
+        classes = pixel_classification(alpha, cd, sd_alpha, sd_cd) if warm else None
+        if not warm:
+            update = np.ones(I.shape[:-1], dtype=bool)
+        elif self.gate:
+            update = ((np.abs(alpha - E_ALPHA) <= self.gate * sd_alpha) & (cd <= self.gate * sd_cd))
+        else:
+            update = classes == BACKGROUND
+        self.update(I, alpha, cd, update)
+        self.frame += 1
+        self.write_bytes += int(np.count_nonzero(update)) * WORD_BYTES
+        return classes
+
+    def update(self, I, alpha, cd, mask):
+        """Apply one EWMA step to the pixels in mask."""
+        k = min(self.shift, self.frame.bit_length())
+        d = (I << self.mean_frac) - self.mean
+        sq = np.minimum((d * d) >> (2 * self.mean_frac - self.var_frac), 0xFFFF)
+        dev_alpha = np.minimum(np.abs(alpha - E_ALPHA) >> self.alpha_shift, 0xFF)
+        dev_cd = np.minimum(np.asarray(cd, dtype=np.int64) >> self.cd_shift, 0xFF)
+        m = mask[..., None]
+        self.mean = np.where(m, _ewma(self.mean, self.mean + d, k), self.mean)
+        self.var = np.where(m, _ewma(self.var, sq, k), self.var)
+        self.ms_alpha = np.where(mask, _ewma(self.ms_alpha, dev_alpha * dev_alpha, k), self.ms_alpha)
+        self.ms_cd = np.where(mask, _ewma(self.ms_cd, dev_cd * dev_cd, k), self.ms_cd)
+
+
+class RetrainBackground:
+    """
+    class RetrainBackground: today's train-once model, retrained on btn0
+
+    Training runs for num_frames frames from frame 0 and again every `retrain`
+    frames (0 = never), on whatever the camera sees. While training there is
+    no classification; each training frame is a read-modify-write of the
+    336-bit sum word, and the finished model is written once in `fields`
+    (bg_format_study's current reader format by default) and read every frame
+    after that.
+    """
+
+    def __init__(self, num_frames=NUM_FRAMES, retrain=0, fields=FORMATS["current"], name=None):
+        self.num_frames = num_frames
+        self.retrain = retrain
+        self.fields = fields
+        self.name = name or ("retrain_never" if not retrain else f"retrain_{retrain}")
+        self.reset()
+
+    def reset(self):
+        self.frame = 0
+        self.training = []
+        self.values = None
+        self.read_bytes = 0
+        self.write_bytes = 0
+
+    def step(self, frame):
+        """Classify one frame; returns None while (re)training."""
+        pixels = frame.shape[0] * frame.shape[1]
+        sum_bytes = -(-SUM_WORD_BITS // (8 * WORD_BYTES)) * WORD_BYTES
+        model_bytes = words_per_pixel(self.fields) * WORD_BYTES
+        if self.retrain and self.frame and self.frame % self.retrain == 0:
+            self.training = []
+        self.frame += 1
+        if self.training is not None:
+            self.training.append(np.asarray(frame))
+            self.read_bytes += pixels * sum_bytes
+            self.write_bytes += pixels * sum_bytes
+            if len(self.training) == self.num_frames:
+                self.values = encode(train_background(self.training), self.fields)
+                self.write_bytes += pixels * model_bytes
+                self.training = None
+            return None
+        self.read_bytes += pixels * model_bytes
+        return decode_and_classify(frame, self.values, self.fields)
+
+
+def drift_gains(n_frames, amplitude=0.15, period=1200, tint=0.1):
+    """
+    (n_frames, 3) lighting gains: a slow sinusoidal brightness swing of
+    +-amplitude with the given period in frames, plus a colour-temperature
+    ramp that ends with red up and blue down by `tint`.
+    """
+    t = np.arange(n_frames, dtype=np.float64)[:, None]
+    brightness = 1 + amplitude * np.sin(2 * np.pi * t / period)
+    ramp = t / max(n_frames - 1, 1) * tint * np.array([1.0, 0.0, -1.0])
+    return brightness * (1 + ramp)
+
+
+def drift_sequence(n_frames, width, height, empty=NUM_FRAMES, n_blobs=2, radius=None, speed=2.0,
+                   noise_sigma=2.0, drift=0.15, period=1200, tint=0.1, seed=0):
+    """
+    Yield (frame, objects, shadows): `empty` background-only frames for the
+    initial training, then moving objects, all under drift_gains() lighting.
+    """
+    radius = radius or (height // 20, height // 8)
+    background = static_background(width, height, seed)
+    gains = drift_gains(n_frames, drift, period, tint)
+    empty = min(empty, n_frames)
+    clear = np.zeros((height, width), dtype=bool)
+    for frame in rgb_scene_frames(empty, width, height, n_blobs=0, noise_sigma=noise_sigma, seed=seed,
+                                  background=background, lighting=gains[:empty]):
+        yield frame, clear, clear
+    busy = n_frames - empty
+    frames = rgb_scene_frames(busy, width, height, n_blobs, radius, speed, noise_sigma, seed=seed + 1,
+                              background=background, lighting=gains[empty:])
+    truth = rgb_scene_truth(busy, width, height, n_blobs, radius, speed, seed=seed + 1)
+    for frame, (objects, shadows) in zip(frames, truth):
+        yield frame, objects, shadows
+
+
+def evaluate(models, sequence, skip=NUM_FRAMES):
+    """
+    Stream (frame, objects, shadows) through every model at once and score
+    the frames from `skip` on that each model classified.
+
+    fg_recall is the fraction of object pixels classified FOREGROUND and
+    fg_false the fraction of the other pixels that are; fg_false_worst is
+    the worst single frame. flagged counts object pixels given any class
+    but BACKGROUND (PixelClassification labels many of them SHADOW or
+    HIGHLIGHT rather than FOREGROUND). bg_correct is BACKGROUND on pixels that are
+    neither object nor shadow, shadow_recall SHADOW on shadow pixels. DRAM
+    bytes are per frame over the whole sequence, warm-up included.
+    """
+    totals = {model.name: np.zeros(9, dtype=np.int64) for model in models}
+    worst = {model.name: 0.0 for model in models}
+    classified = {model.name: 0 for model in models}
+    n_frames = 0
+    for index, (frame, objects, shadows) in enumerate(sequence):
+        n_frames += 1
+        clean = ~(objects | shadows)
+        for model in models:
+            classes = model.step(frame)
+            if classes is None or index < skip:
+                continue
+            fg = classes == FOREGROUND
+            false = int(np.count_nonzero(fg & ~objects))
+            totals[model.name] += [
+                np.count_nonzero(fg & objects), np.count_nonzero(objects),
+                np.count_nonzero((classes != BACKGROUND) & objects),
+                false, objects.size - np.count_nonzero(objects),
+                np.count_nonzero((classes == BACKGROUND) & clean), np.count_nonzero(clean),
+                np.count_nonzero((classes == SHADOW) & shadows), np.count_nonzero(shadows),
+            ]
+            worst[model.name] = max(worst[model.name], false / (objects.size - np.count_nonzero(objects)))
+            classified[model.name] += 1
+
+    def ratio(hit, total):
+        return hit / total if total else float("nan")
+
+    results = []
+    for model in models:
+        t = totals[model.name]
+        results.append(Metrics(model.name, n_frames, classified[model.name], ratio(t[0], t[1]), ratio(t[3], t[4]),
+                               worst[model.name], ratio(t[2], t[1]), ratio(t[5], t[6]), ratio(t[7], t[8]),
+                               model.read_bytes / n_frames, model.write_bytes / n_frames))
+    return results
+
+
+def format_report(results, pixels, scale_pixels=ACTIVE_H * ACTIVE_V):
+    """One row per model; MB/frame and GB/s are scaled from `pixels` up to `scale_pixels`."""
+    scale = scale_pixels / pixels
+    lines = [f"{'model':<18}{'frames':>8}{'fg recall':>11}{'fg false':>10}{'worst':>8}{'flagged':>9}{'bg ok':>8}"
+             f"{'shadow':>8}{'rd MB/f':>9}{'wr MB/f':>9}{'GB/s@60':>9}"]
+    for r in results:
+        rd, wr = r.read_bytes * scale / 1e6, r.write_bytes * scale / 1e6
+        lines.append(f"{r.name:<18}{r.classified:>8}{r.fg_recall:>11.4f}{r.fg_false:>10.4f}{r.fg_false_worst:>8.4f}"
+                     f"{r.flagged:>9.4f}{r.bg_correct:>8.4f}{r.shadow_recall:>8.4f}{rd:>9.2f}{wr:>9.2f}"
+                     f"{(rd + wr) * FRAME_RATE / 1e3:>9.3f}")
+    return "\n".join(lines)
+
+
+def default_models(shift=5, retrain=600):
+    return [
+        RetrainBackground(),
+        RetrainBackground(retrain=retrain),
+        EwmaBackground(shift=shift, gate=0),
+        EwmaBackground(shift=shift, gate=4),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive EWMA background model vs. retrain-on-btn0.")
+    parser.add_argument("--raw", help="recorded raw RGB888 file (no ground truth: only rates and bandwidth)")
+    parser.add_argument("--width", type=int, default=160)
+    parser.add_argument("--height", type=int, default=90)
+    parser.add_argument("--frames", type=int, default=1800)
+    parser.add_argument("--drift", type=float, default=0.15, help="peak brightness swing of the lighting")
+    parser.add_argument("--period", type=int, default=1200, help="brightness swing period in frames")
+    parser.add_argument("--tint", type=float, default=0.1, help="red/blue colour-temperature ramp")
+    parser.add_argument("--noise", type=float, default=2.0, help="synthetic sensor noise sigma")
+    parser.add_argument("--blobs", type=int, default=2)
+    parser.add_argument("--shift", type=int, default=5, help="EWMA k: time constant 2^k frames")
+    parser.add_argument("--retrain", type=int, default=600, help="btn0 period for the periodic retrain model")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.raw:
+        frames = read_rgb_frames(args.raw, args.width, args.height, count=args.frames)
+        clear = np.zeros((args.height, args.width), dtype=bool)
+        sequence = ((frame, clear, clear) for frame in frames)
+    else:
+        sequence = drift_sequence(args.frames, args.width, args.height, n_blobs=args.blobs,
+                                  noise_sigma=args.noise, drift=args.drift, period=args.period,
+                                  tint=args.tint, seed=args.seed)
+    results = evaluate(default_models(args.shift, args.retrain), sequence)
+    print(format_report(results, args.width * args.height))
+    print(f"\nDRAM columns are scaled to {ACTIVE_H}x{ACTIVE_V}; the EWMA state is one {len(STATE_FIELDS)}-field "
+          f"{sum(f.bits for f in STATE_FIELDS)}-bit word per pixel, written back only where the gate passes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Simulation performance benchmarks with regression tracking.
+
+A fixed set of workloads (the cocotb tests in test_benchmark_suite.py) is
+built and run one simulator process each, with waves off. Every workload
+records its simulated cycles, wall time, simulated cycles per wall-second,
+DUT throughput in its own unit, and the peak RSS of the simulator process
+(the testbench's Python runs inside it). A run is saved as versioned JSON,
+bench-<date>-<commit>.json, next to an optional baseline.json, and compare
+flags workloads that got slower than a threshold:
+
+    python benchmark_suite.py run                       # all workloads
+    python benchmark_suite.py run --only sqrt_sweep uart_burst --save-baseline
+    python benchmark_suite.py compare benchmarks/bench-20250101-120000-abc1234.json
+    python benchmark_suite.py report benchmarks/baseline.json
+
+Simulated cycles and throughput are deterministic, so any change in them is
+a DUT change and is flagged whatever the threshold; wall time, cycles per
+second and memory are compared against the threshold. Set
+BENCH_PYTHON_MEMORY=1 to also record the peak Python heap with tracemalloc
+(it slows the testbench, so the timing of such a run is not comparable).
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+
+
+SCHEMA = 1
+ENV_VAR = "BENCH_RESULTS_DIR"
+MEMORY_ENV_VAR = "BENCH_PYTHON_MEMORY"
+TEST_MODULE = "test_benchmark_suite"
+DEFAULT_THRESHOLD = 0.10
+
+Workload = namedtuple("Workload", ["name", "toplevel", "sources", "parameters", "description"])
+
+WORKLOADS = [
+    Workload("classification_tile", "PixelClassification", ["pixel_classification.sv"], {},
+             "one 1280x16 tile of a scene through PixelClassification, one pixel per clock"),
+    Workload("background_training", "BackgroundModelTest", ["background_model_test.sv", "cordic_sqrt.sv"],
+             {"WIDTH": 32, "HEIGHT": 24, "NUM_FRAMES": 3},
+             "NUM_FRAMES 32x24 frames of training, then the first mean/SD out"),
+    Workload("dram_stream", "mig_app_stub", ["mig_app_stub.sv"], {},
+             "read-modify-write of 2048 background-model words through MigDDR"),
+    Workload("uart_burst", "uart_lidar_receive", ["uart_lidar_receive.sv"], {},
+             "bursts of 9-byte LiDAR frames at 115200 baud"),
+    Workload("sqrt_sweep", "CordicSqrt", ["cordic_sqrt.sv"], {},
+             "back-to-back CordicSqrt over edge cases and random inputs"),
+]
+
+# metric -> +1 when higher is better, -1 when lower is better
+METRICS = {
+    "sim_cycles": -1,
+    "throughput": +1,
+    "wall_seconds": -1,
+    "cycles_per_second": +1,
+    "peak_rss_mb": -1,
+}
+EXACT_METRICS = ("sim_cycles", "throughput")
+
+
+class Measurement:
+    """
+    class Measurement: cycles, wall time and memory of one workload inside a cocotb test
+
+        bench = Measurement("sqrt_sweep", period_ns=10, unit="results")
+        bench.start()
+        ...
+        bench.stop(items=n)     # writes $BENCH_RESULTS_DIR/sqrt_sweep.json
+    """
+
+    def __init__(self, name, period_ns, unit):
+        self.name = name
+        self.period_ns = period_ns
+        self.unit = unit
+        self.python_memory = bool(os.getenv(MEMORY_ENV_VAR))
+
+    def start(self):
+        from cocotb.utils import get_sim_time
+        if self.python_memory:
+            tracemalloc.start()
+        self._sim_start = get_sim_time("ns")
+        self._wall_start = time.perf_counter()
+
+    def stop(self, items, **extra):
+        """Finish the measurement; items is the DUT work done, in `unit`. Returns the record."""
+        from cocotb.utils import get_sim_time
+        wall = time.perf_counter() - self._wall_start
+        cycles = int(round((get_sim_time("ns") - self._sim_start) / self.period_ns))
+        record = {
+            "workload": self.name,
+            "sim_cycles": cycles,
+            "wall_seconds": wall,
+            "cycles_per_second": cycles / wall if wall else 0.0,
+            "items": items,
+            "unit": f"{self.unit}/cycle",
+            "throughput": items / cycles if cycles else 0.0,
+            # ru_maxrss is in KiB on Linux and bytes on macOS
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                           / (1 << 20 if sys.platform == "darwin" else 1 << 10),
+        }
+        if self.python_memory:
+            record["peak_python_mb"] = tracemalloc.get_traced_memory()[1] / (1 << 20)
+            tracemalloc.stop()
+        record.update(extra)
+        out_dir = Path(os.getenv(ENV_VAR, "."))
+        out_dir.mkdir(parents=True, exist_ok=True)
+        with open(out_dir / f"{self.name}.json", "w") as f:
+            json.dump(record, f, indent=1)
+        return record
+
+
+def git_revision(path):
+    """(short commit, dirty) of the repository holding `path`, or ("unknown", False)."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=path, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=path,
+                                capture_output=True, text=True, check=True).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def run(names=None, results_dir=None):
+    """
+    Build and run the selected workloads (all by default); returns the run
+    as a dict and saves it in results_dir as bench-<date>-<commit>.json.
+    A workload whose test fails or writes no record is kept with its status.
+    """
+    from cocotb import __version__ as cocotb_version
+    from cocotb.runner import get_runner
+
+    sim = os.getenv("SIM", "icarus")
+    proj_path = Path(__file__).resolve().parent.parent
+    sys.path.append(str(proj_path / "sim" / "model"))
+    sys.path.append(str(proj_path / "sim"))
+    results_dir = Path(results_dir or proj_path / "benchmarks")
+    records_dir = proj_path / "sim_build" / "benchmarks"
+    selected = [w for w in WORKLOADS if names is None or w.name in names]
+    unknown = set(names or ()) - {w.name for w in WORKLOADS}
+    assert not unknown, f"unknown workloads: {sorted(unknown)}"
+
+    commit, dirty = git_revision(Path(__file__).resolve().parent)
+    result = {
+        "schema": SCHEMA,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "dirty": dirty,
+        "simulator": sim,
+        "cocotb": cocotb_version,
+        "python": platform.python_version(),
+        "host": platform.node(),
+        "workloads": {},
+    }
+    runner = get_runner(sim)
+    for workload in selected:
+        build_dir = proj_path / "sim_build" / f"bench_{workload.name}"
+        record_path = records_dir / f"{workload.name}.json"
+        if record_path.exists():
+            record_path.unlink()
+        runner.build(
+            sources=[proj_path / "hdl" / source for source in workload.sources],
+            hdl_toplevel=workload.toplevel,
+            always=True,
+            build_args=["-Wall"],
+            parameters=workload.parameters,
+            timescale=('1ns','1ps'),
+            build_dir=build_dir,
+            waves=False
+        )
+        runner.test(
+            hdl_toplevel=workload.toplevel,
+            test_module=TEST_MODULE,
+            testcase=f"test_bench_{workload.name}",
+            test_args=[],
+            build_dir=build_dir,
+            extra_env={ENV_VAR: str(records_dir)},
+            waves=False
+        )
+        if record_path.exists():
+            with open(record_path) as f:
+                record = json.load(f)
+            record["status"] = "ok"
+        else:
+            record = {"workload": workload.name, "status": "failed"}
+        result["workloads"][workload.name] = record
+
+    results_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = results_dir / f"bench-{stamp}-{commit}{'-dirty' if dirty else ''}.json"
+    save(result, path)
+    result["path"] = str(path)
+    return result
+
+
+def save(result, path):
+    with open(path, "w") as f:
+        json.dump({k: v for k, v in result.items() if k != "path"}, f, indent=1)
+    return path
+
+
+def load(path):
+    with open(path) as f:
+        result = json.load(f)
+    assert result.get("schema") == SCHEMA, f"{path}: schema {result.get('schema')}, expected {SCHEMA}"
+    return result
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare two runs workload by workload.
+
+    Returns rows of (workload, metric, baseline, current, relative change,
+    flagged); change is signed so that negative is always worse. The exact
+    metrics are flagged on any change, better or worse; the rest only when
+    they are worse by more than the threshold. Workloads
+    missing from either run, or failed in the current one, come back as a
+    single row with metric "status".
+    """
+    rows = []
+    for name, base in baseline["workloads"].items():
+        now = current["workloads"].get(name)
+        if now is None or now.get("status") != "ok" or base.get("status") != "ok":
+            status = "missing" if now is None else now.get("status")
+            rows.append((name, "status", base.get("status"), status, 0.0, status != "ok"))
+            continue
+        for metric, direction in METRICS.items():
+            if metric not in base or metric not in now:
+                continue
+            old, new = base[metric], now[metric]
+            change = direction * (new - old) / old if old else 0.0
+            flagged = new != old if metric in EXACT_METRICS else change < -threshold
+            rows.append((name, metric, old, new, change, flagged))
+    return rows
+
+
+def format_report(result):
+    lines = [f"commit {result['commit']}{' (dirty)' if result.get('dirty') else ''}, {result['simulator']}, "
+             f"cocotb {result['cocotb']}, {result['date']}",
+             f"{'workload':<22}{'cycles':>10}{'wall s':>9}{'cycles/s':>11}{'throughput':>12}  {'unit':<16}"
+             f"{'RSS MB':>8}"]
+    for name, r in result["workloads"].items():
+        if r.get("status") != "ok":
+            lines.append(f"{name:<22}{r.get('status', '?'):>10}")
+            continue
+        lines.append(f"{name:<22}{r['sim_cycles']:>10}{r['wall_seconds']:>9.2f}{r['cycles_per_second']:>11.0f}"
+                     f"{r['throughput']:>12.4f}  {r['unit']:<16}{r['peak_rss_mb']:>8.1f}")
+    return "\n".join(lines)
+
+
+def format_comparison(rows, threshold=DEFAULT_THRESHOLD):
+    lines = [f"{'workload':<22}{'metric':<19}{'baseline':>12}{'current':>12}{'change':>9}"]
+    for name, metric, old, new, change, flagged in rows:
+        if metric == "status":
+            lines.append(f"{name:<22}{metric:<19}{str(old):>12}{str(new):>12}{'':>9}{'  <<' if flagged else ''}")
+            continue
+        lines.append(f"{name:<22}{metric:<19}{old:>12.6g}{new:>12.6g}{100 * change:>8.1f}%"
+                     f"{'  <<' if flagged else ''}")
+    flagged = sum(row[-1] for row in rows)
+    lines.append(f"{flagged} regression(s) beyond {100 * threshold:.0f}% "
+                 f"(simulated cycles and throughput are exact)" if flagged else "no regressions")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_cmd = sub.add_parser("run", help="run workloads and save a versioned result")
+    run_cmd.add_argument("--only", nargs="+", choices=[w.name for w in WORKLOADS])
+    run_cmd.add_argument("--dir", help="results directory (default: <project>/benchmarks)")
+    run_cmd.add_argument("--save-baseline", action="store_true", help="also store the run as baseline.json")
+    run_cmd.add_argument("--baseline", help="compare against this run afterwards")
+    run_cmd.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    compare_cmd = sub.add_parser("compare", help="flag regressions of a run against a baseline")
+    compare_cmd.add_argument("current")
+    compare_cmd.add_argument("--baseline", help="default: baseline.json next to the current run")
+    compare_cmd.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                             help="relative slowdown that counts as a regression (default 0.10)")
+    report_cmd = sub.add_parser("report", help="print saved runs")
+    report_cmd.add_argument("runs", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "report":
+        for path in args.runs:
+            print(format_report(load(path)))
+        return 0
+    if args.command == "run":
+        current = run(args.only, args.dir)
+        print(format_report(current))
+        print(f"saved {current['path']}")
+        if args.save_baseline:
+            print(f"baseline {save(current, Path(current['path']).parent / 'baseline.json')}")
+        if not args.baseline:
+            return 0
+        baseline = load(args.baseline)
+    else:
+        current = load(args.current)
+        baseline = load(args.baseline or Path(args.current).parent / "baseline.json")
+    rows = compare(baseline, current, args.threshold)
+    print(format_comparison(rows, args.threshold))
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
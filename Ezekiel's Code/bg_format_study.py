@@ -0,0 +1,276 @@
+"""
+Accuracy/bandwidth study of compact per-pixel background-model formats.
+
+A background model is trained in floating point from background-only frames
+(per-channel mean and standard deviation, plus the spread of alpha and CD
+measured through the bit-exact HDL models). Each candidate format quantizes
+those fields, packs them into MIG words with a vectorized codec, unpacks them
+again, and drives the classification golden model. Agreement is measured
+against the current format, which stores every field as a 32-bit Q16.16 word.
+
+Field kinds:
+    mean   Q(bits-frac).frac mean; the E ports take the integer part
+    sigma  same, for the per-channel standard deviation
+    recip  round(2^bits / sigma), replaces the three divides in
+           BrightnessDistortion with multiplies (brightness_distortion_recip)
+    sd     SD_alpha / SD_CD stored as value >> frac, saturating
+
+    python bg_format_study.py --width 320 --height 180
+    python bg_format_study.py --raw capture.rgb --train 30
+"""
+import argparse
+from collections import namedtuple
+
+import numpy as np
+
+from pixel_models import (brightness_distortion, chromaticity_distortion, pixel_classification,
+                          to_signed, FOREGROUND)
+from scenes import read_rgb_frames, rgb_scene_frames
+from video_timing import ACTIVE_H, ACTIVE_V, FRAME_RATE
+
+
+WORD_BITS = 128
+
+Field = namedtuple("Field", ["name", "kind", "bits", "frac"])
+BackgroundStats = namedtuple("BackgroundStats", ["mean", "sd", "sd_alpha", "sd_cd"])
+
+CHANNELS = "RGB"
+
+
+def _channel_fields(name, kind, bits, frac):
+    return [Field(f"{name}_{c}", kind, bits, frac) for c in CHANNELS]
+
+
+FORMATS = {
+    # what the reader path fetches today: E, SD, SD_alpha and SD_CD as 32-bit words
+    "current": (_channel_fields("E", "mean", 32, 16) + _channel_fields("SD", "sigma", 32, 16)
+                + [Field("SD_alpha", "sd", 32, 0), Field("SD_CD", "sd", 32, 0)]),
+    "q88_sd8": (_channel_fields("E", "mean", 16, 8) + _channel_fields("SD", "sigma", 8, 0)
+                + [Field("SD_alpha", "sd", 16, 0), Field("SD_CD", "sd", 16, 4)]),
+    "q88_sd44": (_channel_fields("E", "mean", 16, 8) + _channel_fields("SD", "sigma", 8, 4)
+                 + [Field("SD_alpha", "sd", 16, 0), Field("SD_CD", "sd", 16, 4)]),
+    "q88_recip": (_channel_fields("E", "mean", 16, 8) + _channel_fields("R", "recip", 16, 0)
+                  + [Field("SD_alpha", "sd", 16, 0), Field("SD_CD", "sd", 16, 4)]),
+    "u8_sd8": (_channel_fields("E", "mean", 8, 0) + _channel_fields("SD", "sigma", 8, 0)
+               + [Field("SD_alpha", "sd", 12, 4), Field("SD_CD", "sd", 12, 8)]),
+}
+
+# today's CombinedBackgroundModel word (DATA_WIDTH), for the bandwidth column
+CURRENT_MODEL_BITS = 336
+
+
+def format_bits(fields):
+    return sum(f.bits for f in fields)
+
+
+def words_per_pixel(fields):
+    return -(-format_bits(fields) // WORD_BITS)
+
+
+def train_background(frames):
+    """
+    Float background statistics from background-only RGB frames.
+
+    SD_alpha and SD_CD are the per-pixel RMS of (alpha - 1.0) and of CD over
+    the training frames, measured through the HDL models with the current
+    format's E and sigma ports. PixelClassification centres its thresholds on
+    E_ALPHA = 1.0 and E_CD = 0, so the RMS about those points (Horprasert's
+    a_i and b_i) is the matching spread, not the standard deviation.
+    """
+    frames = [np.asarray(f) for f in frames]
+    stack = np.stack(frames).astype(np.float64)
+    mean = stack.mean(axis=0)
+    sd = stack.std(axis=0)
+    E, sigma = np.floor(mean).astype(np.int64), np.floor(sd).astype(np.int64)
+    alphas = np.stack([brightness_distortion(f, E, sigma) for f in frames]).astype(np.float64)
+    cds = np.stack([chromaticity_distortion(f, E, a.astype(np.int64)) for f, a in zip(frames, alphas)])
+    cds = to_signed(cds, 32).astype(np.float64)
+    sd_alpha = np.sqrt(np.mean((alphas - (1 << 16)) ** 2, axis=0))
+    sd_cd = np.sqrt(np.mean(cds ** 2, axis=0))
+    return BackgroundStats(mean, sd, sd_alpha, sd_cd)
+
+
+def encode(stats, fields):
+    """Quantize the float statistics to the integer field values of a format."""
+    values = {}
+    for field in fields:
+        limit = (1 << field.bits) - 1
+        name, _, channel = field.name.partition("_")
+        c = CHANNELS.index(channel) if channel in CHANNELS else None
+        if field.kind == "mean":
+            raw = stats.mean[..., c] * (1 << field.frac)
+        elif field.kind == "sigma":
+            raw = stats.sd[..., c] * (1 << field.frac)
+        elif field.kind == "recip":
+            raw = (1 << field.bits) / np.maximum(stats.sd[..., c], 1.0)
+        else:
+            raw = (stats.sd_alpha if field.name == "SD_alpha" else stats.sd_cd) / (1 << field.frac)
+        # floor for the 32-bit words (what the integer datapath produces), round when narrowing
+        raw = np.floor(raw) if field.bits >= 32 else np.rint(raw)
+        values[field.name] = np.clip(raw, 0, limit).astype(np.uint64)
+    return values
+
+
+def pack(values, fields):
+    """Pack field values LSB-first into (..., lanes) uint64 words, 64 bits per lane."""
+    total = format_bits(fields)
+    lanes = -(-total // 64)
+    shape = next(iter(values.values())).shape
+    packed = np.zeros(shape + (lanes,), dtype=np.uint64)
+    offset = 0
+    for field in fields:
+        value = values[field.name] & np.uint64((1 << field.bits) - 1)
+        done = 0
+        while done < field.bits:
+            lane, bit = divmod(offset + done, 64)
+            take = min(field.bits - done, 64 - bit)
+            chunk = (value >> np.uint64(done)) & np.uint64((1 << take) - 1)
+            packed[..., lane] |= chunk << np.uint64(bit)
+            done += take
+        offset += field.bits
+    return packed
+
+
+def unpack(packed, fields):
+    """Inverse of pack()."""
+    values = {}
+    offset = 0
+    for field in fields:
+        value = np.zeros(packed.shape[:-1], dtype=np.uint64)
+        done = 0
+        while done < field.bits:
+            lane, bit = divmod(offset + done, 64)
+            take = min(field.bits - done, 64 - bit)
+            chunk = (packed[..., lane] >> np.uint64(bit)) & np.uint64((1 << take) - 1)
+            value |= chunk << np.uint64(done)
+            done += take
+        values[field.name] = value
+        offset += field.bits
+    return values
+
+
+def brightness_distortion_recip(I, E_fixed, recip, e_frac=8):
+    """
+    Divide-free numerator/denominator using stored reciprocals.
+
+    N = sum(I * E * r), D = sum(E * E * r) with E in Q.e_frac and r = 2^16/sigma.
+    alpha = (N << 16) / (D >> e_frac), the same Q16.16 ratio as
+    BrightnessDistortion but with one divide instead of seven; every
+    intermediate fits an unsigned 64-bit register for 16-bit E and r.
+    """
+    I = np.asarray(I, dtype=np.uint64)
+    E = np.asarray(E_fixed, dtype=np.uint64)
+    r = np.asarray(recip, dtype=np.uint64)
+    N = (I * E * r).sum(axis=-1, dtype=np.uint64)
+    D = ((E * E * r).sum(axis=-1, dtype=np.uint64)) >> np.uint64(e_frac)
+    alpha = np.where(D != 0, (N << np.uint64(16)) // np.where(D != 0, D, np.uint64(1)), np.uint64(0))
+    return to_signed(alpha, 32)
+
+
+def decode_and_classify(frame, values, fields):
+    """Run one frame through the classification chain fed from a decoded format."""
+    kinds = {f.name: f for f in fields}
+
+    def channels(prefix):
+        return np.stack([values[f"{prefix}_{c}"] for c in CHANNELS], axis=-1)
+
+    e_frac = kinds["E_R"].frac
+    E_fixed = channels("E")
+    E = (E_fixed >> np.uint64(e_frac)).astype(np.int64)
+    if "R_R" in kinds:
+        alpha = brightness_distortion_recip(frame, E_fixed, channels("R"), e_frac)
+    else:
+        sigma = (channels("SD") >> np.uint64(kinds["SD_R"].frac)).astype(np.int64)
+        alpha = brightness_distortion(frame, E, sigma)
+    cd = chromaticity_distortion(frame, E, alpha)
+    sd_alpha = (values["SD_alpha"] << np.uint64(kinds["SD_alpha"].frac)).astype(np.int64)
+    sd_cd = (values["SD_CD"] << np.uint64(kinds["SD_CD"].frac)).astype(np.int64)
+    return pixel_classification(alpha, cd, sd_alpha, sd_cd)
+
+
+def study(stats, frames, formats=FORMATS, reference="current"):
+    """
+    Classify `frames` with every format; returns {name: dict of metrics}.
+
+    agreement is the fraction of pixels classified exactly as the reference
+    format does; fg_agreement is the same for the foreground/not-foreground
+    decision that drives the center of mass.
+    """
+    packed = {name: pack(encode(stats, fields), fields) for name, fields in formats.items()}
+    decoded = {name: unpack(packed[name], fields) for name, fields in formats.items()}
+    same = {name: 0 for name in formats}
+    same_fg = {name: 0 for name in formats}
+    foreground = {name: 0 for name in formats}
+    pixels = 0
+    for frame in frames:
+        expected = decode_and_classify(frame, decoded[reference], formats[reference])
+        pixels += expected.size
+        for name, fields in formats.items():
+            observed = expected if name == reference else decode_and_classify(frame, decoded[name], fields)
+            same[name] += int(np.count_nonzero(observed == expected))
+            same_fg[name] += int(np.count_nonzero((observed == FOREGROUND) == (expected == FOREGROUND)))
+            foreground[name] += int(np.count_nonzero(observed == FOREGROUND))
+
+    results = {}
+    for name, fields in formats.items():
+        bits = format_bits(fields)
+        words = words_per_pixel(fields)
+        results[name] = dict(
+            bits=bits,
+            words=words,
+            bytes_per_pixel=words * WORD_BITS // 8,
+            agreement=same[name] / pixels if pixels else 0.0,
+            fg_agreement=same_fg[name] / pixels if pixels else 0.0,
+            foreground=foreground[name] / pixels if pixels else 0.0,
+        )
+    return results
+
+
+def format_report(results, width, height):
+    pixels = width * height
+    lines = [f"{'format':<12}{'bits':>6}{'words':>7}{'B/pixel':>9}{'MB/frame':>10}{'GB/s@60':>9}"
+             f"{'agree':>9}{'fg agree':>10}{'fg rate':>9}"]
+    rows = [("model336", dict(bits=CURRENT_MODEL_BITS, words=-(-CURRENT_MODEL_BITS // WORD_BITS)))]
+    rows += list(results.items())
+    for name, r in rows:
+        nbytes = r["words"] * WORD_BITS // 8
+        line = (f"{name:<12}{r['bits']:>6}{r['words']:>7}{nbytes:>9}{nbytes * pixels / 1e6:>10.2f}"
+                f"{nbytes * pixels * FRAME_RATE / 1e9:>9.3f}")
+        if "agreement" in r:
+            line += f"{r['agreement']:>9.4f}{r['fg_agreement']:>10.4f}{r['foreground']:>9.4f}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare compact background-model formats.")
+    parser.add_argument("--raw", help="recorded raw RGB888 file; synthetic scene if omitted")
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--height", type=int, default=180)
+    parser.add_argument("--train", type=int, default=16, help="background-only frames used for training")
+    parser.add_argument("--frames", type=int, default=8, help="frames classified after training")
+    parser.add_argument("--noise", type=float, default=2.0, help="synthetic sensor noise sigma")
+    parser.add_argument("--blobs", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.raw:
+        train = read_rgb_frames(args.raw, args.width, args.height, count=args.train)
+        test = read_rgb_frames(args.raw, args.width, args.height, start=args.train, count=args.frames)
+    else:
+        radius = (args.height // 20, args.height // 8)
+        train = rgb_scene_frames(args.train, args.width, args.height, n_blobs=0,
+                                 noise_sigma=args.noise, seed=args.seed)
+        test = rgb_scene_frames(args.frames, args.width, args.height, n_blobs=args.blobs, radius=radius,
+                                noise_sigma=args.noise, seed=args.seed)
+
+    stats = train_background(train)
+    results = study(stats, test)
+    print(format_report(results, ACTIVE_H, ACTIVE_V))
+    fits = [name for name, fields in FORMATS.items() if format_bits(fields) <= WORD_BITS]
+    print(f"\nBandwidth columns are for {ACTIVE_H}x{ACTIVE_V}; formats fitting one {WORD_BITS}-bit word: "
+          f"{', '.join(fits)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+"""
+Streaming connected-component model: one blob per object instead of one global COM.
+
+center_of_mass reduces the whole mask to one centroid, so two objects give a
+point between them. BlobLabeler labels the mask in a single raster pass the
+way a hardware stage would: it keeps only the previous row's labels, finds
+the runs of set pixels in each new row, and gives every run the label of the
+first 8-connected run above it (or a new one). Runs that touch two labels
+merge them in a union-find table. Each label accumulates area, x/y sums and
+a bounding box. A blob is emitted as soon as a row passes without extending
+it, and its labels go back to the free list. Rows are handled with NumPy;
+only runs that merge labels take a Python step.
+
+BlobTracker matches each frame's blobs to tracks by predicted position
+(constant velocity, gated, nearest first) and keeps one of them as the
+target: the locked track while it lives, otherwise the largest confirmed
+one. target_stream() yields com_model.ComResult records, so the target can
+replace the global COM in front of velocity_stream() and predict.
+
+    python blob_tracker.py --frames 300 --blobs 2 --noise 0.0005
+    python blob_tracker.py --raw mask.bin --foreground 1 --min-area 64
+
+The report compares the target against the global COM, both measured
+against the true centre of the object being followed. It also lists the
+label memory and per-pixel table work a hardware labeler needs.
+"""
+import argparse
+from collections import namedtuple
+
+import numpy as np
+
+from com_model import ComResult, center_of_mass_stream
+from scenes import moving_blob_centers, moving_blob_masks, read_mask_frames
+from video_timing import ACTIVE_H, ACTIVE_V, TOTAL_H
+
+
+Blob = namedtuple("Blob", ["label", "area", "x", "y", "x0", "y0", "x1", "y1"])
+LabelStats = namedtuple("LabelStats", ["frames", "runs", "merges", "labels", "peak_open", "max_runs_row",
+                                       "max_merges_row"])
+LabelCost = namedtuple("LabelCost", ["label_bits", "line_bits", "entry_bits", "table_entries", "table_bits",
+                                     "table_ops_per_pixel", "merge_clocks_per_line"])
+TrackStats = namedtuple("TrackStats", ["frames", "valid", "rms_error", "max_error", "switches"])
+
+
+def clog2(n):
+    return max(int(n - 1).bit_length(), 1)
+
+
+def row_runs(row):
+    """(starts, ends) of the runs of nonzero pixels in a row, ends exclusive."""
+    edges = np.diff(np.concatenate(([0], (np.asarray(row) != 0).view(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def components_reference(mask):
+    """Whole-frame 8-connected labels by min-label propagation; labels are not compact."""
+    mask = np.asarray(mask, dtype=bool)
+    height, width = mask.shape
+    big = height * width + 1
+    labels = np.where(mask, np.arange(1, big).reshape(height, width), big)
+    while True:
+        padded = np.pad(labels, 1, constant_values=big)
+        windows = np.lib.stride_tricks.sliding_window_view(padded, (3, 3))
+        spread = np.where(mask, windows.min(axis=(-2, -1)), big)
+        if (spread == labels).all():
+            return np.where(mask, labels, 0)
+        labels = spread
+
+
+def blobs_reference(mask, min_area=1):
+    """Blob records of one frame from components_reference(), ordered like BlobLabeler.frame()."""
+    labels = components_reference(mask)
+    blobs = []
+    for label in np.unique(labels[labels > 0]):
+        y, x = np.nonzero(labels == label)
+        if len(x) >= min_area:
+            blobs.append(Blob(0, len(x), int(x.sum()) // len(x), int(y.sum()) // len(x),
+                              int(x.min()), int(y.min()), int(x.max()), int(y.max())))
+    return sorted(blobs, key=lambda b: (b.y1, b.x0))
+
+
+class BlobLabeler:
+    """
+    class BlobLabeler: single-pass 8-connected labeling with one row of label memory
+
+    push(row) takes one mask row and returns the blobs it completed. flush()
+    ends the frame. Labels are recycled through a free list, so table_size
+    only needs to cover the most labels open at once (peak_open).
+    """
+
+    def __init__(self, width=ACTIVE_H, height=ACTIVE_V, min_area=1, table_size=256):
+        self.width = width
+        self.height = height
+        self.min_area = min_area
+        self._grow(table_size)
+        self.frames = self.runs = self.merges = self.labels = 0
+        self.peak_open = self.max_runs_row = self.max_merges_row = 0
+        self.reset()
+
+    def _grow(self, size):
+        old = getattr(self, "parent", None)
+        n = 0 if old is None else len(old)
+        fields = {"parent": 0, "area": 0, "x_sum": 0, "y_sum": 0, "x0": 0, "y0": 0, "x1": 0, "y1": 0, "members": 0}
+        for name, fill in fields.items():
+            column = np.full(size, fill, dtype=np.int64)
+            if old is not None:
+                column[:n] = getattr(self, name)
+            setattr(self, name, column)
+        self.parent[n:] = np.arange(n, size)
+
+    def reset(self):
+        """Start of frame: empty label row, every label free."""
+        self.line = np.zeros(self.width, dtype=np.int64)
+        self.free = list(range(len(self.parent) - 1, 0, -1))
+        self.open = set()
+        self.row = 0
+        self.open_labels = 0
+
+    def find(self, labels):
+        """Roots of an array of labels, compressing the paths on the way."""
+        labels = np.asarray(labels, dtype=np.int64)
+        roots = labels
+        while True:
+            up = self.parent[roots]
+            if (up == roots).all():
+                break
+            roots = up
+        self.parent[labels] = roots
+        return roots
+
+    def _new_labels(self, n):
+        if n > len(self.free):
+            size = len(self.parent)
+            self._grow(max(2 * size, size + n))
+            self.free = list(range(len(self.parent) - 1, size - 1, -1)) + self.free
+        labels = np.array([self.free.pop() for _ in range(n)], dtype=np.int64)
+        self.parent[labels] = labels
+        self.area[labels] = self.x_sum[labels] = self.y_sum[labels] = 0
+        self.x0[labels], self.x1[labels] = self.width, -1
+        self.y0[labels], self.y1[labels] = self.height, -1
+        self.members[labels] = 1
+        self.labels += n
+        self.open_labels += n
+        return labels
+
+    def _union(self, a, b):
+        """Merge b's set into a's; the lower label stays the root."""
+        a, b = (int(r) for r in self.find([a, b]))
+        if a == b:
+            return 0
+        a, b = min(a, b), max(a, b)
+        self.parent[b] = a
+        self.area[a] += self.area[b]
+        self.x_sum[a] += self.x_sum[b]
+        self.y_sum[a] += self.y_sum[b]
+        self.x0[a] = min(self.x0[a], self.x0[b])
+        self.y0[a] = min(self.y0[a], self.y0[b])
+        self.x1[a] = max(self.x1[a], self.x1[b])
+        self.y1[a] = max(self.y1[a], self.y1[b])
+        self.members[a] += self.members[b]
+        self.open.discard(b)
+        return 1
+
+    def push(self, row):
+        """Label one mask row; returns the blobs completed by it (those no run of this row extends)."""
+        y = self.row
+        self.row += 1
+        starts, ends = row_runs(row)
+        above_starts, above_ends = row_runs(self.line)
+        above = self.find(self.line[above_starts])
+        # 8-connected: a run above touches [start - 1, end] of this one
+        first = np.searchsorted(above_ends, starts, side="left")
+        last = np.searchsorted(above_starts, ends, side="right")
+        touches = np.maximum(last - first, 0)
+
+        labels = np.empty(len(starts), dtype=np.int64)
+        fresh = touches == 0
+        labels[fresh] = self._new_labels(int(fresh.sum()))
+        labels[~fresh] = above[first[~fresh]]
+        merges = 0
+        for i in np.flatnonzero(touches > 1):
+            for j in range(first[i] + 1, last[i]):
+                merges += self._union(labels[i], above[j])
+        labels = self.find(labels)
+
+        # the run contributions, gathered per root
+        lengths = ends - starts
+        np.add.at(self.area, labels, lengths)
+        np.add.at(self.x_sum, labels, (starts + ends - 1) * lengths // 2)
+        np.add.at(self.y_sum, labels, y * lengths)
+        np.minimum.at(self.x0, labels, starts)
+        np.maximum.at(self.x1, labels, ends - 1)
+        np.minimum.at(self.y0, labels, y)
+        np.maximum.at(self.y1, labels, y)
+
+        # rewrite the label row: +label at each start, -label at each end
+        steps = np.zeros(self.width + 1, dtype=np.int64)
+        steps[starts] += labels
+        steps[ends] -= labels
+        self.line = np.cumsum(steps[:-1])
+
+        present = set(labels.tolist())
+        done = {int(r) for r in self.find(list(self.open))} - present if self.open else set()
+        self.open = present
+        self.runs += len(starts)
+        self.merges += merges
+        self.max_runs_row = max(self.max_runs_row, len(starts))
+        self.max_merges_row = max(self.max_merges_row, merges)
+        self.peak_open = max(self.peak_open, self.open_labels)
+        return self._emit(sorted(done))
+
+    def _emit(self, roots):
+        blobs = []
+        for root in roots:
+            area = int(self.area[root])
+            if area >= self.min_area:
+                blobs.append(Blob(root, area, int(self.x_sum[root]) // area, int(self.y_sum[root]) // area,
+                                  int(self.x0[root]), int(self.y0[root]), int(self.x1[root]), int(self.y1[root])))
+            self.open_labels -= int(self.members[root])
+        # every label that was merged into a finished root is free again
+        if roots:
+            released = np.flatnonzero(np.isin(self.find(np.arange(1, len(self.parent))), roots)) + 1
+            self.parent[released] = released
+            self.free.extend(released.tolist())
+        return sorted(blobs, key=lambda b: (b.y1, b.x0))
+
+    def flush(self):
+        """End of frame: every open blob is complete."""
+        blobs = self._emit(sorted({int(r) for r in self.find(list(self.open))})) if self.open else []
+        self.open = set()
+        self.line[:] = 0
+        return blobs
+
+    def frame(self, mask):
+        """Blobs of one whole mask frame, in the order they complete."""
+        self.reset()
+        self.frames += 1
+        blobs = []
+        for row in mask:
+            blobs.extend(self.push(row))
+        return blobs + self.flush()
+
+    def stats(self):
+        """Work over every frame so far: totals of runs, merges and labels, worst cases of the rest."""
+        return LabelStats(self.frames, self.runs, self.merges, self.labels, self.peak_open, self.max_runs_row,
+                          self.max_merges_row)
+
+
+def hardware_cost(stats, width=ACTIVE_H, height=ACTIVE_V, blank_clocks=TOTAL_H - ACTIVE_H):
+    """
+    Memory and table work of a hardware labeler sized for the LabelStats seen.
+
+    A table entry holds the parent label, area, x/y sums and bounding box.
+    Each run does one read-modify-write of its entry and each merge does two
+    more (fold the entry, then redirect its parent). merge_clocks_per_line is
+    the horizontal blanking available to resolve a line's merges.
+    """
+    entries = 1 << clog2(stats.peak_open + 1)
+    label_bits = clog2(entries)
+    pixels = width * height
+    entry_bits = (label_bits + clog2(pixels + 1) + clog2(pixels * width) + clog2(pixels * height)
+                  + 2 * clog2(width) + 2 * clog2(height))
+    return LabelCost(label_bits, width * label_bits, entry_bits, entries, entries * entry_bits,
+                     (stats.runs + 2 * stats.merges) / max(stats.frames * pixels, 1), blank_clocks)
+
+
+class Track:
+    """class Track: one followed blob, constant-velocity prediction"""
+
+    def __init__(self, track_id, blob):
+        self.id = track_id
+        self.x, self.y = float(blob.x), float(blob.y)
+        self.vx = self.vy = 0.0
+        self.blob = blob
+        self.age = 1
+        self.misses = 0
+
+    def predict(self):
+        return self.x + self.vx, self.y + self.vy
+
+    def update(self, blob):
+        self.vx, self.vy = blob.x - self.x, blob.y - self.y
+        self.x, self.y = float(blob.x), float(blob.y)
+        self.blob = blob
+        self.age += 1
+        self.misses = 0
+
+
+class BlobTracker:
+    """
+    class BlobTracker: frame-to-frame blob association and target selection
+
+    Blobs are matched to tracks nearest first, within `gate` pixels of each
+    track's predicted position. Unmatched blobs start tracks and tracks
+    unmatched for more than max_misses frames are dropped. The target is
+    the locked track while it lives, else the largest track at least
+    `confirm` frames old.
+    """
+
+    def __init__(self, gate=64.0, max_misses=5, confirm=3):
+        self.gate = gate
+        self.max_misses = max_misses
+        self.confirm = confirm
+        self.reset()
+
+    def reset(self):
+        self.tracks = []
+        self.next_id = 0
+        self.target_id = None
+
+    def update(self, blobs):
+        """Associate one frame's blobs; returns the target Track, or None."""
+        matched_tracks, matched_blobs = set(), set()
+        if self.tracks and blobs:
+            predicted = np.array([t.predict() for t in self.tracks])
+            centers = np.array([(b.x, b.y) for b in blobs], dtype=np.float64)
+            distance = np.hypot(*(predicted[:, None, :] - centers[None, :, :]).transpose(2, 0, 1))
+            for flat in np.argsort(distance, axis=None):
+                t, b = np.unravel_index(flat, distance.shape)
+                if distance[t, b] > self.gate:
+                    break
+                if t in matched_tracks or b in matched_blobs:
+                    continue
+                self.tracks[t].update(blobs[b])
+                matched_tracks.add(t)
+                matched_blobs.add(b)
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.misses += 1
+                track.x, track.y = track.predict()
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+        for b, blob in enumerate(blobs):
+            if b not in matched_blobs:
+                self.tracks.append(Track(self.next_id, blob))
+                self.next_id += 1
+        return self.select()
+
+    def select(self):
+        locked = [t for t in self.tracks if t.id == self.target_id]
+        if locked:
+            return locked[0]
+        confirmed = [t for t in self.tracks if t.age >= self.confirm and t.misses == 0]
+        if not confirmed:
+            self.target_id = None
+            return None
+        target = max(confirmed, key=lambda t: t.blob.area)
+        self.target_id = target.id
+        return target
+
+
+def target_stream(masks, labeler=None, tracker=None, blob_log=None):
+    """
+    Yield a ComResult per mask frame for the target blob instead of the global mean.
+
+    Like center_of_mass_stream, x/y hold the last valid position when the
+    target was not seen this frame, and count is the target's area.
+    blob_log, when given, receives each frame's blob list.
+    """
+    labeler = labeler or BlobLabeler()
+    tracker = tracker or BlobTracker()
+    x_out, y_out = 0, 0
+    for frame, mask in enumerate(masks):
+        blobs = labeler.frame(mask)
+        if blob_log is not None:
+            blob_log.append(blobs)
+        target = tracker.update(blobs)
+        valid = target is not None and target.misses == 0
+        if valid:
+            x_out, y_out = target.blob.x & 0x7FF, target.blob.y & 0x3FF
+        yield ComResult(frame, x_out, y_out, target.blob.area if valid else 0, valid)
+
+
+def follow_error(coms, centers):
+    """TrackStats of a ComResult stream against the ground-truth object it first lands on."""
+    followed = None
+    errors, frames, switches, nearest_before = [], 0, 0, None
+    for com, truth in zip(coms, centers):
+        frames += 1
+        if not com.valid:
+            continue
+        distance = np.hypot(truth[:, 0] - com.x, truth[:, 1] - com.y)
+        if followed is None:
+            followed = int(distance.argmin())
+        nearest = int(distance.argmin())
+        switches += nearest_before is not None and nearest != nearest_before
+        nearest_before = nearest
+        errors.append(distance[followed])
+    errors = np.asarray(errors)
+    if not len(errors):
+        return TrackStats(frames, 0, float("nan"), float("nan"), 0)
+    return TrackStats(frames, len(errors), float(np.sqrt(np.mean(errors ** 2))), float(errors.max()), switches)
+
+
+def format_cost(stats, cost):
+    return "\n".join([
+        f"labeling: {stats.runs} runs, {stats.merges} merges, {stats.labels} labels over {stats.frames} frames; "
+        f"at most {stats.peak_open} open, {stats.max_runs_row} runs and {stats.max_merges_row} merges in a row",
+        f"memory: label row {cost.line_bits} bits ({cost.label_bits}-bit labels), blob table "
+        f"{cost.table_entries} x {cost.entry_bits} bits = {cost.table_bits} bits",
+        f"work: {cost.table_ops_per_pixel:.4f} table read-modify-writes per pixel; the worst line's merges "
+        f"need {2 * stats.max_merges_row} of its {cost.merge_clocks_per_line} blanking clocks",
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--raw", help="raw mask file (one byte per pixel); synthetic blobs if omitted")
+    parser.add_argument("--foreground", type=int, help="treat the raw file as classification codes")
+    parser.add_argument("--width", type=int, default=ACTIVE_H)
+    parser.add_argument("--height", type=int, default=ACTIVE_V)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--blobs", type=int, default=2)
+    parser.add_argument("--noise", type=float, default=0.0005)
+    parser.add_argument("--min-area", type=int, default=16, help="smaller blobs are dropped as noise")
+    parser.add_argument("--gate", type=float, default=64.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="print every frame's target and blobs")
+    args = parser.parse_args()
+
+    def masks():
+        if args.raw:
+            return read_mask_frames(args.raw, args.width, args.height, args.foreground, count=args.frames)
+        return moving_blob_masks(args.frames, args.width, args.height, n_blobs=args.blobs, noise=args.noise,
+                                 seed=args.seed)
+
+    labeler = BlobLabeler(args.width, args.height, min_area=args.min_area)
+    log = []
+    targets = list(target_stream(masks(), labeler, BlobTracker(gate=args.gate), log))
+    if args.verbose:
+        for com, blobs in zip(targets, log):
+            print(f"frame {com.frame:6d}: target=({com.x:4d},{com.y:4d}) valid={int(com.valid)} "
+                  f"blobs={[(b.x, b.y, b.area) for b in blobs]}")
+    if not args.raw:
+        centers = list(moving_blob_centers(args.frames, args.width, args.height, n_blobs=args.blobs,
+                                           seed=args.seed))
+        for name, coms in (("global COM", center_of_mass_stream(masks())), ("target blob", targets)):
+            s = follow_error(coms, centers)
+            print(f"{name:<12} error RMS {s.rms_error:7.2f} max {s.max_error:7.2f} px, "
+                  f"{s.valid}/{s.frames} valid, {s.switches} switches of nearest object")
+    stats = labeler.stats()
+    print(format_cost(stats, hardware_cost(stats, args.width, args.height)))
+
+
+if __name__ == "__main__":
+    main()
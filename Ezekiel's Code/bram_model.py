@@ -0,0 +1,150 @@
+"""
+Behavioral stand-in for the vendor BRAM primitive that bram_interface wraps.
+
+bram_stub.sv declares a `BRAM` module with the same parameters and ports but
+no storage; BramModel attaches to that instance from cocotb, keeps the array
+in NumPy and drives douta with a configurable read latency:
+
+    bram = BramModel(dut.bram, dut.clk, latency=2)
+    bram.preload(np.arange(100))
+    cocotb.start_soon(bram.run())
+    ...
+    assert (bram.contents()[:100] == expected).all()
+    assert not bram.collisions
+
+Inputs are sampled in the read-only phase of the low half of the clock
+(testbenches here drive on the falling edge) and the read result appears on
+douta `latency` rising edges after the address was presented, like the
+output-registered HIGH_PERFORMANCE configuration (latency 2).
+
+A write returns the old word (read_first), the new word (write_first) or
+leaves douta alone (no_change). Collisions are recorded as (cycle, addr,
+kind) tuples:
+    "stale_read"  a write hits an address whose earlier read is still in
+                  the output pipeline, so the reader gets the old contents
+    "unknown"     en is high with X/Z on the address or write enable
+"""
+from collections import deque
+
+import numpy as np
+
+
+WRITE_MODES = ("read_first", "write_first", "no_change")
+
+
+class BramModel:
+    """
+    class BramModel: single-port RAM with a NumPy array and a douta pipeline
+
+    The model owns douta; nothing else should drive it. strict=True turns
+    collisions into assertion failures as they happen.
+    """
+
+    def __init__(self, bram, clock, latency=2, depth=None, width=None,
+                 write_mode="read_first", strict=False):
+        assert latency >= 1, "a synchronous BRAM has at least one cycle of read latency"
+        assert write_mode in WRITE_MODES
+        self.bram = bram
+        self.clock = clock
+        self.latency = latency
+        self.depth = depth or int(bram.BRAM_DEPTH.value)
+        self.width = width or int(bram.DATA_WIDTH.value)
+        self.write_mode = write_mode
+        self.strict = strict
+        self.mask = (1 << self.width) - 1
+        self.memory = np.zeros(self.depth, dtype=np.uint64 if self.width <= 64 else object)
+        self.collisions = []
+        self.reads = 0
+        self.writes = 0
+        self.cycle = 0
+        # (addr or None, data) for each read still travelling to douta
+        self._pipe = deque()
+
+    def preload(self, values, offset=0):
+        """Copy an array into memory starting at `offset`."""
+        if self.width <= 64:
+            values = np.asarray(values).astype(np.uint64) & np.uint64(self.mask)
+        else:
+            values = [int(v) & self.mask for v in values]
+        assert offset + len(values) <= self.depth, "preload runs past the end of the BRAM"
+        self.memory[offset:offset + len(values)] = values
+
+    def contents(self, start=0, stop=None):
+        """A copy of memory[start:stop]."""
+        return self.memory[start:stop].copy()
+
+    def clear(self):
+        self.memory[:] = 0
+
+    def _collision(self, addr, kind):
+        self.collisions.append((self.cycle, addr, kind))
+        assert not self.strict, f"BRAM collision at cycle {self.cycle}: {kind} at address {addr}"
+
+    def _read(self, reader):
+        """Read a signal as an int, or None if it holds X/Z."""
+        try:
+            return reader()
+        except ValueError:
+            return None
+
+    async def run(self):
+        from cocotb.triggers import FallingEdge, ReadOnly, RisingEdge
+        from comb_sweep import fast_reader
+
+        bram = self.bram
+        falling, rising, read_only = FallingEdge(self.clock), RisingEdge(self.clock), ReadOnly()
+        # control and address go through BinaryValue so X/Z raise instead of reading as 0
+        addr_in = lambda: int(bram.addra.value)
+        we = lambda: int(bram.wea.value)
+        en = lambda: int(bram.ena.value)
+        din = fast_reader(bram.dina)
+        rst = fast_reader(bram.rsta)
+        regce = fast_reader(bram.regcea)
+        douta = bram.douta
+        memory = self.memory
+        pipe = self._pipe
+        hold = self.latency - 1
+        douta.value = 0
+
+        while True:
+            await falling
+            await read_only
+            enable = self._read(en)
+            reset = self._read(rst)
+            write = self._read(we) if enable else 0
+            addr = self._read(addr_in) if enable else None
+            data = self._read(din) if write else None
+            reg_enable = self._read(regce)
+            await rising
+            self.cycle += 1
+
+            out = None
+            read_addr = None
+            if enable:
+                if addr is None or write is None or addr >= self.depth:
+                    self._collision(addr, "unknown")
+                elif write:
+                    if any(a == addr for a, _ in pipe):
+                        self._collision(addr, "stale_read")
+                    self.writes += 1
+                    if self.write_mode == "read_first":
+                        out = int(memory[addr])
+                    memory[addr] = (data or 0) & self.mask
+                    if self.write_mode == "write_first":
+                        out = int(memory[addr])
+                else:
+                    self.reads += 1
+                    read_addr = addr
+                    out = int(memory[addr])
+
+            if reset:
+                # rsta clears the output register and anything still in flight
+                pipe.clear()
+                douta.value = 0
+                continue
+            pipe.append((read_addr, out))
+            if len(pipe) > hold:
+                _, value = pipe.popleft()
+                # disabled cycles and no_change writes leave douta as it was
+                if value is not None and reg_enable:
+                    douta.value = value
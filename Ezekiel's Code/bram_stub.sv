@@ -0,0 +1,21 @@
+`timescale 1ns / 1ps
+`default_nettype none
+// Simulation shell for the vendor BRAM primitive used by bram_interface.
+// It has the same parameters and ports but no storage: bram_model.BramModel
+// samples the inputs and drives douta from cocotb. Do not add this file to
+// the Vivado project.
+module BRAM #(parameter DATA_WIDTH = 16,
+              parameter BRAM_DEPTH = 1024,
+              parameter RAM_PERFORMANCE = "HIGH_PERFORMANCE",
+              parameter INIT_FILE = "")
+             (input wire [$clog2(BRAM_DEPTH)-1:0] addra,
+              input wire [DATA_WIDTH-1:0] dina,
+              input wire clka,
+              input wire wea,
+              input wire ena,
+              input wire rsta,
+              input wire regcea,
+              output logic [DATA_WIDTH-1:0] douta);
+endmodule
+
+`default_nettype wire
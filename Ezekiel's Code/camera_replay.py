@@ -0,0 +1,217 @@
+"""
+Camera-bus replay: recorded or synthetic video into pixel_reconstruct.
+
+CameraReplay plays frames onto the camera's parallel bus the way the sensor
+does: it runs PCLK itself and puts one byte of RGB565 on the data lines per
+PCLK, high byte first, changing on the falling edge so the front end samples
+stable data on the rising edge. HSYNC is active for the 2 * width bytes of
+each line, VSYNC for the lines of each frame, and the blanking between lines
+and frames lasts as many PCLKs as on the real camera (CameraTiming). Frames
+are pulled from the source one at a time; a path is memory mapped through
+scenes.read_raw_frames, so an hour of footage costs one frame of RAM.
+
+    replay = CameraReplay(**pixel_reconstruct_ports(dut), source="capture.rgb")
+    monitor = PixelMonitor(dut.clk_in, **pixel_reconstruct_outputs(dut), replay=replay)
+    await replay.play(count=3)
+    assert not monitor.errors
+
+Sources are a path to a headerless raw file (fmt="rgb" for RGB888, "565" for
+native-endian uint16 RGB565), or any iterable of (h, w, 3) uint8 or (h, w)
+uint16 frames such as scenes.rgb_scene_frames(). replay.frames holds the
+expected RGB565 frames still in flight; PixelMonitor checks pixel_valid_out,
+hcount, vcount and data against them and times every frame end to end.
+frame_buffer_image() gives what top_level's 4x-subsampled frame buffer
+should hold after a frame.
+"""
+from collections import deque, namedtuple
+
+import cocotb
+import numpy as np
+from cocotb.clock import Clock
+from cocotb.triggers import ClockCycles, Event, FallingEdge, RisingEdge
+from cocotb.utils import get_sim_time
+
+from comb_sweep import fast_reader
+from frame_packing import rgb_to_565
+from scenes import read_raw_frames
+from video_timing import ACTIVE_H, ACTIVE_V, TOTAL_H, TOTAL_V
+
+
+CameraTiming = namedtuple("CameraTiming", ["pclk_hz", "h_blank", "v_blank"])
+
+# 50 MHz PCLK, two bytes per pixel; blanking of the 720p frame the camera is
+# configured for (h_blank in PCLKs, v_blank in lines), about 20 frames/s
+CAMERA_TIMING = CameraTiming(pclk_hz=50_000_000, h_blank=2 * (TOTAL_H - ACTIVE_H), v_blank=TOTAL_V - ACTIVE_V)
+FB_WIDTH = 320
+FB_HEIGHT = 180
+FB_SUBSAMPLE = 4
+
+FrameTime = namedtuple("FrameTime", ["index", "first_ns", "last_ns", "pixels"])
+
+
+def pixel_reconstruct_ports(dut):
+    """Camera-side inputs of a bare pixel_reconstruct."""
+    return dict(pclk=dut.camera_pclk_in, hsync=dut.camera_hs_in, vsync=dut.camera_vs_in, data=dut.camera_data_in)
+
+
+def pixel_reconstruct_outputs(dut):
+    return dict(valid=dut.pixel_valid_out, hcount=dut.pixel_hcount_out, vcount=dut.pixel_vcount_out,
+                data=dut.pixel_data_out)
+
+
+def top_level_ports(dut):
+    """The camera pins of Makar's top_level; they pass through two flops on clk_camera first."""
+    return dict(pclk=dut.cam_pclk, hsync=dut.cam_hsync, vsync=dut.cam_vsync, data=dut.camera_d)
+
+
+def top_level_outputs(dut):
+    return dict(valid=dut.camera_valid, hcount=dut.camera_hcount, vcount=dut.camera_vcount, data=dut.camera_pixel)
+
+
+def frames_565(source, width=ACTIVE_H, height=ACTIVE_V, fmt="rgb", start=0, count=None):
+    """Yield (height, width) uint16 RGB565 frames from a raw file path or an iterable of frames."""
+    if isinstance(source, (str, bytes)) or hasattr(source, "__fspath__"):
+        if fmt == "565":
+            source = read_raw_frames(source, width, height, dtype=np.uint16, start=start, count=count)
+        elif fmt == "rgb":
+            source = read_raw_frames(source, width, height, channels=3, start=start, count=count)
+        else:
+            raise ValueError(f"unknown raw format {fmt!r}, expected 'rgb' or '565'")
+    for frame in source:
+        frame = np.asarray(frame)
+        yield frame.astype(np.uint16) if frame.ndim == 2 else rgb_to_565(frame)
+
+
+def line_bytes(line):
+    """One row of RGB565 pixels -> the bytes on camera_d, high byte of each pixel first."""
+    return np.asarray(line, dtype=">u2").view(np.uint8).tolist()
+
+
+def frame_buffer_image(frame):
+    """The 320x180 RGB565 image top_level's frame buffer holds after frame (every 4th pixel and row)."""
+    return np.asarray(frame)[:FB_HEIGHT * FB_SUBSAMPLE:FB_SUBSAMPLE, :FB_WIDTH * FB_SUBSAMPLE:FB_SUBSAMPLE]
+
+
+class CameraReplay:
+    """class CameraReplay: drives PCLK, HSYNC, VSYNC and camera_d from a lazily read video"""
+
+    def __init__(self, pclk, hsync, vsync, data, source, width=ACTIVE_H, height=ACTIVE_V, fmt="rgb",
+                 timing=CAMERA_TIMING, sync_active=1):
+        self.pclk = pclk
+        self.hsync = hsync
+        self.vsync = vsync
+        self.data = data
+        self.width = width
+        self.height = height
+        self.timing = timing
+        self.active = sync_active
+        self.source = frames_565(source, width, height, fmt)
+        self.frames = deque()
+        self.frames_sent = 0
+
+        period_ps = round(1e12 / timing.pclk_hz)
+        hsync.value = 1 - self.active
+        vsync.value = 1 - self.active
+        data.value = 0
+        self._clock = cocotb.start_soon(Clock(pclk, period_ps, units="ps").start(start_high=False))
+
+    async def _frame(self, frame):
+        idle, active = 1 - self.active, self.active
+        edge = FallingEdge(self.pclk)
+        hsync, data = self.hsync, self.data
+        await edge
+        self.vsync.value = active
+        for row in frame:
+            hsync.value = active
+            for byte in line_bytes(row):
+                data.value = byte
+                await edge
+            hsync.value = idle
+            await ClockCycles(self.pclk, self.timing.h_blank, rising=False)
+        self.vsync.value = idle
+
+    async def play(self, count=None):
+        """Send count frames (all of them when None), each followed by the vertical blanking."""
+        line_pclks = 2 * self.width + self.timing.h_blank
+        sent = 0
+        for frame in self.source:
+            if frame.shape != (self.height, self.width):
+                raise ValueError(f"frame {self.frames_sent} is {frame.shape}, expected {(self.height, self.width)}")
+            self.frames.append(frame)
+            await self._frame(frame)
+            self.frames_sent += 1
+            sent += 1
+            await ClockCycles(self.pclk, self.timing.v_blank * line_pclks, rising=False)
+            if count is not None and sent >= count:
+                break
+        return sent
+
+    def frame_period_ns(self):
+        """Real time one frame takes on the bus, blanking included."""
+        pclks = (2 * self.width + self.timing.h_blank) * (self.height + self.timing.v_blank)
+        return pclks * 1e9 / self.timing.pclk_hz
+
+    def stop(self):
+        self._clock.kill()
+
+
+class PixelMonitor:
+    """
+    class PixelMonitor: checks the reconstructed pixel stream against the frames a CameraReplay sent
+
+    Every pixel_valid_out cycle must carry the next pixel of replay.frames in
+    raster order with its own hcount/vcount. Completed frames are popped from
+    the replay, timed from first to last pixel (replay.frame_period_ns() gives
+    the bus time for comparison) and kept in frame_times; with keep=True the
+    reconstructed frames are kept in captured as well.
+    """
+
+    def __init__(self, clock, valid, hcount, vcount, data, replay, keep=False, max_errors=10):
+        self.clock = clock
+        self.replay = replay
+        self.keep = keep
+        self.max_errors = max_errors
+        self.errors = []
+        self.frame_times = []
+        self.captured = []
+        self._frame_done = Event()
+        self._readers = [fast_reader(h) for h in (valid, hcount, vcount, data)]
+        self._task = cocotb.start_soon(self._run())
+
+    async def _run(self):
+        valid, hcount, vcount, data = self._readers
+        width, height = self.replay.width, self.replay.height
+        edge = RisingEdge(self.clock)
+        index, x, y, first = 0, 0, 0, None
+        image = np.empty((height, width), dtype=np.uint16)
+        while True:
+            await edge
+            if not valid():
+                continue
+            if first is None:
+                first = get_sim_time("ns")
+            frame = self.replay.frames[0] if self.replay.frames else None
+            got = (hcount(), vcount(), data())
+            want = (x, y, int(frame[y, x])) if frame is not None else None
+            if got != want and len(self.errors) < self.max_errors:
+                self.errors.append((index, want, got))
+            image[y, x] = got[2]
+            x += 1
+            if x == width:
+                x, y = 0, y + 1
+            if y == height:
+                self.frame_times.append(FrameTime(index, first, get_sim_time("ns"), width * height))
+                if self.keep:
+                    self.captured.append(image.copy())
+                if self.replay.frames:
+                    self.replay.frames.popleft()
+                index, x, y, first = index + 1, 0, 0, None
+                self._frame_done.set()
+
+    async def wait_frames(self, count):
+        while len(self.frame_times) < count:
+            self._frame_done.clear()
+            await self._frame_done.wait()
+
+    def stop(self):
+        self._task.kill()
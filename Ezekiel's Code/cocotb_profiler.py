@@ -0,0 +1,154 @@
+"""
+Opt-in profiler for testbench coroutines.
+
+While active, every time the cocotb scheduler resumes a task the profiler
+records which coroutine woke up, the trigger that woke it, where in its await
+chain it was suspended, and how long the Python code ran before it yielded
+again. Time spent inside the scheduler's event loop is the testbench's Python
+time; the rest of the wall time is the simulator.
+
+    @cocotb.test()
+    @cocotb_profiler.profile_test
+    async def test_something(dut):
+        ...
+
+Nothing happens unless COCOTB_TB_PROFILE is set; it names the directory that
+receives <test>.folded (flame-graph folded stacks, microseconds, readable by
+flamegraph.pl and speedscope) and <test>.txt (the summary table).
+"""
+import functools
+import os
+import time
+from collections import defaultdict
+
+import cocotb
+
+
+ENV_VAR = "COCOTB_TB_PROFILE"
+
+
+def _await_chain(coro):
+    """Qualified names along a suspended coroutine's await chain, outermost first."""
+    names = []
+    while coro is not None and len(names) < 32:
+        code = getattr(coro, "cr_code", None) or getattr(coro, "gi_code", None)
+        if code is None:
+            break
+        names.append(getattr(code, "co_qualname", code.co_name))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return names
+
+
+class CoroutineProfiler:
+    """
+    class CoroutineProfiler: attributes Python wall time and wake-ups to coroutines and triggers
+
+    start()/stop() patch and restore the running scheduler instance, so the
+    profiler costs nothing when it is not started.
+    """
+
+    def __init__(self, stacks=True):
+        self.stacks = stacks
+        self.wakeups = defaultdict(int)         # (coroutine, trigger type) -> count
+        self.python_time = defaultdict(float)   # (coroutine, trigger type) -> seconds
+        self.folded = defaultdict(float)        # "a;b;[Trigger]" -> seconds
+        self.loop_time = 0.0
+        self.wall_time = 0.0
+        self._scheduler = None
+        self._started = None
+
+    def start(self):
+        scheduler = cocotb.scheduler
+        schedule = scheduler._schedule
+        event_loop = scheduler._event_loop
+        clock = time.perf_counter
+
+        def profiled_schedule(task, trigger=None):
+            coro = getattr(task, "_coro", task)
+            trigger_name = type(trigger).__name__ if trigger is not None else "start"
+            chain = _await_chain(coro) if self.stacks else None
+            began = clock()
+            try:
+                return schedule(task, trigger)
+            finally:
+                elapsed = clock() - began
+                name = chain[0] if chain else getattr(coro, "__qualname__", type(coro).__name__)
+                key = (name, trigger_name)
+                self.wakeups[key] += 1
+                self.python_time[key] += elapsed
+                if chain:
+                    self.folded[";".join(chain) + f";[{trigger_name}]"] += elapsed
+
+        def profiled_event_loop(trigger):
+            began = clock()
+            try:
+                return event_loop(trigger)
+            finally:
+                self.loop_time += clock() - began
+
+        scheduler._schedule = profiled_schedule
+        scheduler._event_loop = profiled_event_loop
+        self._scheduler = scheduler
+        self._started = clock()
+        return self
+
+    def stop(self):
+        if self._scheduler is not None:
+            # drop the instance attributes so the class methods show through again
+            del self._scheduler._schedule
+            del self._scheduler._event_loop
+            self._scheduler = None
+            self.wall_time += time.perf_counter() - self._started
+        return self
+
+    @property
+    def simulator_time(self):
+        return max(self.wall_time - self.loop_time, 0.0)
+
+    def write_folded(self, path):
+        """Folded stacks with integer microsecond weights."""
+        with open(path, "w") as f:
+            for stack, seconds in sorted(self.folded.items()):
+                micros = int(round(seconds * 1e6))
+                if micros:
+                    f.write(f"{stack} {micros}\n")
+
+    def summary(self, top=20):
+        total_python = sum(self.python_time.values())
+        lines = [
+            f"wall {self.wall_time:.3f}s = simulator {self.simulator_time:.3f}s "
+            f"+ scheduler/Python {self.loop_time:.3f}s "
+            f"({100 * self.loop_time / self.wall_time if self.wall_time else 0:.1f}% Python)",
+            f"{'coroutine':<44}{'trigger':<16}{'wakeups':>10}{'python s':>10}{'us/wake':>9}{'share':>7}",
+        ]
+        ranked = sorted(self.python_time.items(), key=lambda item: -item[1])[:top]
+        for (name, trigger), seconds in ranked:
+            count = self.wakeups[(name, trigger)]
+            share = seconds / total_python if total_python else 0.0
+            lines.append(f"{name[:43]:<44}{trigger[:15]:<16}{count:>10}{seconds:>10.3f}"
+                         f"{1e6 * seconds / count:>9.1f}{100 * share:>6.1f}%")
+        return "\n".join(lines)
+
+
+def profile_test(func):
+    """Decorator for cocotb test coroutines; profiles the test when COCOTB_TB_PROFILE is set."""
+
+    @functools.wraps(func)
+    async def wrapper(dut, *args, **kwargs):
+        out_dir = os.getenv(ENV_VAR)
+        if not out_dir:
+            return await func(dut, *args, **kwargs)
+        os.makedirs(out_dir, exist_ok=True)
+        profiler = CoroutineProfiler().start()
+        try:
+            return await func(dut, *args, **kwargs)
+        finally:
+            profiler.stop()
+            base = os.path.join(out_dir, func.__name__)
+            profiler.write_folded(base + ".folded")
+            report = profiler.summary()
+            with open(base + ".txt", "w") as f:
+                f.write(report + "\n")
+            dut._log.info(f"Testbench profile ({base}.folded):\n{report}")
+
+    return wrapper
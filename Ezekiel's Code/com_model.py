@@ -0,0 +1,110 @@
+"""
+Streaming golden model of center_of_mass -> velocity_direction_calc.
+
+center_of_mass_stream() consumes mask frames lazily (any iterable, typically
+one of the generators in scenes.py) and yields one result per frame, so hours
+of video can be checked while holding a single frame in memory. The COM uses
+the hardware's semantics: unsigned sums over every pixel with valid_in high,
+floor division by the pixel count on tabulate_in, and no valid_out for a frame
+with an empty mask.
+
+    python com_model.py --frames 600 --noise 0.0005
+"""
+import argparse
+from collections import namedtuple
+
+import numpy as np
+
+from motion_predictor import VelocityDirectionCalc
+from scenes import moving_blob_masks, read_mask_frames
+from video_timing import ACTIVE_H, ACTIVE_V, FRAME_CLOCKS
+
+
+ComResult = namedtuple("ComResult", ["frame", "x", "y", "count", "valid"])
+VelocityResult = namedtuple("VelocityResult", ["frame", "x", "y", "vx", "vy", "direction"])
+
+X_SUM_BITS = 32
+Y_SUM_BITS = 32
+
+
+def frame_com(mask):
+    """(x_sum, y_sum, count) of one mask frame, as center_of_mass accumulates them."""
+    mask = np.asarray(mask, dtype=bool)
+    column_counts = np.count_nonzero(mask, axis=0)
+    row_counts = np.count_nonzero(mask, axis=1)
+    count = int(column_counts.sum())
+    x_sum = int(np.dot(column_counts, np.arange(mask.shape[1], dtype=np.int64)))
+    y_sum = int(np.dot(row_counts, np.arange(mask.shape[0], dtype=np.int64)))
+    return x_sum & ((1 << X_SUM_BITS) - 1), y_sum & ((1 << Y_SUM_BITS) - 1), count
+
+
+def center_of_mass_stream(masks):
+    """Yield a ComResult per mask frame; x/y hold the last valid COM when valid is False."""
+    x_out, y_out = 0, 0
+    for frame, mask in enumerate(masks):
+        x_sum, y_sum, count = frame_com(mask)
+        valid = count != 0
+        if valid:
+            # divider outputs are the integer quotients, truncated to the port widths
+            x_out = (x_sum // count) & 0x7FF
+            y_out = (y_sum // count) & 0x3FF
+        yield ComResult(frame, x_out, y_out, count, valid)
+
+
+def velocity_stream(coms, period=FRAME_CLOCKS):
+    """
+    Feed valid COMs into velocity_direction_calc and yield a VelocityResult for each.
+
+    Frames without a valid COM do not pulse valid_in, so the clock counter keeps
+    running across them exactly like the hardware.
+    """
+    calc = VelocityDirectionCalc()
+    elapsed = 0
+    for com in coms:
+        elapsed += period
+        if not com.valid:
+            continue
+        vx, vy, direction = calc.step(com.x, com.y, elapsed)
+        elapsed = 0
+        yield VelocityResult(com.frame, com.x, com.y, int(vx), int(vy), int(direction))
+
+
+def compare_streams(observed, expected, fields=("x", "y")):
+    """
+    Compare recorded DUT outputs against the model, both iterables of namedtuples.
+
+    Returns (checked, mismatches) where mismatches lists (index, observed, expected)
+    for the first 100 differing entries.
+    """
+    checked = 0
+    mismatches = []
+    for index, (obs, exp) in enumerate(zip(observed, expected)):
+        checked += 1
+        if any(getattr(obs, f) != getattr(exp, f) for f in fields) and len(mismatches) < 100:
+            mismatches.append((index, obs, exp))
+    return checked, mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the COM/velocity golden model over a mask sequence.")
+    parser.add_argument("--raw", help="raw mask file (one byte per pixel); synthetic blobs if omitted")
+    parser.add_argument("--foreground", type=int, help="treat the raw file as classification codes")
+    parser.add_argument("--width", type=int, default=ACTIVE_H)
+    parser.add_argument("--height", type=int, default=ACTIVE_V)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--noise", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.raw:
+        masks = read_mask_frames(args.raw, args.width, args.height, args.foreground, count=args.frames)
+    else:
+        masks = moving_blob_masks(args.frames, args.width, args.height, noise=args.noise, seed=args.seed)
+
+    for result in velocity_stream(center_of_mass_stream(masks)):
+        print(f"frame {result.frame:6d}: com=({result.x:4d},{result.y:4d}) "
+              f"v=({result.vx:5d},{result.vy:5d}) dir={result.direction:04b}")
+
+
+if __name__ == "__main__":
+    main()
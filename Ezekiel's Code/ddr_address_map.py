@@ -0,0 +1,256 @@
+"""
+DRAM address-map planner for the top_level memory regions.
+
+Addresses are MIG app_addr units: one 16-bit DQ column, so a 128-bit UI word
+spans 8 units and every access is 8-aligned (MigDDR asserts this). The MIG is
+configured ROW_BANK_COLUMN, so app_addr = {row[12:0], bank[2:0], column[9:0]}
+and a linear stream walks 128 words through one bank's row before stepping to
+the next bank.
+
+The planner lays the regions out back to back in row stripes (one row in each
+of the 8 banks) and starts each region a whole number of banks into its first
+stripe, so the streams that run at the same time sit in different banks
+instead of thrashing a shared one. The bank offsets are chosen by replaying a
+synthetic interleaving of the streams through an open-row model.
+
+    python ddr_address_map.py --package ddr_address_map_pkg.sv --trace run.npz
+"""
+import argparse
+import itertools
+from collections import namedtuple
+
+import numpy as np
+
+from video_timing import ACTIVE_H, ACTIVE_V
+
+
+ADDR_BITS = 27
+COLUMN_BITS = 10
+BANK_BITS = 3
+ROW_BITS = 13
+UNITS_PER_WORD = 8      # 128-bit UI word / 16-bit DQ
+WORD_BYTES = 16
+
+COLUMNS = 1 << COLUMN_BITS
+BANKS = 1 << BANK_BITS
+ROW_STRIPE = COLUMNS * BANKS               # units covering one row in every bank
+CAPACITY = 1 << (COLUMN_BITS + BANK_BITS + ROW_BITS)
+
+CMD_WRITE = 0
+CMD_READ = 1
+
+# words per pixel (reciprocal) for each stream: the background model holds one
+# 128-bit word per pixel, frame data packs 8 RGB565 pixels per word
+Region = namedtuple("Region", ["name", "words", "pixels_per_word"])
+Placement = namedtuple("Placement", ["name", "base", "units", "bank_offset"])
+Locality = namedtuple("Locality", ["accesses", "hits", "misses", "conflicts"])
+
+
+def default_regions(width=ACTIVE_H, height=ACTIVE_V):
+    """Background model (16 B/pixel), camera frame buffer and display read buffer."""
+    pixels = width * height
+    return [
+        Region("BG_MODEL", pixels, 1),
+        Region("FRAME_DATA", -(-pixels // 8), 8),
+        Region("DISPLAY_DATA", -(-pixels // 8), 8),
+    ]
+
+
+def decode(addr):
+    """Split app_addr into (row, bank, column) arrays."""
+    addr = np.asarray(addr, dtype=np.int64)
+    column = addr & (COLUMNS - 1)
+    bank = (addr >> COLUMN_BITS) & (BANKS - 1)
+    row = addr >> (COLUMN_BITS + BANK_BITS)
+    return row, bank, column
+
+
+def layout(regions, bank_offsets=None):
+    """
+    Back-to-back placements, each starting bank_offset banks into a fresh row stripe.
+
+    Placement.units is the extent actually used (words * 8); the slot reserved
+    for a region is padded up to the next row stripe so the next region starts
+    aligned again.
+    """
+    bank_offsets = bank_offsets or [0] * len(regions)
+    placements = []
+    slot = 0
+    for region, offset in zip(regions, bank_offsets):
+        base = slot + offset * COLUMNS
+        units = region.words * UNITS_PER_WORD
+        placements.append(Placement(region.name, base, units, offset))
+        slot = -(-(base + units) // ROW_STRIPE) * ROW_STRIPE
+    if slot > CAPACITY:
+        raise ValueError(f"regions need {slot} units but the DDR3 only has {CAPACITY}")
+    return placements
+
+
+def region_address(placement, word_index):
+    """app_addr of word `word_index` within a placed region: BASE_ADDR + 8 * index, as the HDL computes it."""
+    return placement.base + np.asarray(word_index, dtype=np.int64) * UNITS_PER_WORD
+
+
+def check_overlap(placements):
+    """Return a list of (a, b) names of overlapping placements; empty when the map is sound."""
+    clashes = []
+    for a, b in itertools.combinations(placements, 2):
+        if a.base < b.base + b.units and b.base < a.base + a.units:
+            clashes.append((a.name, b.name))
+    return clashes
+
+
+def synthetic_streams(regions, pixels=ACTIVE_H * 64):
+    """
+    Interleave the regions' sequential streams by pixel rate.
+
+    Every region advances through its words in order at 1/pixels_per_word words
+    per pixel, which is how the background reader, camera writer and display
+    reader run side by side. Returns (region index, word index) arrays.
+    """
+    owners, words, times = [], [], []
+    for index, region in enumerate(regions):
+        count = min(region.words, pixels // region.pixels_per_word)
+        owners.append(np.full(count, index))
+        words.append(np.arange(count))
+        times.append(np.arange(count) * region.pixels_per_word + index / len(regions))
+    order = np.argsort(np.concatenate(times), kind="stable")
+    return np.concatenate(owners)[order], np.concatenate(words)[order]
+
+
+def row_locality(addrs, owners=None, n_owners=1):
+    """
+    Open-row model: one open row per bank, no refresh or timing.
+
+    An access is a hit if its bank's open row matches, a miss if the bank had
+    no open row, otherwise a conflict. Returns a Locality per owner.
+    """
+    row, bank, _ = decode(addrs)
+    owners = np.zeros(len(row), dtype=np.int64) if owners is None else np.asarray(owners)
+    # stable sort by bank keeps program order within each bank
+    order = np.argsort(bank, kind="stable")
+    row_s, bank_s = row[order], bank[order]
+    first = np.ones(len(row_s), dtype=bool)
+    first[1:] = bank_s[1:] != bank_s[:-1]
+    hit = np.zeros(len(row_s), dtype=bool)
+    hit[1:] = ~first[1:] & (row_s[1:] == row_s[:-1])
+    owner_s = owners[order]
+    result = []
+    for owner in range(n_owners):
+        mine = owner_s == owner
+        hits = int(np.count_nonzero(hit & mine))
+        misses = int(np.count_nonzero(first & mine))
+        accesses = int(np.count_nonzero(mine))
+        result.append(Locality(accesses, hits, misses, accesses - hits - misses))
+    return result
+
+
+def hit_rate(locality):
+    return locality.hits / locality.accesses if locality.accesses else 0.0
+
+
+def plan(regions, pixels=ACTIVE_H * 64):
+    """Try every bank rotation (first region fixed) and keep the one with the most row hits."""
+    owners, words = synthetic_streams(regions, pixels)
+    best = None
+    for rotation in itertools.product(range(BANKS), repeat=len(regions) - 1):
+        placements = layout(regions, [0, *rotation])
+        addrs = np.empty(len(owners), dtype=np.int64)
+        for index, placement in enumerate(placements):
+            mine = owners == index
+            addrs[mine] = region_address(placement, words[mine])
+        hits = sum(l.hits for l in row_locality(addrs, owners, len(regions)))
+        if best is None or hits > best[0]:
+            best = (hits, placements)
+    return best[1]
+
+
+def load_trace(path):
+    """Load a recorded access trace (.npz with at least `cmd` and `addr` arrays)."""
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def verify_trace(placements, trace):
+    """
+    Attribute every access in `trace` to a region.
+
+    Returns (per-region Locality list, count of accesses outside every region,
+    count of misaligned accesses). Locality is computed over the whole trace so
+    cross-region bank conflicts are counted.
+    """
+    addrs = np.asarray(trace["addr"], dtype=np.int64)
+    owners = np.full(len(addrs), len(placements), dtype=np.int64)
+    for index, placement in enumerate(placements):
+        owners[(addrs >= placement.base) & (addrs < placement.base + placement.units)] = index
+    locality = row_locality(addrs, owners, len(placements) + 1)
+    misaligned = int(np.count_nonzero(addrs % UNITS_PER_WORD))
+    return locality[:-1], locality[-1].accesses, misaligned
+
+
+def render_package(placements, name="ddr_address_map_pkg"):
+    """SystemVerilog package holding the base address and size of every region."""
+    lines = [
+        "`timescale 1ns / 1ps",
+        "`default_nettype none",
+        "",
+        "// Generated by ddr_address_map.py -- do not edit by hand.",
+        "// Units are MIG app_addr columns (8 per 128-bit word). Each region starts",
+        "// BANK_OFFSET banks into a row stripe so concurrent streams use different banks.",
+        "// top_level imports this package: list this file ahead of top_level.sv in every build.",
+        f"package {name};",
+    ]
+    for placement in placements:
+        lines.append(f"  localparam [{ADDR_BITS - 1}:0] {placement.name}_BASE_ADDR = {ADDR_BITS}'d{placement.base};")
+        lines.append(f"  localparam [{ADDR_BITS - 1}:0] {placement.name}_SIZE = {ADDR_BITS}'d{placement.units};")
+        lines.append(f"  localparam [{BANK_BITS - 1}:0] {placement.name}_BANK_OFFSET = {BANK_BITS}'d{placement.bank_offset};")
+    lines += [f"endpackage : {name}", "", "`default_nettype wire", ""]
+    return "\n".join(lines)
+
+
+def format_report(placements, locality, outside=None, misaligned=None):
+    lines = [f"{'region':<14}{'base':>12}{'units':>12}{'bank':>6}{'accesses':>10}{'hit rate':>10}{'conflicts':>11}"]
+    for placement, loc in zip(placements, locality):
+        lines.append(f"{placement.name:<14}{placement.base:>12}{placement.units:>12}{placement.bank_offset:>6}"
+                     f"{loc.accesses:>10}{hit_rate(loc):>10.3f}{loc.conflicts:>11}")
+    end = placements[-1].base + placements[-1].units
+    lines.append(f"used {end} of {CAPACITY} units ({100 * end / CAPACITY:.1f}%)")
+    if outside is not None:
+        lines.append(f"{outside} accesses outside every region, {misaligned} misaligned")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan the DDR3 address map for the top_level regions.")
+    parser.add_argument("--width", type=int, default=ACTIVE_H)
+    parser.add_argument("--height", type=int, default=ACTIVE_V)
+    parser.add_argument("--package", help="write the SystemVerilog package here")
+    parser.add_argument("--trace", action="append", default=[], help="recorded .npz access trace to check")
+    args = parser.parse_args()
+
+    regions = default_regions(args.width, args.height)
+    placements = plan(regions)
+    clashes = check_overlap(placements)
+    assert not clashes, f"overlapping regions: {clashes}"
+
+    owners, words = synthetic_streams(regions)
+    addrs = np.empty(len(owners), dtype=np.int64)
+    for index, placement in enumerate(placements):
+        mine = owners == index
+        addrs[mine] = region_address(placement, words[mine])
+    print("synthetic concurrent streams:")
+    print(format_report(placements, row_locality(addrs, owners, len(placements))))
+
+    for path in args.trace:
+        locality, outside, misaligned = verify_trace(placements, load_trace(path))
+        print(f"\ntrace {path}:")
+        print(format_report(placements, locality, outside, misaligned))
+
+    if args.package:
+        with open(args.package, "w") as f:
+            f.write(render_package(placements))
+        print(f"\nWrote {args.package}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+`timescale 1ns / 1ps
+`default_nettype none
+
+// Generated by ddr_address_map.py -- do not edit by hand.
+// Units are MIG app_addr columns (8 per 128-bit word). Each region starts
+// BANK_OFFSET banks into a row stripe so concurrent streams use different banks.
+// top_level imports this package: list this file ahead of top_level.sv in every build.
+package ddr_address_map_pkg;
+  localparam [26:0] BG_MODEL_BASE_ADDR = 27'd0;
+  localparam [26:0] BG_MODEL_SIZE = 27'd7372800;
+  localparam [2:0] BG_MODEL_BANK_OFFSET = 3'd0;
+  localparam [26:0] FRAME_DATA_BASE_ADDR = 27'd7372800;
+  localparam [26:0] FRAME_DATA_SIZE = 27'd921600;
+  localparam [2:0] FRAME_DATA_BANK_OFFSET = 3'd0;
+  localparam [26:0] DISPLAY_DATA_BASE_ADDR = 27'd8299520;
+  localparam [26:0] DISPLAY_DATA_SIZE = 27'd921600;
+  localparam [2:0] DISPLAY_DATA_BANK_OFFSET = 3'd1;
+endpackage : ddr_address_map_pkg
+
+`default_nettype wire
@@ -0,0 +1,373 @@
+"""
+Clock-domain-crossing FIFO model and sizing simulator for the ddr_fifo_wrap paths.
+
+AsyncFifo models an xpm-style asynchronous FIFO: each side sees the other
+side's pointer only after `sync_stages` of its own clock edges, so the write
+side over-estimates occupancy (prog_full, full) and the read side
+under-estimates it (prog_empty, empty), exactly the conservative lag of gray
+pointer synchronizers. It can be clocked from cocotb (AsyncFifo.attach) or
+from the event-driven simulator below.
+
+simulate() runs both top_level FIFOs together on merged clk_pixel/clk_ui edge
+times:
+
+    frame_data_fifo    clk_pixel -> clk_ui   stacker chunks from the camera path,
+                                             drained by DDR writes
+    display_data_fifo  clk_ui -> clk_pixel   DDR read returns, drained by the
+                                             unstacker at one chunk per 8 pixels
+
+The MIG port is shared: like the traffic generator, each UI cycle issues a
+write if the frame FIFO is past its prog_empty "small pile" mark, otherwise a
+read if the display FIFO is below prog_full. app_rdy/app_wdf_rdy and the read
+latency follow a MigLatency profile (MigDDR's defaults unless overridden).
+size_fifos() sweeps both watermarks: the display prog_full margin, and the
+frame prog_empty mark that decides when writes take the port.
+
+The ddr_fifo_wrap source is not in this tree; DEFAULT_DEPTH and the
+watermarks below are assumptions to be replaced with the IP settings.
+
+    python ddr_fifo_model.py --lines 64 --trials 4
+    python ddr_fifo_model.py --depths 256 1024 --frame-empties 4 8 32
+"""
+import argparse
+from collections import deque, namedtuple
+
+import numpy as np
+
+from video_timing import ACTIVE_H, ACTIVE_V, TOTAL_H, TOTAL_V, PIXEL_CLOCK_HZ
+
+
+UI_CLOCK_HZ = 83_333_333       # MIG 4:1 UI clock for a 333 MHz DDR3 interface
+PIXELS_PER_CHUNK = 8
+DEFAULT_DEPTH = 1024
+DEFAULT_PROG_FULL = DEFAULT_DEPTH - 24
+DEFAULT_PROG_EMPTY = 8
+SYNC_STAGES = 2
+
+FifoStats = namedtuple("FifoStats", ["max_level", "min_level", "overflows", "underflows"])
+SimResult = namedtuple("SimResult", ["frame", "display", "reads", "writes", "ui_cycles", "pixel_cycles"])
+
+
+class AsyncFifo:
+    """
+    class AsyncFifo: asynchronous FIFO with synchronizer lag on both pointers
+
+    Call wr_edge()/rd_edge() once per clock edge of each domain (after the
+    push/pop of that cycle). store=False only counts entries, for the
+    simulator.
+    """
+
+    def __init__(self, depth=DEFAULT_DEPTH, prog_full=DEFAULT_PROG_FULL, prog_empty=DEFAULT_PROG_EMPTY,
+                 sync_stages=SYNC_STAGES, store=True):
+        self.depth = depth
+        self.prog_full_thresh = prog_full
+        self.prog_empty_thresh = prog_empty
+        self.items = deque() if store else None
+        self.wr_ptr = 0
+        self.rd_ptr = 0
+        self._rd_ptr_sync = deque([0] * sync_stages)   # read pointer as seen by the write side
+        self._wr_ptr_sync = deque([0] * sync_stages)   # write pointer as seen by the read side
+        self.overflows = 0
+        self.underflows = 0
+
+    # write domain
+    @property
+    def wr_count(self):
+        return self.wr_ptr - self._rd_ptr_sync[0]
+
+    @property
+    def full(self):
+        return self.wr_count >= self.depth
+
+    @property
+    def prog_full(self):
+        return self.wr_count >= self.prog_full_thresh
+
+    def push(self, item=None):
+        """Write one entry; returns False (and counts an overflow) if the FIFO is full."""
+        if self.full:
+            self.overflows += 1
+            return False
+        self.wr_ptr += 1
+        if self.items is not None:
+            self.items.append(item)
+        return True
+
+    def wr_edge(self):
+        self._rd_ptr_sync.append(self.rd_ptr)
+        self._rd_ptr_sync.popleft()
+
+    # read domain
+    @property
+    def rd_count(self):
+        return self._wr_ptr_sync[0] - self.rd_ptr
+
+    @property
+    def empty(self):
+        return self.rd_count <= 0
+
+    @property
+    def prog_empty(self):
+        return self.rd_count <= self.prog_empty_thresh
+
+    def pop(self):
+        """Read one entry; returns None (and counts an underflow) if the FIFO looks empty."""
+        if self.empty:
+            self.underflows += 1
+            return None
+        self.rd_ptr += 1
+        return self.items.popleft() if self.items is not None else True
+
+    def rd_edge(self):
+        self._wr_ptr_sync.append(self.wr_ptr)
+        self._wr_ptr_sync.popleft()
+
+    @property
+    def level(self):
+        """True occupancy (neither side can observe this directly)."""
+        return self.wr_ptr - self.rd_ptr
+
+    def attach(self, wr_clock, rd_clock):
+        """Advance the synchronizers from two cocotb clocks; returns the two tasks."""
+        import cocotb
+        from cocotb.triggers import RisingEdge
+
+        async def follow(clock, edge):
+            trigger = RisingEdge(clock)
+            while True:
+                await trigger
+                edge()
+
+        return (cocotb.start_soon(follow(wr_clock, self.wr_edge)),
+                cocotb.start_soon(follow(rd_clock, self.rd_edge)))
+
+
+class MigLatency:
+    """
+    class MigLatency: read latency and ready behaviour of the MIG UI
+
+    latency is a fixed cycle count, a (lo, hi) uniform range, or an array of
+    samples (e.g. measured from a MigDDR trace) drawn with replacement.
+    refresh_interval/refresh_cycles model app_rdy dropping for auto-refresh.
+    """
+
+    def __init__(self, latency=30, ready_chance=0.7, write_ready_chance=0.9,
+                 refresh_interval=0, refresh_cycles=0):
+        self.latency = latency
+        self.ready_chance = ready_chance
+        self.write_ready_chance = write_ready_chance
+        self.refresh_interval = refresh_interval
+        self.refresh_cycles = refresh_cycles
+
+    @classmethod
+    def migddr(cls):
+        """The defaults MigDDR.py simulates with."""
+        return cls(latency=30, ready_chance=0.7, write_ready_chance=0.9)
+
+    @classmethod
+    def ddr3(cls, ui_hz=UI_CLOCK_HZ):
+        """Rough hardware profile: 20-40 cycle reads and a 7.8 us / 260 ns refresh."""
+        return cls(latency=(20, 40), ready_chance=0.95, write_ready_chance=0.95,
+                   refresh_interval=int(7.8e-6 * ui_hz), refresh_cycles=int(260e-9 * ui_hz) + 1)
+
+    def sample(self, n, rng):
+        """Per-cycle (rdy, wdf_rdy, read latency) arrays for n UI cycles."""
+        rdy = rng.random(n) < self.ready_chance
+        wdf_rdy = rdy & (rng.random(n) < self.write_ready_chance)
+        if self.refresh_interval:
+            refreshing = (np.arange(n) % self.refresh_interval) < self.refresh_cycles
+            rdy &= ~refreshing
+            wdf_rdy &= ~refreshing
+        if np.isscalar(self.latency):
+            latency = np.full(n, int(self.latency))
+        elif len(self.latency) == 2:
+            latency = rng.integers(self.latency[0], self.latency[1] + 1, n)
+        else:
+            latency = rng.choice(np.asarray(self.latency, dtype=np.int64), n)
+        return rdy, wdf_rdy, latency
+
+
+def video_chunk_pattern(n_cycles, start_line=ACTIVE_V, width=ACTIVE_H, height=ACTIVE_V,
+                        total_h=TOTAL_H, total_v=TOTAL_V, pixels_per_chunk=PIXELS_PER_CHUNK):
+    """
+    Boolean per pixel clock: True on the cycle a whole chunk is produced/consumed.
+
+    The raster starts at the beginning of line `start_line` (the default is
+    the first line of vertical blanking, so FIFOs get the blanking to prefill).
+    """
+    cycle = np.arange(n_cycles) + start_line * total_h
+    h = cycle % total_h
+    v = (cycle // total_h) % total_v
+    active = (h < width) & (v < height)
+    return active & (h % pixels_per_chunk == pixels_per_chunk - 1)
+
+
+def burst_pattern(n_cycles, burst, gap, phase=0):
+    """Boolean per cycle: `burst` cycles on, `gap` cycles off."""
+    return ((np.arange(n_cycles) + phase) % (burst + gap)) < burst
+
+
+def edge_schedule(seconds, pixel_hz=PIXEL_CLOCK_HZ, ui_hz=UI_CLOCK_HZ, phase=0.0):
+    """Merged rising-edge order of the two clocks: True for clk_ui, False for clk_pixel."""
+    n_pixel = int(seconds * pixel_hz)
+    n_ui = int(seconds * ui_hz)
+    times = np.concatenate([np.arange(n_pixel) / pixel_hz, (np.arange(n_ui) + phase) / ui_hz])
+    is_ui = np.concatenate([np.zeros(n_pixel, dtype=bool), np.ones(n_ui, dtype=bool)])
+    return is_ui[np.argsort(times, kind="stable")], n_pixel, n_ui
+
+
+def simulate(lines=64, depth=DEFAULT_DEPTH, prog_full=DEFAULT_PROG_FULL, prog_empty=DEFAULT_PROG_EMPTY,
+             frame_depth=None, frame_prog_empty=None, mig=None, pixel_hz=PIXEL_CLOCK_HZ, ui_hz=UI_CLOCK_HZ,
+             camera_pattern=None, display_pattern=None, max_outstanding=64, other_load=0.0, seed=0):
+    """
+    Run both FIFOs for `lines` video lines (preceded by the vertical blanking).
+
+    camera_pattern/display_pattern override the per-pixel-cycle chunk
+    patterns (see video_chunk_pattern/burst_pattern). other_load is the
+    fraction of UI cycles taken by other masters on the port; the background
+    model reader alone needs one word per pixel, about 0.9 at 720p. Display
+    underflows are counted only once the first chunk has been read, i.e. from
+    the first active line on. Returns a SimResult.
+    """
+    rng = np.random.default_rng(seed)
+    mig = mig or MigLatency.migddr()
+    blank_lines = TOTAL_V - ACTIVE_V
+    seconds = (blank_lines + lines) * TOTAL_H / pixel_hz
+    schedule, n_pixel, n_ui = edge_schedule(seconds, pixel_hz, ui_hz, phase=rng.random())
+
+    display_due = video_chunk_pattern(n_pixel) if display_pattern is None else display_pattern
+    camera_due = video_chunk_pattern(n_pixel) if camera_pattern is None else camera_pattern
+    rdy, wdf_rdy, latency = mig.sample(n_ui, rng)
+    if other_load:
+        rdy &= rng.random(n_ui) >= other_load
+
+    frame = AsyncFifo(depth if frame_depth is None else frame_depth,
+                      prog_empty=prog_empty if frame_prog_empty is None else frame_prog_empty, store=False)
+    display = AsyncFifo(depth, prog_full, prog_empty, store=False)
+    frame_levels = [0, 0]
+    display_levels = [depth, 0]
+    returns = deque()          # UI cycle at which each outstanding read returns
+    reads = writes = 0
+    p = u = 0
+    started = False
+    for is_ui in schedule.tolist():
+        if is_ui:
+            # read data returning this cycle goes straight into the display FIFO
+            while returns and returns[0] <= u:
+                returns.popleft()
+                display.push()
+            if rdy[u]:
+                if not frame.prog_empty and wdf_rdy[u]:
+                    frame.pop()
+                    writes += 1
+                elif not display.prog_full and len(returns) < max_outstanding:
+                    # in-flight reads will land too, so count them against the FIFO
+                    if display.wr_count + len(returns) < display.depth:
+                        # the MIG returns reads in order
+                        returns.append(max(u + latency[u], returns[-1] if returns else 0))
+                        reads += 1
+            frame.rd_edge()
+            display.wr_edge()
+            level = frame.level
+            frame_levels[0] = max(frame_levels[0], level)
+            u += 1
+        else:
+            if camera_due[p]:
+                frame.push()
+            if display_due[p]:
+                if started:
+                    display.pop()
+                elif not display.empty:
+                    started = True
+                    display.pop()
+            frame.wr_edge()
+            display.rd_edge()
+            if started:
+                display_levels[0] = min(display_levels[0], display.level)
+            display_levels[1] = max(display_levels[1], display.level)
+            p += 1
+
+    return SimResult(
+        frame=FifoStats(frame_levels[0], 0, frame.overflows, 0),
+        display=FifoStats(display_levels[1], display_levels[0], display.overflows, display.underflows),
+        reads=reads, writes=writes, ui_cycles=n_ui, pixel_cycles=n_pixel)
+
+
+def size_fifos(depths=(64, 128, 256, 512, 1024, 2048), full_margins=(8, 32, 128), frame_empties=(DEFAULT_PROG_EMPTY,),
+               trials=3, lines=64, mig=None, **kwargs):
+    """
+    Sweep depth x display prog_full margin x frame prog_empty over `trials` seeds.
+
+    The frame FIFO's prog_empty is the "small pile" mark above which the
+    port writes before it reads, so it trades write latency against read
+    starvation. Returns a list of (depth, prog_full, frame prog_empty,
+    underflow probability, overflow probability, worst display low-water
+    level, worst frame high-water level) where probabilities are the fraction
+    of trials with at least one event.
+    """
+    rows = []
+    for depth in depths:
+        for margin in full_margins:
+            if margin >= depth:
+                continue
+            for empty in frame_empties:
+                if empty >= depth:
+                    continue
+                results = [simulate(lines, depth, depth - margin, frame_prog_empty=empty, mig=mig, seed=seed,
+                                    **kwargs)
+                           for seed in range(trials)]
+                under = sum(r.display.underflows > 0 for r in results) / trials
+                over = sum((r.display.overflows + r.frame.overflows) > 0 for r in results) / trials
+                low = min(r.display.min_level for r in results)
+                high = max(r.frame.max_level for r in results)
+                rows.append((depth, depth - margin, empty, under, over, low, high))
+    return rows
+
+
+def minimum_safe(rows):
+    """Smallest (depth, prog_full, frame prog_empty) with no underflow or overflow in any trial, or None."""
+    safe = [row for row in rows if row[3] == 0 and row[4] == 0]
+    # then the lowest frame high-water level: the write path waits least
+    return min(safe, key=lambda row: (row[0], -row[1], row[6])) if safe else None
+
+
+def format_report(rows):
+    lines = [f"{'depth':>7}{'prog_full':>11}{'prog_empty':>12}{'P(under)':>10}{'P(over)':>9}{'disp low':>10}"
+             f"{'frame high':>12}"]
+    for depth, full, empty, under, over, low, high in rows:
+        lines.append(f"{depth:>7}{full:>11}{empty:>12}{under:>10.2f}{over:>9.2f}{low:>10}{high:>12}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Size the clk_pixel/clk_ui DDR FIFOs.")
+    parser.add_argument("--lines", type=int, default=64, help="active lines simulated after vertical blanking")
+    parser.add_argument("--trials", type=int, default=3)
+    parser.add_argument("--pixel-hz", type=float, default=PIXEL_CLOCK_HZ)
+    parser.add_argument("--ui-hz", type=float, default=UI_CLOCK_HZ)
+    parser.add_argument("--profile", choices=["migddr", "ddr3"], default="migddr")
+    parser.add_argument("--latency", type=int, nargs="+",
+                        help="fixed latency, a lo hi range, or three or more samples")
+    parser.add_argument("--other-load", type=float, default=0.0,
+                        help="fraction of UI cycles used by other masters (e.g. the background model)")
+    parser.add_argument("--depths", type=int, nargs="+", default=[64, 128, 256, 512, 1024, 2048])
+    parser.add_argument("--frame-empties", type=int, nargs="+", default=[4, DEFAULT_PROG_EMPTY, 32, 128],
+                        help="frame FIFO prog_empty (write priority) marks to sweep")
+    args = parser.parse_args()
+
+    mig = MigLatency.migddr() if args.profile == "migddr" else MigLatency.ddr3(args.ui_hz)
+    if args.latency:
+        mig.latency = args.latency[0] if len(args.latency) == 1 else args.latency
+    rows = size_fifos(args.depths, frame_empties=args.frame_empties, trials=args.trials, lines=args.lines, mig=mig,
+                      pixel_hz=args.pixel_hz, ui_hz=args.ui_hz, other_load=args.other_load)
+    print(format_report(rows))
+    best = minimum_safe(rows)
+    if best:
+        print(f"\nminimum safe: depth {best[0]}, prog_full {best[1]}, frame prog_empty {best[2]} "
+              f"(display low water {best[5]}, frame high water {best[6]})")
+    else:
+        print("\nno configuration was underrun/overflow free")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Binary transaction traces for the DRAM interface.
+
+TraceRecorder appends one fixed-size record per MIG command into a
+preallocated NumPy buffer and flushes it to disk in bulk, so recording costs
+a single structured-array store per command instead of a formatted log line.
+MigDDR takes a recorder through its `trace` argument.
+
+Traces are saved as .npz with one array per field, which ddr_address_map's
+load_trace/verify_trace read directly; load() also accepts the raw .bin spill
+files. The analysis helpers work on the structured record array:
+
+    records = ddr_trace.load("run.npz")
+    t, rd, wr = ddr_trace.bandwidth(records, window=1000)
+    heat, t_edges, a_edges = ddr_trace.address_heatmap(records)
+    counts, edges = ddr_trace.latency_histogram(records)
+
+Replay goes either straight into a memory model (replay_into) or onto the
+app_* bus of a simulation as the master (TraceReplayer).
+"""
+import os
+
+import numpy as np
+
+from ddr_address_map import CMD_READ, CMD_WRITE, UNITS_PER_WORD
+
+
+RECORD = np.dtype([
+    ("cycle", "<i8"),
+    ("client", "u1"),
+    ("cmd", "u1"),
+    ("addr", "<u4"),
+    ("data_lo", "<u8"),
+    ("data_hi", "<u8"),
+    ("latency", "<i4"),
+])
+
+WORD_BYTES = 16
+MASK64 = (1 << 64) - 1
+
+
+class TraceRecorder:
+    """
+    class TraceRecorder: preallocated ring buffer of DRAM command records
+
+    With a path, the buffer is flushed to disk whenever it fills and on
+    close(); a path ending in .npz is assembled from the spilled chunks on
+    close. Without a path the buffer is a true ring and keeps the most recent
+    `capacity` records.
+    """
+
+    def __init__(self, path=None, capacity=1 << 16):
+        self.path = path
+        self.buffer = np.zeros(capacity, dtype=RECORD)
+        self.index = 0
+        self.total = 0
+        self._spill = None
+        if path:
+            self._spill_path = path + ".part" if path.endswith(".npz") else path
+            self._spill = open(self._spill_path, "wb")
+
+    def record(self, cycle, client, cmd, addr, data=0, latency=-1):
+        self.buffer[self.index] = (cycle, client, cmd, addr, data & MASK64, data >> 64, latency)
+        self.index += 1
+        self.total += 1
+        if self.index == len(self.buffer):
+            if self._spill is not None:
+                self.flush()
+            else:
+                self.index = 0
+
+    def flush(self):
+        if self._spill is not None and self.index:
+            self.buffer[:self.index].tofile(self._spill)
+            self.index = 0
+
+    def records(self):
+        """Records currently held in memory, oldest first."""
+        if self._spill is None and self.total >= len(self.buffer):
+            return np.concatenate([self.buffer[self.index:], self.buffer[:self.index]])
+        return self.buffer[:self.index].copy()
+
+    def close(self):
+        """Flush everything; returns the path written (or None for in-memory recorders)."""
+        if self._spill is None:
+            return None
+        self.flush()
+        self._spill.close()
+        self._spill = None
+        if self.path.endswith(".npz"):
+            save(self.path, np.fromfile(self._spill_path, dtype=RECORD))
+            os.remove(self._spill_path)
+        return self.path
+
+
+def save(path, records):
+    """Save records as .npz, one array per field (the format ddr_address_map.load_trace reads)."""
+    np.savez(path, **{name: records[name] for name in RECORD.names})
+
+
+def load(path):
+    """Load a trace (.npz or raw .bin) as a structured record array, sorted by cycle."""
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            records = np.zeros(len(data["addr"]), dtype=RECORD)
+            for name in RECORD.names:
+                if name in data.files:
+                    records[name] = data[name]
+    else:
+        records = np.fromfile(path, dtype=RECORD)
+    return records[np.argsort(records["cycle"], kind="stable")]
+
+
+def data_ints(records):
+    """128-bit data values of the records as Python ints."""
+    return [(int(hi) << 64) | int(lo) for lo, hi in zip(records["data_lo"].tolist(), records["data_hi"].tolist())]
+
+
+def bandwidth(records, window=1000, client=None):
+    """
+    Bytes read and written per `window` cycles.
+
+    Returns (window start cycles, read bytes, write bytes). Divide by
+    window / clock_hz to get bytes per second.
+    """
+    if client is not None:
+        records = records[records["client"] == client]
+    if not len(records):
+        return np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)
+    start = int(records["cycle"].min())
+    bins = (records["cycle"] - start) // window
+    n = int(bins.max()) + 1
+    reads = np.bincount(bins[records["cmd"] == CMD_READ], minlength=n) * WORD_BYTES
+    writes = np.bincount(bins[records["cmd"] == CMD_WRITE], minlength=n) * WORD_BYTES
+    return start + np.arange(n) * window, reads, writes
+
+
+def address_heatmap(records, time_bins=64, addr_bins=64, addr_range=None):
+    """2-D access counts over (time, address); returns (counts, cycle edges, address edges)."""
+    addr_range = addr_range or (int(records["addr"].min()), int(records["addr"].max()) + UNITS_PER_WORD)
+    cycle_range = (int(records["cycle"].min()), int(records["cycle"].max()) + 1)
+    return np.histogram2d(records["cycle"], records["addr"], bins=(time_bins, addr_bins),
+                          range=(cycle_range, addr_range))
+
+
+def latency_histogram(records, bins=32, cmd=CMD_READ):
+    """Histogram of recorded latencies (cycles) for one command type; unknown latencies are skipped."""
+    latency = records["latency"][(records["cmd"] == cmd) & (records["latency"] >= 0)]
+    return np.histogram(latency, bins=bins)
+
+
+def summary(records, clock_hz=None):
+    """One-paragraph text summary of a trace."""
+    reads = int(np.count_nonzero(records["cmd"] == CMD_READ))
+    writes = int(np.count_nonzero(records["cmd"] == CMD_WRITE))
+    span = int(records["cycle"].max() - records["cycle"].min() + 1) if len(records) else 0
+    lines = [f"{len(records)} commands ({reads} reads, {writes} writes) over {span} cycles"]
+    if span:
+        per_cycle = (reads + writes) * WORD_BYTES / span
+        rate = f", {per_cycle * clock_hz / 1e6:.1f} MB/s" if clock_hz else ""
+        lines.append(f"average {per_cycle:.2f} bytes/cycle{rate}")
+    latency = records["latency"][(records["cmd"] == CMD_READ) & (records["latency"] >= 0)]
+    if len(latency):
+        lines.append(f"read latency min/median/p99/max: {latency.min()}/{int(np.median(latency))}/"
+                     f"{int(np.percentile(latency, 99))}/{latency.max()}")
+    return "\n".join(lines)
+
+
+def replay_into(records, memory, check_reads=True):
+    """
+    Apply a trace to a MigDDR-style memory dict (keys are app_addr // 8).
+
+    Writes update memory; reads are compared against the recorded data when
+    check_reads is set. Returns the list of (record index, addr, expected,
+    found) read mismatches.
+    """
+    mismatches = []
+    data = data_ints(records)
+    for i, (cmd, addr) in enumerate(zip(records["cmd"].tolist(), records["addr"].tolist())):
+        key = addr // UNITS_PER_WORD
+        if cmd == CMD_WRITE:
+            memory[key] = data[i]
+        elif check_reads and key in memory and memory[key] != data[i]:
+            mismatches.append((i, addr, data[i], memory[key]))
+    return mismatches
+
+
+class TraceReplayer:
+    """
+    class TraceReplayer: drives a recorded trace onto an app_* bus as the master
+
+    Commands are issued no earlier than their recorded cycle (relative to
+    the first record) and held until app_rdy (and app_wdf_rdy for writes),
+    so back-pressure in the replayed system shows up as slip. With
+    timing="asap" the recorded spacing is ignored.
+    """
+
+    def __init__(self, dut, clock, records, client=None, timing="recorded"):
+        self.dut = dut
+        self.clock = clock
+        self.records = records if client is None else records[records["client"] == client]
+        self.timing = timing
+        self.slip = np.zeros(len(self.records), dtype=np.int64)
+
+    async def run(self):
+        from cocotb.triggers import FallingEdge, ReadOnly, RisingEdge
+
+        dut = self.dut
+        falling, rising, read_only = FallingEdge(self.clock), RisingEdge(self.clock), ReadOnly()
+        cycles = self.records["cycle"] - (self.records["cycle"][0] if len(self.records) else 0)
+        cmds = self.records["cmd"].tolist()
+        addrs = self.records["addr"].tolist()
+        data = data_ints(self.records)
+        cycle = 0
+        dut.app_en.value = 0
+        dut.app_wdf_wren.value = 0
+        await falling
+        for i in range(len(cmds)):
+            if self.timing == "recorded":
+                while cycle < cycles[i]:
+                    await rising
+                    cycle += 1
+                    await falling
+            is_write = cmds[i] == CMD_WRITE
+            dut.app_cmd.value = cmds[i]
+            dut.app_addr.value = addrs[i]
+            dut.app_en.value = 1
+            if is_write:
+                dut.app_wdf_data.value = data[i]
+                dut.app_wdf_wren.value = 1
+                dut.app_wdf_end.value = 1
+                dut.app_wdf_mask.value = 0
+            start = cycle
+            accepted = False
+            while not accepted:
+                await read_only
+                accepted = dut.app_rdy.value == 1 and (not is_write or dut.app_wdf_rdy.value == 1)
+                await rising
+                cycle += 1
+                await falling
+            self.slip[i] = cycle - 1 - start
+            # the next command, if due now, overrides these in the same step
+            dut.app_en.value = 0
+            dut.app_wdf_wren.value = 0
+        return self.slip
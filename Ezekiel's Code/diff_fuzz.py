@@ -0,0 +1,446 @@
+"""
+Differential fuzzing of the pixel modules against the golden models, with
+automatic shrinking of failures to small regression vectors.
+
+A search run drives seeded cases through one DUT (test_diff_fuzz.py) and
+compares every output with the vectorized model in pixel_models. Cases
+alternate between constrained-random vectors (the distortion_coverage
+generators) and scene tiles (a background trained on rgb_scene_frames and
+a frame with moving objects). The first failing case is written out and
+shrunk here, one simulator run per candidate:
+
+    fewer frames, smaller tile     frame targets (rebuilt with the new WIDTH/HEIGHT/NUM_FRAMES)
+    fewer vectors                  halves, then smaller and smaller chunks removed
+    simpler values                 fields zeroed, then halved, then single values
+
+A candidate is kept only if it still mismatches the model: test_fuzz_replay
+writes its mismatch count to $FUZZ_MISMATCHES, so a candidate that times
+out, crashes or fails to build is rejected. The result is saved as
+a standalone .npz regression vector (target, build parameters, stimulus,
+expected outputs) in fuzz_regressions/, which test_fuzz_replay replays in
+milliseconds with every later run of the target:
+
+    python diff_fuzz.py search classification --cases 40 --seed 7
+    python diff_fuzz.py search all
+    python diff_fuzz.py replay fuzz_regressions/brightness-3f9c0a2d51.npz
+
+Targets: brightness (BrightnessDistortion), chromaticity
+(ChromaticityDistortionTest), classification (PixelClassification), sqrt
+(CordicSqrt), and background (BackgroundModelTest, frames in, the mean of
+the first pixel out; CombinedBackgroundModel needs the MIG, stacker and
+traffic generator IP, which do not simulate here, so its on-chip twin
+stands in for it at frame level).
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+
+from bg_format_study import train_background
+from distortion_coverage import CHANNELS, generator
+from pixel_models import brightness_distortion, chromaticity_distortion, cordic_sqrt, pixel_classification
+from scenes import rgb_scene_frames
+
+
+TEST_MODULE = "test_diff_fuzz"
+TARGET_VAR = "FUZZ_TARGET"
+CASE_VAR = "FUZZ_CASE"
+SEED_VAR = "FUZZ_SEED"
+CASES_VAR = "FUZZ_CASES"
+OUT_VAR = "FUZZ_OUT"
+MISMATCH_VAR = "FUZZ_MISMATCHES"
+DIR_VAR = "FUZZ_REGRESSION_DIR"
+
+DEFAULT_CASES = 20
+VECTORS = 256
+SCENE_WIDTH = 32
+SCENE_HEIGHT = 8
+SHRINK_RUNS = 200
+# below this many stimulus values, single values are simplified one at a time
+ELEMENT_LIMIT = 64
+
+Target = namedtuple("Target", ["name", "toplevel", "sources", "random", "scene", "model", "params"])
+
+
+def _channels(stimulus, prefix):
+    return np.stack([np.asarray(stimulus[f"{prefix}_{c}"], dtype=np.int64) for c in CHANNELS], axis=-1)
+
+
+def _coverage_random(space):
+    def random(seed):
+        return generator(space, seed)[2].next_batch(VECTORS)
+    return random
+
+
+def _scene_tile(seed, width=SCENE_WIDTH, height=SCENE_HEIGHT):
+    """(frame, E, sigma, stats) of one scene tile with a background trained on the same tile."""
+    stats = train_background(rgb_scene_frames(8, width, height, n_blobs=0, seed=seed))
+    frame = next(rgb_scene_frames(1, width, height, n_blobs=2, radius=(2, height // 2), seed=seed))
+    E = np.floor(stats.mean).astype(np.int64)
+    sigma = np.floor(stats.sd).astype(np.int64)
+    return frame.astype(np.int64), E, sigma, stats
+
+
+def _scene_brightness(seed):
+    frame, E, sigma, _ = _scene_tile(seed)
+    ports = {"I": frame, "E": E, "sigma": sigma}
+    return {f"{p}_{c}": ports[p][..., i].ravel() for p in ports for i, c in enumerate(CHANNELS)}
+
+
+def _scene_chromaticity(seed):
+    frame, E, sigma, _ = _scene_tile(seed)
+    alpha = brightness_distortion(frame, E, sigma) & 0xFFFFFFFF
+    stimulus = {f"{p}_{c}": v[..., i].ravel() for p, v in (("I", frame), ("E", E)) for i, c in enumerate(CHANNELS)}
+    stimulus["alpha"] = alpha.ravel()
+    return stimulus
+
+
+def _scene_classification(seed):
+    frame, E, sigma, stats = _scene_tile(seed)
+    alpha = brightness_distortion(frame, E, sigma)
+    return {
+        "alpha": (alpha & 0xFFFFFFFF).ravel(),
+        "CD": chromaticity_distortion(frame, E, alpha).ravel(),
+        "SD_alpha": np.floor(stats.sd_alpha).astype(np.int64).ravel(),
+        "SD_CD": np.floor(stats.sd_cd).astype(np.int64).ravel(),
+    }
+
+
+def _random_sqrt(seed):
+    rng = np.random.default_rng(seed)
+    bits = rng.integers(0, 33, VECTORS)
+    return {"input_value": rng.integers(0, 1 << 32, VECTORS, dtype=np.int64) >> (32 - bits)}
+
+
+BACKGROUND_PARAMS = {"WIDTH": 4, "HEIGHT": 4, "NUM_FRAMES": 3}
+
+
+def _random_frames(seed):
+    p = BACKGROUND_PARAMS
+    rng = np.random.default_rng(seed)
+    return {"frames": rng.integers(0, 256, (p["NUM_FRAMES"], p["HEIGHT"], p["WIDTH"], 3), dtype=np.int64)}
+
+
+def _scene_frames(seed):
+    p = BACKGROUND_PARAMS
+    frames = rgb_scene_frames(p["NUM_FRAMES"], p["WIDTH"], p["HEIGHT"], n_blobs=1, radius=(1, 2), seed=seed)
+    return {"frames": np.stack(list(frames)).astype(np.int64)}
+
+
+def frame_params(stimulus):
+    n, height, width, _ = stimulus["frames"].shape
+    return {"WIDTH": width, "HEIGHT": height, "NUM_FRAMES": n}
+
+
+def background_model(stimulus):
+    """BackgroundModelTest: the Q16.16 mean of pixel 0, the first valid_out after training."""
+    frames = stimulus["frames"]
+    sums = frames[:, 0, 0].sum(axis=0)
+    return (sums << 16) // len(frames)
+
+
+TARGETS = {t.name: t for t in [
+    Target("brightness", "BrightnessDistortion", ["brightness_distortion.sv", "cordic_sqrt.sv"],
+           _coverage_random("brightness"), _scene_brightness,
+           lambda s: brightness_distortion(_channels(s, "I"), _channels(s, "E"), _channels(s, "sigma")), None),
+    Target("chromaticity", "ChromaticityDistortionTest", ["test_chroma.sv", "cordic_sqrt.sv"],
+           _coverage_random("chromaticity"), _scene_chromaticity,
+           lambda s: chromaticity_distortion(_channels(s, "I"), _channels(s, "E"), s["alpha"]), None),
+    Target("classification", "PixelClassification", ["pixel_classification.sv", "cordic_sqrt.sv"],
+           _coverage_random("classification"), _scene_classification,
+           lambda s: pixel_classification(s["alpha"], s["CD"], s["SD_alpha"], s["SD_CD"]), None),
+    Target("sqrt", "CordicSqrt", ["cordic_sqrt.sv"], _random_sqrt, None,
+           lambda s: cordic_sqrt(s["input_value"]), None),
+    Target("background", "BackgroundModelTest", ["background_model_test.sv", "cordic_sqrt.sv"],
+           _random_frames, _scene_frames, background_model, frame_params),
+]}
+
+
+def make_case(target, seed, kind):
+    """A case dict: target name, seed, kind ("random" or "scene"), stimulus arrays."""
+    t = TARGETS[target]
+    kind = kind if t.scene else "random"
+    source = t.scene if kind == "scene" else t.random
+    stimulus = {name: np.asarray(values, dtype=np.int64) for name, values in source(seed).items()}
+    return {"target": target, "seed": int(seed), "kind": kind, "stimulus": stimulus}
+
+
+def cases(target, seed, count):
+    """The seeded cases of a search: random and scene cases alternate."""
+    for k in range(count):
+        yield make_case(target, seed + k, "scene" if k % 2 else "random")
+
+
+def params(case):
+    t = TARGETS[case["target"]]
+    return t.params(case["stimulus"]) if t.params else {}
+
+
+def expected(case):
+    return np.asarray(TARGETS[case["target"]].model(case["stimulus"]), dtype=np.int64)
+
+
+def size(case):
+    return sum(v.size for v in case["stimulus"].values())
+
+
+# ---------------------------------------------------------------------------
+# Shrinking
+
+def _with(case, **stimulus):
+    return dict(case, stimulus=dict(case["stimulus"], **stimulus))
+
+
+def _vector_subsets(case):
+    """Fewer vectors: keep each half, then remove chunks of shrinking size (ddmin)."""
+    stimulus = case["stimulus"]
+    n = len(next(iter(stimulus.values())))
+    chunk = n // 2
+    while chunk >= 1:
+        for start in range(0, n, chunk):
+            keep = np.ones(n, dtype=bool)
+            keep[start:start + chunk] = False
+            if chunk == n // 2:
+                yield dict(case, stimulus={k: v[~keep] for k, v in stimulus.items()})
+            yield dict(case, stimulus={k: v[keep] for k, v in stimulus.items()})
+        chunk //= 2
+
+
+def _frame_crops(case):
+    """Fewer frames (at least two), then fewer rows and columns (at least two pixels)."""
+    frames = case["stimulus"]["frames"]
+    n, height, width, _ = frames.shape
+    if n > 2:
+        yield _with(case, frames=frames[:max(2, n // 2)])
+        yield _with(case, frames=frames[:n - 1])
+        yield _with(case, frames=frames[1:])
+    for rows in sorted({max(1, height // 2), height - 1}):
+        if 0 < rows < height and rows * width >= 2:
+            yield _with(case, frames=frames[:, :rows])
+    for cols in sorted({max(1, width // 2), width - 1}):
+        if 0 < cols < width and height * cols >= 2:
+            yield _with(case, frames=frames[:, :, :cols])
+
+
+def _simpler_values(case):
+    """Whole fields zeroed, then halved; single values once the case is small."""
+    stimulus = case["stimulus"]
+    for name, values in stimulus.items():
+        if values.any():
+            yield _with(case, **{name: np.zeros_like(values)})
+            yield _with(case, **{name: values >> 1})
+    if size(case) <= ELEMENT_LIMIT:
+        for name, values in stimulus.items():
+            for index in zip(*np.nonzero(values)):
+                for simpler in (0, int(values[index]) >> 1):
+                    changed = values.copy()
+                    changed[index] = simpler
+                    yield _with(case, **{name: changed})
+
+
+def reductions(case):
+    """Candidate reductions of a case, biggest first."""
+    if "frames" in case["stimulus"]:
+        yield from _frame_crops(case)
+    elif len(next(iter(case["stimulus"].values()))) > 1:
+        yield from _vector_subsets(case)
+    yield from _simpler_values(case)
+
+
+def shrink(case, fails, max_runs=SHRINK_RUNS, log=print):
+    """
+    Greedy shrinking: take the first reduction that still fails and start
+    over from it, until none does or max_runs candidates have been tried.
+    fails(case) -> bool runs one candidate. Returns (case, runs).
+    """
+    runs = 0
+    progress = True
+    while progress and runs < max_runs:
+        progress = False
+        for candidate in reductions(case):
+            if runs >= max_runs:
+                break
+            runs += 1
+            if fails(candidate):
+                case = candidate
+                progress = True
+                log(f"  shrunk to {size(case)} values {params(case) or ''}")
+                break
+    return case, runs
+
+
+# ---------------------------------------------------------------------------
+# Regression vector files
+
+def save_case(case, path):
+    arrays = {f"stimulus_{name}": values for name, values in case["stimulus"].items()}
+    meta = {k: case[k] for k in ("target", "seed", "kind")}
+    meta["params"] = params(case)
+    np.savez_compressed(path, meta=json.dumps(meta), expected=expected(case), **arrays)
+    return path
+
+
+def load_case(path):
+    with np.load(path) as data:
+        meta = json.loads(str(data["meta"]))
+        stimulus = {k[len("stimulus_"):]: data[k].astype(np.int64) for k in data.files if k.startswith("stimulus_")}
+        recorded = data["expected"]
+    case = dict(meta, stimulus=stimulus)
+    case.pop("params", None)
+    case["recorded"] = recorded
+    return case
+
+
+def regression_dir():
+    return Path(os.getenv(DIR_VAR, Path(__file__).resolve().parent / "fuzz_regressions"))
+
+
+def save_regression(case, directory=None):
+    """Save under a name derived from the stimulus, so a reproducer is only stored once."""
+    directory = Path(directory or regression_dir())
+    directory.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha1()
+    for name in sorted(case["stimulus"]):
+        digest.update(name.encode() + case["stimulus"][name].tobytes())
+    return save_case(case, directory / f"{case['target']}-{digest.hexdigest()[:10]}.npz")
+
+
+def regressions(target, directory=None):
+    return sorted(Path(directory or regression_dir()).glob(f"{target}-*.npz"))
+
+
+# ---------------------------------------------------------------------------
+# Simulator runs
+
+class SimOracle:
+    """class SimOracle: builds a target once per parameter set and runs cases through test_diff_fuzz"""
+
+    def __init__(self, target, runner=None, proj_path=None):
+        self.target = TARGETS[target]
+        self.proj_path = Path(proj_path or Path(__file__).resolve().parent.parent)
+        sys.path.append(str(self.proj_path / "sim" / "model"))
+        sys.path.append(str(self.proj_path / "sim"))
+        if runner is None:
+            from cocotb.runner import get_runner
+            runner = get_runner(os.getenv("SIM", "icarus"))
+        self.runner = runner
+        self._built = {}
+        self.runs = 0
+
+    def build_dir(self, parameters):
+        if not parameters:
+            return self.proj_path / "sim_build" / f"fuzz_{self.target.name}"
+        tag = "_".join(f"{k}{v}" for k, v in sorted(parameters.items()))
+        return self.proj_path / "sim_build" / f"fuzz_{self.target.name}_{tag}"
+
+    def build(self, parameters):
+        key = tuple(sorted(parameters.items()))
+        if key not in self._built:
+            build_dir = self.build_dir(parameters)
+            self.runner.build(
+                sources=[self.proj_path / "hdl" / source for source in self.target.sources],
+                hdl_toplevel=self.target.toplevel,
+                always=True,
+                build_args=["-Wall"],
+                parameters=parameters,
+                timescale=('1ns','1ps'),
+                build_dir=build_dir,
+                waves=False
+            )
+            self._built[key] = build_dir
+        return self._built[key]
+
+    def run(self, testcase, parameters, env):
+        """Run one testcase of test_diff_fuzz; True when it passed."""
+        from cocotb.runner import get_results
+        build_dir = self.build(parameters)
+        self.runs += 1
+        results = self.runner.test(
+            hdl_toplevel=self.target.toplevel,
+            test_module=TEST_MODULE,
+            testcase=testcase,
+            test_args=[],
+            build_dir=build_dir,
+            extra_env=dict(env, **{TARGET_VAR: self.target.name}),
+            waves=False
+        )
+        return get_results(Path(results))[1] == 0
+
+    def fails(self, case):
+        """True when the candidate still mismatches the model; timeouts, crashes and failed builds do not count."""
+        parameters = params(case)
+        directory = self.build_dir(parameters)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = save_case(case, directory / "candidate.npz")
+        count = directory / "mismatches.txt"
+        count.unlink(missing_ok=True)
+        try:
+            self.run("test_fuzz_replay", parameters, {CASE_VAR: str(path), MISMATCH_VAR: str(count)})
+        except SystemExit as error:
+            # the runner exits on a failed build or a simulator that died without results
+            print(f"  candidate {parameters or ''} rejected: {error}")
+            return False
+        return count.exists() and int(count.read_text()) > 0
+
+    def search(self, seed, count):
+        """Run count seeded cases; the first failing case, or None."""
+        parameters = params(make_case(self.target.name, seed, "random"))
+        out = self.build_dir(parameters) / "failing.npz"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.unlink(missing_ok=True)
+        self.run("test_fuzz_search", parameters, {SEED_VAR: str(seed), CASES_VAR: str(count), OUT_VAR: str(out)})
+        return load_case(out) if out.exists() else None
+
+
+def fuzz(target, seed=0, count=DEFAULT_CASES, max_runs=SHRINK_RUNS, directory=None):
+    """Search, then shrink the first failure and save it. Returns the regression path or None."""
+    oracle = SimOracle(target)
+    case = oracle.search(seed, count)
+    if case is None:
+        print(f"{target}: {count} cases from seed {seed} match the model")
+        return None
+    case.pop("recorded")
+    print(f"{target}: {case['kind']} case seed {case['seed']} mismatches, {size(case)} values; shrinking")
+    small, runs = shrink(case, oracle.fails, max_runs)
+    path = save_regression(small, directory)
+    print(f"{target}: {size(small)} values {params(small) or ''} after {runs} candidate runs, saved {path}")
+    return path
+
+
+def replay(path):
+    """Run one regression vector file through its target; True when it passes."""
+    case = load_case(path)
+    oracle = SimOracle(case["target"])
+    return oracle.run("test_fuzz_replay", params(case), {CASE_VAR: str(Path(path).resolve())})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    search_cmd = sub.add_parser("search", help="fuzz a target and shrink the first failure")
+    search_cmd.add_argument("target", choices=sorted(TARGETS) + ["all"])
+    search_cmd.add_argument("--seed", type=int, default=0)
+    search_cmd.add_argument("--cases", type=int, default=DEFAULT_CASES)
+    search_cmd.add_argument("--max-runs", type=int, default=SHRINK_RUNS, help="shrinking budget in simulator runs")
+    search_cmd.add_argument("--dir", help=f"regression directory (default ${DIR_VAR} or fuzz_regressions/)")
+    replay_cmd = sub.add_parser("replay", help="replay saved regression vectors")
+    replay_cmd.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "search":
+        targets = sorted(TARGETS) if args.target == "all" else [args.target]
+        found = [fuzz(t, args.seed, args.cases, args.max_runs, args.dir) for t in targets]
+        sys.exit(1 if any(found) else 0)
+    failed = [path for path in args.paths if not replay(path)]
+    for path in failed:
+        print(f"FAIL {path}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+ROM images for the image_digit glyphs, and whole-frame reference renderers.
+
+The glyphs come from the same segment geometry as the case statement in
+image_digit.sv (a 100x100 box, segments as half-open (lo, hi] ranges on
+hcount-x_in / vcount-y_in). Other WIDTH/HEIGHT values scale that geometry,
+THICKNESS stays in pixels. The ROM is written as a $readmemh file with
+`word_width` pixels packed per word, leftmost pixel in the LSB.
+
+    python digit_rom.py --out ../data/digits.mem --verify
+"""
+import argparse
+
+import numpy as np
+
+from video_timing import ACTIVE_H, ACTIVE_V
+
+
+REFERENCE_SIZE = 100
+NUM_DIGITS = 10
+
+# (x_lo, x_hi, y_lo, y_hi) in the 100x100 reference box; t marks "+ THICKNESS"
+SEGMENTS = {
+    "top":          (30, 70, 10, "10+t"),
+    "middle":       (30, 70, 50, "50+t"),
+    "bottom":       (30, 70, 90, "90+t"),
+    "left":         (30, "30+t", 10, 90),
+    "top_left":     (30, "30+t", 10, 50),
+    "bottom_left":  (30, "30+t", 50, 90),
+    "right":        (70, "70+t", 10, 90),
+    "top_right":    (70, "70+t", 10, 50),
+    "bottom_right": (70, "70+t", 50, 90),
+    "one":          (50, "50+t", 10, 90),
+}
+
+DIGIT_SEGMENTS = [
+    ("top", "right", "bottom", "left"),
+    ("one",),
+    ("top", "top_right", "middle", "bottom_left", "bottom"),
+    ("top", "right", "middle", "bottom"),
+    ("top_left", "middle", "right"),
+    ("top", "top_left", "middle", "bottom_right", "bottom"),
+    ("top", "left", "middle", "bottom_right", "bottom"),
+    ("top", "right"),
+    ("top", "right", "middle", "left", "bottom"),
+    ("top", "right", "middle", "top_left"),
+]
+
+# digit anchors used by Makar's top_level.sv (x_in, y_in), most significant first
+TOP_LEVEL_POSITIONS = [(10, 10), (110, 10), (210, 10), (310, 10), (410, 10)]
+
+
+def _bound(value, thickness, scale):
+    if isinstance(value, str):
+        base = int(value.split("+")[0])
+        return int(round(base * scale)) + thickness
+    return int(round(value * scale))
+
+
+def segment_rects(digit, width=REFERENCE_SIZE, height=REFERENCE_SIZE, thickness=3):
+    """(x_lo, x_hi, y_lo, y_hi) rectangles lighting `digit`; a pixel is on when lo < d <= hi."""
+    if not 0 <= digit < NUM_DIGITS:
+        return []
+    sx = width / REFERENCE_SIZE
+    sy = height / REFERENCE_SIZE
+    rects = []
+    for name in DIGIT_SEGMENTS[digit]:
+        x_lo, x_hi, y_lo, y_hi = SEGMENTS[name]
+        rects.append((_bound(x_lo, thickness, sx), _bound(x_hi, thickness, sx),
+                      _bound(y_lo, thickness, sy), _bound(y_hi, thickness, sy)))
+    return rects
+
+
+def render_glyphs(width=REFERENCE_SIZE, height=REFERENCE_SIZE, thickness=3):
+    """Boolean glyph images, shape (NUM_DIGITS, height, width)."""
+    dy = np.arange(height)[:, None]
+    dx = np.arange(width)[None, :]
+    glyphs = np.zeros((NUM_DIGITS, height, width), dtype=bool)
+    for digit in range(NUM_DIGITS):
+        for x_lo, x_hi, y_lo, y_hi in segment_rects(digit, width, height, thickness):
+            glyphs[digit] |= (dx > x_lo) & (dx <= x_hi) & (dy > y_lo) & (dy <= y_hi)
+    return glyphs
+
+
+def pack_rom(glyphs, word_width=1):
+    """Pack glyph rows into ROM words, word_width pixels each, leftmost pixel in the LSB."""
+    digits, height, width = glyphs.shape
+    words_per_row = -(-width // word_width)
+    padded = np.zeros((digits, height, words_per_row * word_width), dtype=np.uint64)
+    padded[..., :width] = glyphs
+    padded = padded.reshape(digits, height, words_per_row, word_width)
+    weights = np.left_shift(np.uint64(1), np.arange(word_width, dtype=np.uint64))
+    return (padded * weights).sum(axis=-1, dtype=np.uint64).reshape(-1)
+
+
+def unpack_rom(words, width, height, word_width=1):
+    """Inverse of pack_rom()."""
+    words = np.asarray(words, dtype=np.uint64)
+    words_per_row = -(-width // word_width)
+    bits = (words[:, None] >> np.arange(word_width, dtype=np.uint64)) & np.uint64(1)
+    bits = bits.reshape(-1, height, words_per_row * word_width)
+    return bits[..., :width].astype(bool)
+
+
+def write_mem(path, words, word_width=1):
+    """Write ROM words as a $readmemh file, one word per line."""
+    digits = max(1, -(-word_width // 4))
+    with open(path, "w") as f:
+        f.write("\n".join(f"{int(w):0{digits}x}" for w in words))
+        f.write("\n")
+
+
+def read_mem(path):
+    with open(path) as f:
+        return np.array([int(line, 16) for line in f if line.strip() and not line.startswith("//")],
+                        dtype=np.uint64)
+
+
+def render_case_frame(digits, positions=TOP_LEVEL_POSITIONS, width=100, height=100, thickness=3,
+                      frame_width=ACTIVE_H, frame_height=ACTIVE_V):
+    """
+    Whole-frame output of the OR of image_digit instances, as Makar's top_level combines them.
+
+    The case statement always uses the 100x100 geometry; WIDTH/HEIGHT only
+    bound in_sprite, so the glyph is clipped rather than scaled.
+    """
+    hc = np.arange(frame_width, dtype=np.int64)[None, :]
+    vc = np.arange(frame_height, dtype=np.int64)[:, None]
+    frame = np.zeros((frame_height, frame_width), dtype=bool)
+    for digit, (x, y) in zip(digits, positions):
+        dx, dy = hc - x, vc - y
+        in_sprite = (dx >= 0) & (dx < width) & (dy >= 0) & (dy < height)
+        pixel = np.zeros_like(frame)
+        for x_lo, x_hi, y_lo, y_hi in segment_rects(digit, thickness=thickness):
+            pixel |= (dx > x_lo) & (dx <= x_hi) & (dy > y_lo) & (dy <= y_hi)
+        frame |= in_sprite & pixel
+    return frame
+
+
+def render_rom_frame(glyphs, digits, positions=TOP_LEVEL_POSITIONS,
+                     frame_width=ACTIVE_H, frame_height=ACTIVE_V):
+    """Whole-frame output of ROM-based digit instances reading `glyphs` (as unpack_rom returns)."""
+    _, height, width = glyphs.shape
+    frame = np.zeros((frame_height, frame_width), dtype=bool)
+    for digit, (x, y) in zip(digits, positions):
+        if not 0 <= digit < len(glyphs):
+            continue
+        # paste the sprite, clipped to the frame
+        w = min(width, frame_width - x)
+        h = min(height, frame_height - y)
+        frame[y:y + h, x:x + w] |= glyphs[digit, :h, :w]
+    return frame
+
+
+def verify(glyphs, width=100, height=100, thickness=3, positions=TOP_LEVEL_POSITIONS, seed=0, random_frames=16):
+    """
+    Compare ROM rendering with the case-based rendering over whole frames.
+
+    Checks every digit value 0-15 in every slot, plus random digit mixes.
+    render_case_frame is a Python mirror of image_digit.sv; test_image_digit_rom
+    checks it and the ROM against the real module in simulation. Returns a list of (digits, mismatching pixel count) for failing frames.
+    Only the 100x100 glyphs have a case-based counterpart: image_digit.sv
+    clips other WIDTH/HEIGHT values instead of scaling, so they are rejected.
+    """
+    if (width, height) != (REFERENCE_SIZE, REFERENCE_SIZE):
+        raise ValueError(f"verify needs {REFERENCE_SIZE}x{REFERENCE_SIZE} glyphs, image_digit.sv does not scale "
+                         f"to {width}x{height}")
+    rng = np.random.default_rng(seed)
+    patterns = [[d] * len(positions) for d in range(16)]
+    patterns += rng.integers(0, 16, (random_frames, len(positions))).tolist()
+    failures = []
+    for digits in patterns:
+        expected = render_case_frame(digits, positions, width, height, thickness)
+        observed = render_rom_frame(glyphs, digits, positions)
+        bad = int(np.count_nonzero(expected != observed))
+        if bad:
+            failures.append((digits, bad))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate image_digit glyph ROM images.")
+    parser.add_argument("--width", type=int, default=100)
+    parser.add_argument("--height", type=int, default=100)
+    parser.add_argument("--thickness", type=int, default=3)
+    parser.add_argument("--word-width", type=int, default=1, help="pixels packed per ROM word")
+    parser.add_argument("--out", default="digits.mem")
+    parser.add_argument("--verify", action="store_true",
+                        help="check the ROM against the case-based renderer over whole frames "
+                             "(100x100 only; image_digit.sv does not scale, so other sizes are skipped)")
+    args = parser.parse_args()
+
+    glyphs = render_glyphs(args.width, args.height, args.thickness)
+    words = pack_rom(glyphs, args.word_width)
+    write_mem(args.out, words, args.word_width)
+    print(f"Wrote {len(words)} x {args.word_width}-bit words "
+          f"({NUM_DIGITS} glyphs of {args.width}x{args.height}) to {args.out}")
+
+    if args.verify and (args.width, args.height) != (REFERENCE_SIZE, REFERENCE_SIZE):
+        print(f"--verify skipped: image_digit.sv only draws the {REFERENCE_SIZE}x{REFERENCE_SIZE} geometry")
+    elif args.verify:
+        rom = unpack_rom(read_mem(args.out), args.width, args.height, args.word_width)
+        failures = verify(rom, args.width, args.height, args.thickness)
+        for digits, bad in failures:
+            print(f"MISMATCH digits={digits}: {bad} pixels differ")
+        print("ROM matches case-based image_digit" if not failures else f"{len(failures)} frames differ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""
+Functional coverage for PixelClassification, BrightnessDistortion and
+ChromaticityDistortionTest, with generators aimed at every bin.
+
+Each space provides a covergroup, a sample function turning a stimulus batch
+(plus, optionally, what the DUT produced) into the quantities the bins are
+defined on, a dict of targeted generators and a blind generator that draws
+uniformly over the input widths:
+
+    group, sample_fn, targets, blind = SPACES["classification"]()
+
+The bins cover the result classes, the distance of alpha and CD from each
+threshold (including equality and off-by-one on either side), the zero
+sigma/zero mean guards and the places where the HDL's fixed-width arithmetic
+wraps. The blind generator almost never reaches the single-value bins;
+`python distortion_coverage.py` measures how many vectors each approach
+needs to close every group.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from func_coverage import ConstrainedRandom, CoverGroup, CoverPoint, close
+from pixel_models import (E_ALPHA, K1, K2, K3, brightness_distortion, brightness_terms,
+                          chromaticity_terms, cordic_sqrt, pixel_classification, to_signed)
+
+
+CLASSES = ["background", "foreground", "shadow", "highlight"]
+DISTANCE = ["far_below", "below_by_1", "equal", "above_by_1", "far_above"]
+CHANNELS = ("R", "G", "B")
+
+
+def distance_bin(value, threshold):
+    """Index into DISTANCE for value - threshold."""
+    d = np.asarray(value, dtype=np.int64) - np.asarray(threshold, dtype=np.int64)
+    return np.clip(d, -2, 2) + 2
+
+
+def _u32(values):
+    return np.asarray(values, dtype=np.int64) & 0xFFFFFFFF
+
+
+def _channels(stimulus, prefix):
+    return np.stack([np.asarray(stimulus[f"{prefix}_{c}"], dtype=np.int64) for c in CHANNELS], axis=-1)
+
+
+# ---------------------------------------------------------------------------
+# PixelClassification: alpha, CD, SD_alpha, SD_CD
+
+def classification_thresholds(sd_alpha, sd_cd):
+    """(a_lo, a_hi, b) as the signed 32-bit registers."""
+    sd_alpha = np.asarray(sd_alpha, dtype=np.int64)
+    a_lo = to_signed(E_ALPHA - K1 * sd_alpha, 32)
+    a_hi = to_signed(E_ALPHA + K2 * sd_alpha, 32)
+    b = to_signed(K3 * np.asarray(sd_cd, dtype=np.int64), 32)
+    return a_lo, a_hi, b
+
+
+def classification_sample(stimulus, observed=None):
+    alpha = to_signed(stimulus["alpha"], 32)
+    cd = to_signed(stimulus["CD"], 32)
+    sd_alpha = _u32(stimulus["SD_alpha"])
+    sd_cd = _u32(stimulus["SD_CD"])
+    a_lo, a_hi, b = classification_thresholds(sd_alpha, sd_cd)
+    if observed is None:
+        observed = pixel_classification(alpha, cd, sd_alpha, sd_cd)
+    return {"alpha": alpha, "cd": cd, "sd_alpha": sd_alpha, "sd_cd": sd_cd,
+            "a_lo": a_lo, "a_hi": a_hi, "b": b, "class": np.asarray(observed, dtype=np.int64)}
+
+
+def classification_group():
+    guards = ["sd_alpha_zero", "sd_cd_zero", "a_lo_negative", "a_hi_wrapped", "band_inverted",
+              "b_negative", "alpha_negative", "cd_negative"]
+    priority = ["fg_over_shadow", "fg_over_highlight", "fg_on_boundary_band"]
+    return CoverGroup("classification", [
+        CoverPoint("class", CLASSES, lambda s: s["class"]),
+        CoverPoint("cd_vs_b", DISTANCE, lambda s: distance_bin(s["cd"], s["b"])),
+        CoverPoint("alpha_vs_a_lo", DISTANCE, lambda s: distance_bin(s["alpha"], s["a_lo"])),
+        CoverPoint("alpha_vs_a_hi", DISTANCE, lambda s: distance_bin(s["alpha"], s["a_hi"])),
+        CoverPoint("guards", guards, lambda s: np.stack([
+            s["sd_alpha"] == 0,
+            s["sd_cd"] == 0,
+            s["a_lo"] < 0,
+            E_ALPHA + K2 * s["sd_alpha"] >= 1 << 31,
+            s["a_lo"] > s["a_hi"],
+            s["b"] < 0,
+            s["alpha"] < 0,
+            s["cd"] < 0,
+        ], axis=1)),
+        CoverPoint("priority", priority, lambda s: np.stack([
+            (s["cd"] > s["b"]) & (s["alpha"] < s["a_lo"]),
+            (s["cd"] > s["b"]) & (s["alpha"] > s["a_hi"]),
+            (s["cd"] > s["b"]) & ((s["alpha"] == s["a_lo"]) | (s["alpha"] == s["a_hi"])),
+        ], axis=1)),
+    ])
+
+
+def classification_blind(rng, n):
+    return {name: rng.integers(0, 1 << 32, n, dtype=np.int64)
+            for name in ("alpha", "CD", "SD_alpha", "SD_CD")}
+
+
+def _classification_base(rng, n):
+    """Realistic operating point: small sigmas, alpha near 1.0, CD near its threshold."""
+    sd_alpha = rng.integers(1, 1 << 14, n, dtype=np.int64)
+    sd_cd = rng.integers(1, 1 << 14, n, dtype=np.int64)
+    alpha = E_ALPHA + rng.integers(-4, 5, n) * sd_alpha
+    cd = rng.integers(0, 5, n) * sd_cd
+    return {"alpha": alpha, "CD": cd, "SD_alpha": sd_alpha, "SD_CD": sd_cd}
+
+
+def _classification_target(**rules):
+    """Generator applying `rules` (name -> f(stimulus, rng, n)) in order on top of the base draw."""
+    def generate(rng, n):
+        stimulus = _classification_base(rng, n)
+        for name, rule in rules.items():
+            stimulus[name] = np.asarray(rule(stimulus, rng, n), dtype=np.int64)
+        return {name: _u32(values) for name, values in stimulus.items()}
+    return generate
+
+
+def _offset_rule(threshold, offsets):
+    def rule(s, rng, n):
+        a_lo, a_hi, b = classification_thresholds(s["SD_alpha"], s["SD_CD"])
+        base = {"a_lo": a_lo, "a_hi": a_hi, "b": b}[threshold]
+        return base + rng.choice(offsets, n)
+    return rule
+
+
+def classification_targets():
+    below_b = lambda s, rng, n: K3 * s["SD_CD"] - rng.integers(0, 1 << 12, n)
+    above_b = lambda s, rng, n: K3 * s["SD_CD"] + rng.integers(1, 1 << 12, n)
+    in_band = lambda s, rng, n: E_ALPHA + rng.integers(-1, 2, n) * s["SD_alpha"]
+    far = {"far_below": [-1000, -2], "below_by_1": [-1], "equal": [0], "above_by_1": [1], "far_above": [2, 1000]}
+    targets = {
+        "class.background": _classification_target(alpha=in_band, CD=below_b),
+        "class.foreground": _classification_target(CD=above_b),
+        "class.shadow": _classification_target(alpha=_offset_rule("a_lo", [-1000, -1]), CD=below_b),
+        "class.highlight": _classification_target(alpha=_offset_rule("a_hi", [1, 1000]), CD=below_b),
+        "guards.sd_alpha_zero": _classification_target(SD_alpha=lambda s, rng, n: np.zeros(n)),
+        "guards.sd_cd_zero": _classification_target(SD_CD=lambda s, rng, n: np.zeros(n)),
+        "guards.a_lo_negative": _classification_target(
+            SD_alpha=lambda s, rng, n: rng.integers(E_ALPHA // 2 + 1, 1 << 29, n)),
+        "guards.a_hi_wrapped": _classification_target(
+            SD_alpha=lambda s, rng, n: rng.integers((1 << 30) - E_ALPHA // 2, 1 << 31, n)),
+        "guards.band_inverted": _classification_target(
+            SD_alpha=lambda s, rng, n: rng.integers(1 << 30, 1 << 31, n)),
+        "guards.b_negative": _classification_target(
+            SD_CD=lambda s, rng, n: rng.integers(1 << 30, 1 << 31, n)),
+        "guards.alpha_negative": _classification_target(alpha=lambda s, rng, n: -rng.integers(1, 1 << 20, n)),
+        "guards.cd_negative": _classification_target(CD=lambda s, rng, n: -rng.integers(1, 1 << 20, n)),
+        "priority.fg_over_shadow": _classification_target(alpha=_offset_rule("a_lo", [-1000, -1]), CD=above_b),
+        "priority.fg_over_highlight": _classification_target(alpha=_offset_rule("a_hi", [1, 1000]), CD=above_b),
+        "priority.fg_on_boundary_band": _classification_target(alpha=_offset_rule("a_lo", [0]), CD=above_b),
+    }
+    for name, offsets in far.items():
+        targets[f"cd_vs_b.{name}"] = _classification_target(CD=_offset_rule("b", offsets))
+        targets[f"alpha_vs_a_lo.{name}"] = _classification_target(alpha=_offset_rule("a_lo", offsets))
+        targets[f"alpha_vs_a_hi.{name}"] = _classification_target(alpha=_offset_rule("a_hi", offsets))
+    return targets
+
+
+# ---------------------------------------------------------------------------
+# BrightnessDistortion: I_*, E_*, sigma_*
+
+ALPHA_RANGES = ["zero", "below_half", "below_one", "one", "below_two", "below_16", "above_16"]
+
+
+def brightness_sample(stimulus, observed=None):
+    I = _channels(stimulus, "I")
+    E = _channels(stimulus, "E")
+    sigma = _channels(stimulus, "sigma")
+    N, D = brightness_terms(I, E, sigma)
+    alpha = brightness_distortion(I, E, sigma) if observed is None else to_signed(observed, 32)
+    return {"I": I, "E": E, "sigma": sigma, "N": N, "D": D, "alpha": np.asarray(alpha, dtype=np.int64)}
+
+
+def brightness_group():
+    edges = np.array([1, E_ALPHA // 2, E_ALPHA, E_ALPHA + 1, 2 * E_ALPHA, 16 * E_ALPHA])
+    guards = ["sigma_zero_one", "sigma_zero_all", "e_zero_some", "e_zero_all", "i_zero", "i_max",
+              "e_max", "remainder_zero"]
+    return CoverGroup("brightness", [
+        CoverPoint("alpha", ALPHA_RANGES, lambda s: np.searchsorted(edges, s["alpha"], side="right")),
+        CoverPoint("guards", guards, lambda s: np.stack([
+            (s["sigma"] == 0).sum(axis=-1) == 1,
+            (s["sigma"] == 0).all(axis=-1),
+            (s["E"] == 0).any(axis=-1) & (s["E"] != 0).any(axis=-1),
+            (s["E"] == 0).all(axis=-1),
+            (s["I"] == 0).all(axis=-1),
+            (s["I"] == 255).all(axis=-1),
+            (s["E"] == 0xFFFF).any(axis=-1),
+            (s["D"] != 0) & ((s["N"] << np.uint64(16)) % np.where(s["D"] != 0, s["D"], 1) == 0),
+        ], axis=1)),
+    ])
+
+
+def _brightness(I, E, sigma):
+    stimulus = {}
+    for i, c in enumerate(CHANNELS):
+        stimulus[f"I_{c}"] = I[:, i]
+        stimulus[f"E_{c}"] = E[:, i]
+        stimulus[f"sigma_{c}"] = sigma[:, i]
+    return stimulus
+
+
+def brightness_blind(rng, n):
+    return _brightness(rng.integers(0, 256, (n, 3)), rng.integers(0, 1 << 16, (n, 3)),
+                       rng.integers(0, 1 << 16, (n, 3)))
+
+
+def _brightness_target(I=None, E=None, sigma=None):
+    def generate(rng, n):
+        e = E(rng, n) if E else rng.integers(1, 256, (n, 3))
+        i = I(rng, n, e) if I else rng.integers(0, 256, (n, 3))
+        s = sigma(rng, n) if sigma else rng.integers(1, 64, (n, 3))
+        return _brightness(np.asarray(i), np.asarray(e), np.asarray(s))
+    return generate
+
+
+def _scaled(lo, hi):
+    """I = E * ratio with ratio drawn from [lo, hi), clipped to the 8-bit input."""
+    return lambda rng, n, e: np.clip((e * rng.uniform(lo, hi, (n, 1))).astype(np.int64), 0, 255)
+
+
+def brightness_targets():
+    one_zero = lambda rng, n: np.where(np.eye(3, dtype=bool)[rng.integers(0, 3, n)], 0, rng.integers(1, 64, (n, 3)))
+    small_e = lambda rng, n: rng.integers(1, 16, (n, 3))
+    return {
+        "alpha.zero": _brightness_target(I=lambda rng, n, e: np.zeros((n, 3), dtype=np.int64)),
+        "alpha.below_half": _brightness_target(I=_scaled(0.05, 0.45)),
+        "alpha.below_one": _brightness_target(I=_scaled(0.55, 0.95)),
+        "alpha.one": _brightness_target(I=lambda rng, n, e: e),
+        "alpha.below_two": _brightness_target(E=lambda rng, n: rng.integers(1, 128, (n, 3)), I=_scaled(1.1, 1.9)),
+        "alpha.below_16": _brightness_target(E=small_e, I=_scaled(2.5, 15)),
+        "alpha.above_16": _brightness_target(E=lambda rng, n: rng.integers(1, 8, (n, 3)),
+                                             I=lambda rng, n, e: rng.integers(200, 256, (n, 3))),
+        "guards.sigma_zero_one": _brightness_target(sigma=one_zero),
+        "guards.sigma_zero_all": _brightness_target(sigma=lambda rng, n: np.zeros((n, 3), dtype=np.int64)),
+        "guards.e_zero_some": _brightness_target(
+            E=lambda rng, n: np.where(np.eye(3, dtype=bool)[rng.integers(0, 3, n)], 0, rng.integers(1, 256, (n, 3)))),
+        "guards.e_zero_all": _brightness_target(E=lambda rng, n: np.zeros((n, 3), dtype=np.int64)),
+        "guards.i_zero": _brightness_target(I=lambda rng, n, e: np.zeros((n, 3), dtype=np.int64)),
+        "guards.i_max": _brightness_target(I=lambda rng, n, e: np.full((n, 3), 255)),
+        "guards.e_max": _brightness_target(E=lambda rng, n: np.full((n, 3), 0xFFFF)),
+        "guards.remainder_zero": _brightness_target(I=lambda rng, n, e: e),
+    }
+
+
+# ---------------------------------------------------------------------------
+# ChromaticityDistortionTest: I_*, E_*, alpha
+
+CD_RANGES = ["zero", "below_one", "below_16", "above_16"]
+
+
+def chromaticity_sample(stimulus, observed=None):
+    I = _channels(stimulus, "I")
+    E = _channels(stimulus, "E")
+    alpha = to_signed(stimulus["alpha"], 32)
+    terms = chromaticity_terms(I, E, alpha)
+    if observed is None:
+        observed = cordic_sqrt(terms["sum_deltas"] & 0xFFFFFFFF)
+    alpha_u = (alpha & 0xFFFFFFFF).astype(np.uint64)[:, None]
+    return dict(terms, I=I, E=E, alpha=alpha, cd=np.asarray(observed, dtype=np.int64),
+                product=alpha_u * E.astype(np.uint64))
+
+
+def chromaticity_group():
+    edges = np.array([1, E_ALPHA, 16 * E_ALPHA])
+    paths = ["e_zero_some", "e_zero_all", "alpha_negative", "alpha_e_wrap", "numerator_wrap",
+             "delta_negative", "delta_sq_wrap", "sum_negative"]
+    return CoverGroup("chromaticity", [
+        CoverPoint("cd", CD_RANGES, lambda s: np.searchsorted(edges, s["cd"], side="right")),
+        CoverPoint("paths", paths, lambda s: np.stack([
+            (s["E"] == 0).any(axis=-1) & (s["E"] != 0).any(axis=-1),
+            (s["E"] == 0).all(axis=-1),
+            s["alpha"] < 0,
+            (s["product"] >> np.uint64(32) != 0).any(axis=-1),
+            ((s["I"] << 16) < s["alpha_E"].astype(np.int64)).any(axis=-1),
+            (s["delta"] < 0).any(axis=-1),
+            (s["delta"] * s["delta"] >= 1 << 47).any(axis=-1),
+            s["sum_deltas"] < 0,
+        ], axis=1)),
+    ])
+
+
+def _chromaticity(I, E, alpha):
+    stimulus = {"alpha": _u32(alpha)}
+    for i, c in enumerate(CHANNELS):
+        stimulus[f"I_{c}"] = I[:, i]
+        stimulus[f"E_{c}"] = E[:, i]
+    return stimulus
+
+
+def chromaticity_blind(rng, n):
+    return _chromaticity(rng.integers(0, 256, (n, 3)), rng.integers(0, 1 << 16, (n, 3)),
+                         rng.integers(0, 1 << 32, n, dtype=np.int64))
+
+
+def _chromaticity_target(I=None, E=None, alpha=None):
+    def generate(rng, n):
+        i = I(rng, n) if I else rng.integers(0, 256, (n, 3))
+        e = E(rng, n) if E else rng.integers(256, 1 << 16, (n, 3))
+        a = alpha(rng, n) if alpha else rng.integers(E_ALPHA // 2, 2 * E_ALPHA, n)
+        return _chromaticity(np.asarray(i), np.asarray(e), np.asarray(a))
+    return generate
+
+
+def chromaticity_targets():
+    zeros = lambda rng, n: np.zeros((n, 3), dtype=np.int64)
+    return {
+        "cd.zero": _chromaticity_target(I=zeros, alpha=lambda rng, n: np.zeros(n, dtype=np.int64)),
+        "cd.below_one": _chromaticity_target(E=lambda rng, n: rng.integers(1 << 15, 1 << 16, (n, 3)),
+                                             I=lambda rng, n: rng.integers(0, 4, (n, 3))),
+        "cd.below_16": _chromaticity_target(E=lambda rng, n: rng.integers(1 << 12, 1 << 14, (n, 3))),
+        "cd.above_16": _chromaticity_target(E=lambda rng, n: rng.integers(1, 1 << 8, (n, 3))),
+        "paths.e_zero_some": _chromaticity_target(
+            E=lambda rng, n: np.where(np.eye(3, dtype=bool)[rng.integers(0, 3, n)], 0,
+                                      rng.integers(256, 1 << 16, (n, 3)))),
+        "paths.e_zero_all": _chromaticity_target(E=zeros),
+        "paths.alpha_negative": _chromaticity_target(alpha=lambda rng, n: -rng.integers(1, 1 << 20, n)),
+        "paths.alpha_e_wrap": _chromaticity_target(alpha=lambda rng, n: rng.integers(1 << 17, 1 << 31, n)),
+        "paths.numerator_wrap": _chromaticity_target(I=zeros),
+        # a wrapped numerator divided by E = 1 lands in the sign bit, by E = 2 just below it
+        "paths.delta_negative": _chromaticity_target(I=zeros, E=lambda rng, n: np.ones((n, 3), dtype=np.int64),
+                                                     alpha=lambda rng, n: rng.integers(E_ALPHA, 1 << 24, n)),
+        "paths.delta_sq_wrap": _chromaticity_target(I=zeros, E=lambda rng, n: np.full((n, 3), 2),
+                                                    alpha=lambda rng, n: rng.integers(E_ALPHA, 1 << 24, n)),
+        "paths.sum_negative": _chromaticity_target(E=lambda rng, n: rng.integers(1, 3, (n, 3)),
+                                                   I=lambda rng, n: rng.integers(64, 128, (n, 3))),
+    }
+
+
+SPACES = {
+    "classification": lambda: (classification_group(), classification_sample,
+                               classification_targets(), classification_blind),
+    "brightness": lambda: (brightness_group(), brightness_sample, brightness_targets(), brightness_blind),
+    "chromaticity": lambda: (chromaticity_group(), chromaticity_sample,
+                             chromaticity_targets(), chromaticity_blind),
+}
+
+
+def generator(space, seed=None):
+    """(group, sample_fn, ConstrainedRandom) for a named space."""
+    group, sample_fn, targets, blind = SPACES[space]()
+    return group, sample_fn, ConstrainedRandom(group, targets, blind, seed)
+
+
+def closure_study(space, seed=0, batch=256, blind_batch=1 << 16, blind_budget=1 << 24):
+    """Vectors (and seconds) to close `space` with targeted stimulus and with blind random."""
+    group, sample_fn, stimulus = generator(space, seed)
+    start = time.perf_counter()
+    directed = close(group, stimulus, sample_fn, batch=batch)
+    directed_time = time.perf_counter() - start
+    directed_holes = group.holes()
+
+    blind_group, _, _, blind = SPACES[space]()
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    while blind_group.holes() and blind_group.vectors < blind_budget:
+        blind_group.sample(sample_fn(blind(rng, blind_batch)))
+    blind_time = time.perf_counter() - start
+    return {"space": space, "directed": directed, "directed_s": directed_time, "directed_holes": directed_holes,
+            "blind": blind_group.vectors, "blind_s": blind_time, "blind_holes": blind_group.holes()}
+
+
+def format_study(result):
+    blind = f"{result['blind']:,} vectors"
+    if result["blind_holes"]:
+        blind = f"not closed after {blind}, {len(result['blind_holes'])} holes " \
+                f"({', '.join(result['blind_holes'][:4])}{', ...' if len(result['blind_holes']) > 4 else ''})"
+    directed = f"{result['directed']:,} vectors"
+    if result["directed_holes"]:
+        directed += f" with holes {result['directed_holes']}"
+    return (f"{result['space']:<15} targeted: {directed} ({result['directed_s']:.2f}s)   "
+            f"blind: {blind} ({result['blind_s']:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coverage closure with targeted vs blind random stimulus")
+    parser.add_argument("--space", choices=sorted(SPACES), action="append")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--blind-budget", type=int, default=1 << 24)
+    args = parser.parse_args()
+    for space in args.space or list(SPACES):
+        print(format_study(closure_study(space, seed=args.seed, blind_budget=args.blind_budget)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Precision explorer for the divide datapaths of the classification chain.
+
+BrightnessDistortion divides each channel's I*E and E*E by sigma (six 64-bit
+dividers), then divides N << 16 by D; ChromaticityDistortionTest divides each
+channel's numerator by E. This tool re-evaluates those datapaths with
+narrower registers, fewer fraction bits, or dividers replaced by reciprocal
+lookups and a multiply, and measures the error in alpha and CD and the
+classification flips against the current HDL (the bit-exact pixel_models
+chain) on realistic scenes.
+
+Precision fields (None keeps the current exact divider):
+    nd_frac         fraction bits of the N/D terms (16 today: term << 16 / sigma)
+    nd_bits         width of the N and D registers (64), wrapping like the HDL
+    sigma_lut       reciprocal table over sigma = 1..sigma_lut-1 (larger sigmas clamp)
+    sigma_recip     fraction bits of those reciprocals: r = floor(2^sigma_recip / sigma)
+    alpha_lut       index bits of a normalized reciprocal table for (N << 16) / D
+    delta_bits      width of the chromaticity delta registers (32); delta^2 is delta_bits + 16
+    e_lut           index bits of a normalized reciprocal table for numerator / E
+    newton          Newton-Raphson steps refining those table reciprocals (0)
+
+Normalized reciprocal division shifts the divisor to [1, 2), looks up
+1 / (1 + (i + 0.5) / 2^bits) with bits + 2 fraction bits, optionally refines
+it with r = r * (2 - d * r) (each step doubles the fraction bits, two more
+multiplies), and multiplies; the product is evaluated in float64 before the
+final floor, so it can differ from RTL by one LSB once it passes 2^53. CombinedBackgroundModel's per-pixel
+divides are by the running sums and by NUM_FRAMES; they would use the same
+normalized-reciprocal divider (or a constant multiply) and are not modelled
+separately.
+
+    python divider_precision.py --width 160 --height 90
+    python divider_precision.py --custom "mine:nd_frac=6,nd_bits=40,alpha_lut=7"
+"""
+import argparse
+from collections import namedtuple
+
+import numpy as np
+
+from bg_format_study import train_background
+from pixel_models import FOREGROUND, MASK32, cordic_sqrt, pixel_classification, to_signed
+from scenes import read_rgb_frames, rgb_scene_frames
+
+
+Precision = namedtuple("Precision", ["name", "nd_frac", "nd_bits", "sigma_lut", "sigma_recip",
+                                     "alpha_lut", "delta_bits", "e_lut", "newton"])
+
+
+def precision(name, nd_frac=16, nd_bits=64, sigma_lut=None, sigma_recip=None, alpha_lut=None,
+              delta_bits=32, e_lut=None, newton=0):
+    return Precision(name, nd_frac, nd_bits, sigma_lut, sigma_recip, alpha_lut, delta_bits, e_lut, newton)
+
+
+PRESETS = {p.name: p for p in [
+    precision("current"),
+    precision("nd_frac8", nd_frac=8, nd_bits=48),
+    precision("nd_frac4", nd_frac=4, nd_bits=40),
+    precision("sigma_lut256", sigma_lut=256, sigma_recip=16),
+    precision("sigma_lut64", sigma_lut=64, sigma_recip=12),
+    precision("alpha_lut8", alpha_lut=8),
+    precision("alpha_lut6", alpha_lut=6),
+    precision("delta24", delta_bits=24),
+    precision("e_lut10", e_lut=10),
+    precision("e_lut7", e_lut=7),
+    precision("alpha_lut6_nr", alpha_lut=6, newton=1),
+    precision("e_lut7_nr", e_lut=7, newton=1),
+    precision("all_recip", nd_frac=8, nd_bits=48, sigma_lut=256, sigma_recip=16, alpha_lut=6, e_lut=7, newton=1),
+]}
+
+
+def _wrap(value, bits):
+    return value & np.uint64((1 << bits) - 1) if bits < 64 else value
+
+
+def reciprocal_table(bits):
+    """round(2^(bits+2) / (1 + (i + 0.5) / 2^bits)) for every mantissa index i."""
+    mantissa = 1 + (np.arange(1 << bits) + 0.5) / (1 << bits)
+    return np.rint((1 << (bits + 2)) / mantissa).astype(np.float64)
+
+
+def reciprocal_divide(num, den, bits, newton=0):
+    """floor(num / den) through a 2^bits-entry normalized reciprocal table; den == 0 gives 0."""
+    num = np.asarray(num, dtype=np.uint64)
+    den = np.asarray(den, dtype=np.uint64)
+    nonzero = den != 0
+    safe = np.where(nonzero, den, np.uint64(1))
+    shift = np.floor(np.log2(safe.astype(np.float64))).astype(np.int64)
+    # log2 of a float can land one off for values just under a power of two
+    shift -= (np.left_shift(np.uint64(1), shift.astype(np.uint64)) > safe).astype(np.int64)
+    up = np.maximum(bits - shift, 0).astype(np.uint64)
+    down = np.maximum(shift - bits, 0).astype(np.uint64)
+    index = ((safe << up) >> down).astype(np.int64) - (1 << bits)
+    frac = bits + 2
+    recip = reciprocal_table(bits)[index] / (1 << frac)
+    mantissa = safe.astype(np.float64) * np.exp2(-shift.astype(np.float64))
+    for _ in range(newton):
+        frac = min(2 * frac, 48)
+        recip = np.floor(recip * (2 - mantissa * recip) * (1 << frac)) / (1 << frac)
+    quotient = np.floor(num.astype(np.float64) * recip * np.exp2(-shift.astype(np.float64)))
+    return np.where(nonzero, quotient, 0).astype(np.uint64)
+
+
+def brightness(I, E, sigma, p):
+    """alpha (signed Q16.16) for (..., 3) I, E, sigma under precision p."""
+    I = np.asarray(I, dtype=np.uint64) & np.uint64(0xFF)
+    E = np.asarray(E, dtype=np.uint64) & np.uint64(0xFFFF)
+    sigma = np.asarray(sigma, dtype=np.uint64) & np.uint64(0xFFFF)
+    sigma = np.where(sigma == 0, np.uint64(1), sigma)
+    frac = np.uint64(p.nd_frac)
+    if p.sigma_lut is None:
+        terms_n = ((I * E) << frac) // sigma
+        terms_d = ((E * E) << frac) // sigma
+    else:
+        table = np.zeros(p.sigma_lut, dtype=np.uint64)
+        table[1:] = (1 << p.sigma_recip) // np.arange(1, p.sigma_lut, dtype=np.uint64)
+        r = table[np.minimum(sigma, np.uint64(p.sigma_lut - 1))]
+        drop = p.sigma_recip - p.nd_frac
+        if drop >= 0:
+            terms_n = (I * E * r) >> np.uint64(drop)
+            terms_d = (E * E * r) >> np.uint64(drop)
+        else:
+            terms_n = (I * E * r) << np.uint64(-drop)
+            terms_d = (E * E * r) << np.uint64(-drop)
+    N = _wrap(terms_n.sum(axis=-1, dtype=np.uint64), p.nd_bits)
+    D = _wrap(terms_d.sum(axis=-1, dtype=np.uint64), p.nd_bits)
+    if p.alpha_lut is None:
+        N = (N << np.uint64(16)).astype(np.int64)
+        D = D.astype(np.int64)
+        alpha = np.where(D != 0, N // np.where(D != 0, D, 1), 0)
+    else:
+        alpha = reciprocal_divide(N << np.uint64(16), D, p.alpha_lut, p.newton)
+    return to_signed(alpha, 32)
+
+
+def chromaticity(I, E, alpha, p):
+    """CD for (..., 3) I and E and a per-pixel alpha under precision p."""
+    I = np.asarray(I, dtype=np.uint64) & np.uint64(0xFF)
+    E = np.asarray(E, dtype=np.uint64) & np.uint64(0xFFFF)
+    alpha = (np.asarray(alpha, dtype=np.int64) & 0xFFFFFFFF).astype(np.uint64)[..., None]
+    alpha_E = ((alpha * E) & MASK32) >> np.uint64(16)
+    numerator = ((I << np.uint64(16)) - alpha_E) & MASK32
+    if p.e_lut is None:
+        delta = np.where(E != 0, numerator // np.where(E != 0, E, np.uint64(1)), np.uint64(0))
+    else:
+        delta = reciprocal_divide(numerator, E, p.e_lut, p.newton)
+    delta = to_signed(delta, p.delta_bits)
+    delta_sq = to_signed(delta * delta, p.delta_bits + 16)
+    sum_deltas = to_signed(delta_sq.sum(axis=-1), p.delta_bits + 16) >> 16
+    return cordic_sqrt(sum_deltas & 0xFFFFFFFF)
+
+
+def divider_cost(p):
+    """Short description of the dividers and tables a precision needs."""
+    parts = []
+    if p.sigma_lut is None:
+        parts.append(f"6x {24 + p.nd_frac}/16b div")
+    else:
+        parts.append(f"{p.sigma_lut}x{p.sigma_recip + 1}b LUT")
+    parts.append(f"{p.nd_bits}b N/D")
+    refine = f" +{p.newton} NR" if p.newton else ""
+    parts.append(f"{p.nd_bits + 16}/{p.nd_bits}b div" if p.alpha_lut is None
+                 else f"{1 << p.alpha_lut}-entry recip{refine}")
+    parts.append("3x 32/16b div" if p.e_lut is None else f"3x {1 << p.e_lut}-entry recip{refine}")
+    return ", ".join(parts)
+
+
+def explore(stats, frames, precisions, reference="current"):
+    """
+    Evaluate every precision on `frames`; returns {name: metrics}.
+
+    Errors are in Q16.16 LSBs against the reference precision; flips count
+    pixels whose class differs from the reference, fg_flips only those
+    crossing the foreground/not-foreground line.
+    """
+    E = np.floor(stats.mean).astype(np.int64)
+    sigma = np.floor(stats.sd).astype(np.int64)
+    sd_alpha = np.floor(stats.sd_alpha).astype(np.int64)
+    sd_cd = np.floor(stats.sd_cd).astype(np.int64)
+    ref = precisions[reference]
+    totals = {name: dict(alpha_max=0, alpha_sum=0.0, cd_max=0, cd_sum=0.0, flips=0, fg_flips=0)
+              for name in precisions}
+    pixels = 0
+    for frame in frames:
+        ref_alpha = brightness(frame, E, sigma, ref)
+        ref_cd = to_signed(chromaticity(frame, E, ref_alpha, ref), 32)
+        ref_class = pixel_classification(ref_alpha, ref_cd, sd_alpha, sd_cd)
+        pixels += ref_class.size
+        for name, p in precisions.items():
+            alpha = brightness(frame, E, sigma, p)
+            cd = to_signed(chromaticity(frame, E, alpha, p), 32)
+            classes = pixel_classification(alpha, cd, sd_alpha, sd_cd)
+            alpha_err = np.abs(alpha - ref_alpha)
+            cd_err = np.abs(cd - ref_cd)
+            t = totals[name]
+            t["alpha_max"] = max(t["alpha_max"], int(alpha_err.max()))
+            t["alpha_sum"] += float(alpha_err.sum())
+            t["cd_max"] = max(t["cd_max"], int(cd_err.max()))
+            t["cd_sum"] += float(cd_err.sum())
+            t["flips"] += int(np.count_nonzero(classes != ref_class))
+            t["fg_flips"] += int(np.count_nonzero((classes == FOREGROUND) != (ref_class == FOREGROUND)))
+    return {name: dict(alpha_max=t["alpha_max"], alpha_mean=t["alpha_sum"] / pixels,
+                       cd_max=t["cd_max"], cd_mean=t["cd_sum"] / pixels,
+                       flip_rate=t["flips"] / pixels, fg_flip_rate=t["fg_flips"] / pixels,
+                       cost=divider_cost(precisions[name]))
+            for name, t in totals.items()}
+
+
+def format_report(results):
+    lines = [f"{'precision':<14}{'alpha max':>10}{'alpha mean':>11}{'CD max':>9}{'CD mean':>9}"
+             f"{'flips':>9}{'fg flips':>10}  dividers"]
+    for name, r in results.items():
+        lines.append(f"{name:<14}{r['alpha_max']:>10}{r['alpha_mean']:>11.2f}{r['cd_max']:>9}{r['cd_mean']:>9.2f}"
+                     f"{100 * r['flip_rate']:>8.3f}%{100 * r['fg_flip_rate']:>9.3f}%  {r['cost']}")
+    return "\n".join(lines)
+
+
+def parse_custom(text):
+    """"name:field=value,..." -> Precision; "none" clears a field back to the exact divider."""
+    name, _, fields = text.partition(":")
+    values = {}
+    for item in filter(None, fields.split(",")):
+        key, _, value = item.partition("=")
+        assert key in Precision._fields, f"unknown precision field {key}"
+        values[key] = None if value.lower() == "none" else int(value)
+    return precision(name, **values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Error and classification flips of narrower dividers.")
+    parser.add_argument("--raw", help="recorded raw RGB888 file; synthetic scene if omitted")
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--height", type=int, default=180)
+    parser.add_argument("--train", type=int, default=16, help="background-only frames used for training")
+    parser.add_argument("--frames", type=int, default=8, help="frames evaluated after training")
+    parser.add_argument("--noise", type=float, default=2.0, help="synthetic sensor noise sigma")
+    parser.add_argument("--blobs", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--preset", action="append", choices=sorted(PRESETS),
+                        help="presets to evaluate (default: all)")
+    parser.add_argument("--custom", action="append", default=[], help='e.g. "mine:nd_frac=6,alpha_lut=7"')
+    args = parser.parse_args()
+
+    if args.raw:
+        train = read_rgb_frames(args.raw, args.width, args.height, count=args.train)
+        test = read_rgb_frames(args.raw, args.width, args.height, start=args.train, count=args.frames)
+    else:
+        radius = (args.height // 20, args.height // 8)
+        train = rgb_scene_frames(args.train, args.width, args.height, n_blobs=0,
+                                 noise_sigma=args.noise, seed=args.seed)
+        test = rgb_scene_frames(args.frames, args.width, args.height, n_blobs=args.blobs, radius=radius,
+                                noise_sigma=args.noise, seed=args.seed)
+
+    precisions = {"current": PRESETS["current"]}
+    precisions.update({name: PRESETS[name] for name in args.preset or PRESETS})
+    precisions.update({p.name: p for p in map(parse_custom, args.custom)})
+    results = explore(train_background(train), test, precisions)
+    print(format_report(results))
+
+
+if __name__ == "__main__":
+    main()
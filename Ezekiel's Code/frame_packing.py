@@ -0,0 +1,142 @@
+"""
+Vectorized model of the frame path between images, RGB565 pixels and the
+128-bit chunks that stacker/unstacker exchange with DRAM.
+
+    image (h, w, 3) uint8 --rgb_to_565--> (h, w) uint16 --pack_chunks--> (n, 2) uint64
+                          <-565_to_rgb--                <-unpack_chunks--
+
+A chunk holds 8 pixels with the first pixel in bits [15:0] (stacker shifts
+each new pixel in from the top), which is exactly the little-endian layout of
+8 consecutive uint16 values, so packing and unpacking are views rather than
+loops. A chunk is represented as two uint64 lanes (low, high), or as a Python
+int for MigDDR.memory.
+
+The colour expansion matches top_level's fb_red/fb_green/fb_blue, which pad
+with zeros rather than replicating the high bits.
+"""
+import numpy as np
+
+from ddr_address_map import UNITS_PER_WORD
+from video_timing import ACTIVE_H, ACTIVE_V
+
+
+PIXELS_PER_CHUNK = 8
+
+# pixel_mem_write colours for each PixelClassification code
+CLASS_COLORS_565 = np.array([0x07E0, 0xF800, 0x001F, 0xFFE0], dtype=np.uint16)
+
+
+def rgb_to_565(image):
+    """(..., 3) uint8 -> (...) uint16 RGB565."""
+    image = np.asarray(image, dtype=np.uint16)
+    return (((image[..., 0] >> 3) << 11) | ((image[..., 1] >> 2) << 5) | (image[..., 2] >> 3)).astype(np.uint16)
+
+
+def rgb565_to_rgb(pixels):
+    """(...) uint16 RGB565 -> (..., 3) uint8, zero-padded like fb_red/fb_green/fb_blue."""
+    pixels = np.asarray(pixels, dtype=np.uint16)
+    red = (pixels >> 11) << 3
+    green = ((pixels >> 5) & 0x3F) << 2
+    blue = (pixels & 0x1F) << 3
+    return np.stack([red, green, blue], axis=-1).astype(np.uint8)
+
+
+def classification_to_565(classes):
+    """Classification codes -> the RGB565 colours top_level writes to the frame buffer."""
+    return CLASS_COLORS_565[np.asarray(classes, dtype=np.intp) & 3]
+
+
+def pack_chunks(pixels):
+    """
+    Pixels in raster order -> (n, 2) uint64 chunks (low lane first).
+
+    A trailing partial chunk is zero-filled, as stacker leaves the unused
+    slots of the tlast chunk.
+    """
+    flat = np.ascontiguousarray(np.asarray(pixels, dtype=np.uint16).reshape(-1))
+    pad = -len(flat) % PIXELS_PER_CHUNK
+    if pad:
+        flat = np.concatenate([flat, np.zeros(pad, dtype=np.uint16)])
+    return flat.astype("<u2", copy=False).view("<u8").reshape(-1, 2).astype(np.uint64, copy=False)
+
+
+def unpack_chunks(chunks, count=None):
+    """(n, 2) uint64 chunks -> flat uint16 pixels (the first `count` of them)."""
+    chunks = np.ascontiguousarray(np.asarray(chunks, dtype=np.uint64))
+    pixels = chunks.astype("<u8", copy=False).view("<u2").reshape(-1).astype(np.uint16, copy=False)
+    return pixels if count is None else pixels[:count]
+
+
+def chunk_tlast(n_chunks, chunks_per_frame):
+    """Boolean tlast per chunk: set on the last chunk of every frame."""
+    return (np.arange(n_chunks) % chunks_per_frame) == chunks_per_frame - 1
+
+
+def pixel_tlast(n_pixels, pixels_per_frame):
+    """Boolean tlast per pixel, as top_level drives stacker's pixel_tlast."""
+    return (np.arange(n_pixels) % pixels_per_frame) == pixels_per_frame - 1
+
+
+def frame_to_chunks(image):
+    """(h, w, 3) image -> ((n, 2) chunks, tlast) for one frame."""
+    chunks = pack_chunks(rgb_to_565(image))
+    return chunks, chunk_tlast(len(chunks), len(chunks))
+
+
+def chunks_to_frame(chunks, width=ACTIVE_H, height=ACTIVE_V):
+    """Chunks of one frame -> the (h, w, 3) image the HDMI path displays."""
+    return rgb565_to_rgb(unpack_chunks(chunks, width * height).reshape(height, width))
+
+
+def chunks_to_ints(chunks):
+    """(n, 2) uint64 -> list of 128-bit Python ints (MigDDR word values)."""
+    chunks = np.asarray(chunks, dtype=np.uint64)
+    return [(int(hi) << 64) | int(lo) for lo, hi in chunks.tolist()]
+
+
+def ints_to_chunks(words):
+    """List of 128-bit ints -> (n, 2) uint64."""
+    mask = (1 << 64) - 1
+    return np.array([(w & mask, w >> 64) for w in words], dtype=np.uint64).reshape(-1, 2)
+
+
+def word_keys(base_addr, n_chunks):
+    """MigDDR.memory keys (app_addr // 8) for n consecutive chunks from base_addr."""
+    assert base_addr % UNITS_PER_WORD == 0, "region base must be 128-bit aligned"
+    return range(base_addr // UNITS_PER_WORD, base_addr // UNITS_PER_WORD + n_chunks)
+
+
+def preload_frame(dram, image, base_addr):
+    """Write a whole frame into a MigDDR model's memory in one update."""
+    chunks = pack_chunks(rgb_to_565(image))
+    dram.memory.update(zip(word_keys(base_addr, len(chunks)), chunks_to_ints(chunks)))
+    return len(chunks)
+
+
+def read_frame(dram, base_addr, width=ACTIVE_H, height=ACTIVE_V, fill=0xAAAA_AAAA_AAAA_AAAA_AAAA_AAAA_AAAA_AAAA):
+    """Read a frame back out of a MigDDR model; unwritten words read as MigDDR's fill pattern."""
+    n_chunks = -(-width * height // PIXELS_PER_CHUNK)
+    words = [dram.memory.get(key, fill) for key in word_keys(base_addr, n_chunks)]
+    return chunks_to_frame(ints_to_chunks(words), width, height)
+
+
+def compare_chunks(observed, expected, max_report=10):
+    """
+    Compare chunk streams (and optionally tlast) in one pass.
+
+    observed/expected are (chunks, tlast) pairs; returns (mismatch count,
+    report lines naming the chunk index, first pixel and differing lanes).
+    """
+    obs_chunks, obs_last = observed
+    exp_chunks, exp_last = expected
+    n = min(len(obs_chunks), len(exp_chunks))
+    bad = (np.asarray(obs_chunks[:n]) != np.asarray(exp_chunks[:n])).any(axis=-1)
+    bad |= np.asarray(obs_last[:n], dtype=bool) != np.asarray(exp_last[:n], dtype=bool)
+    report = []
+    for i in np.flatnonzero(bad)[:max_report]:
+        got = unpack_chunks(obs_chunks[i:i + 1])
+        want = unpack_chunks(exp_chunks[i:i + 1])
+        report.append(f"chunk {i} (pixel {i * PIXELS_PER_CHUNK}): got {[hex(p) for p in got]} "
+                      f"tlast={bool(obs_last[i])}, expected {[hex(p) for p in want]} tlast={bool(exp_last[i])}")
+    count = int(bad.sum()) + abs(len(obs_chunks) - len(exp_chunks))
+    return count, report
@@ -0,0 +1,222 @@
+"""
+Vectorized functional coverage with constrained-random closure.
+
+A CoverGroup is a set of CoverPoints; each point maps a batch of samples
+(a dict of equal-length NumPy arrays) to the bins it hits, so a whole batch
+is binned with a few array operations. ConstrainedRandom asks the group for
+its holes and draws the next batch from generators aimed at them, falling
+back to blind random once nothing targetable is left.
+
+    group = CoverGroup("classification", points)
+    stimulus = ConstrainedRandom(group, targets, blind, seed=1)
+    while group.holes() and group.vectors < budget:
+        batch = stimulus.next_batch(256)
+        ... run batch through the DUT ...
+        group.sample(sample_fn(batch, observed))
+    save_run(group, seed=1)        # coverage/classification-1-<pid>.json
+
+Runs are saved as JSON and merged bin by bin, so parallel regressions with
+different seeds can be combined afterwards:
+
+    python func_coverage.py merge merged.json coverage/*.json
+    python func_coverage.py report merged.json
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+
+ENV_VAR = "COCOTB_COVERAGE_DIR"
+
+
+class CoverPoint:
+    """
+    class CoverPoint: named bins over a batch of samples
+
+    fn(sample) returns either an int array of bin indices (-1 for no bin) or
+    an (n, len(bins)) bool array when one sample can hit several bins.
+    """
+
+    def __init__(self, name, bins, fn):
+        self.name = name
+        self.bins = list(bins)
+        self.fn = fn
+
+    def hits(self, sample):
+        hit = np.asarray(self.fn(sample))
+        if hit.ndim == 1:
+            hit = hit[hit >= 0]
+            return np.bincount(hit, minlength=len(self.bins))[:len(self.bins)]
+        return hit.sum(axis=0)
+
+
+class CoverGroup:
+    """
+    class CoverGroup: hit counts for a set of cover points
+
+    A bin is covered once its count reaches `goal`.
+    """
+
+    def __init__(self, name, points, goal=1):
+        self.name = name
+        self.points = list(points)
+        self.goal = goal
+        self.counts = {point.name: np.zeros(len(point.bins), dtype=np.int64) for point in self.points}
+        self.vectors = 0
+        self.runs = 1
+
+    def sample(self, sample):
+        """Bin a batch; returns the number of bins it closed."""
+        before = len(self.holes())
+        for point in self.points:
+            self.counts[point.name] += point.hits(sample)
+        self.vectors += len(next(iter(sample.values())))
+        return before - len(self.holes())
+
+    def bins(self):
+        return [f"{point.name}.{name}" for point in self.points for name in point.bins]
+
+    def holes(self):
+        return [f"{point.name}.{name}" for point in self.points
+                for name, count in zip(point.bins, self.counts[point.name]) if count < self.goal]
+
+    def coverage(self):
+        total = sum(len(point.bins) for point in self.points)
+        return 1.0 - len(self.holes()) / total if total else 1.0
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "goal": self.goal,
+            "vectors": int(self.vectors),
+            "runs": int(self.runs),
+            "points": {point.name: dict(zip(point.bins, self.counts[point.name].tolist()))
+                       for point in self.points},
+        }
+
+    def merge(self, data):
+        """Add the counts of a saved run (a to_dict() result) into this group."""
+        assert data["name"] == self.name, f"cannot merge {data['name']} coverage into {self.name}"
+        for point in self.points:
+            saved = data["points"].get(point.name, {})
+            for i, name in enumerate(point.bins):
+                self.counts[point.name][i] += saved.get(name, 0)
+        self.vectors += data["vectors"]
+        self.runs += data["runs"]
+        return self
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=1)
+        return path
+
+    def report(self):
+        return format_report(self.to_dict())
+
+
+def save_run(group, seed=None, directory=None):
+    """
+    Save a run as <directory>/<group>-<seed>-<pid>.json so parallel runs never
+    collide; directory defaults to $COCOTB_COVERAGE_DIR, then ./coverage.
+    """
+    directory = directory or os.getenv(ENV_VAR, "coverage")
+    return group.save(os.path.join(directory, f"{group.name}-{seed}-{os.getpid()}.json"))
+
+
+def merge_dicts(runs):
+    """Merge saved runs of one covergroup; bins are matched by name, unknown ones are kept."""
+    runs = list(runs)
+    merged = {"name": runs[0]["name"], "goal": runs[0].get("goal", 1), "vectors": 0, "runs": 0, "points": {}}
+    for run in runs:
+        assert run["name"] == merged["name"], f"cannot merge {run['name']} into {merged['name']}"
+        merged["vectors"] += run["vectors"]
+        merged["runs"] += run["runs"]
+        for point, bins in run["points"].items():
+            target = merged["points"].setdefault(point, {})
+            for name, count in bins.items():
+                target[name] = target.get(name, 0) + count
+    return merged
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def format_report(data):
+    goal = data.get("goal", 1)
+    total = sum(len(bins) for bins in data["points"].values())
+    holes = [f"{point}.{name}" for point, bins in data["points"].items()
+             for name, count in bins.items() if count < goal]
+    lines = [f"{data['name']}: {total - len(holes)}/{total} bins covered "
+             f"({100 * (total - len(holes)) / total if total else 100:.1f}%) "
+             f"by {data['vectors']} vectors over {data['runs']} run(s)"]
+    for point, bins in data["points"].items():
+        cells = "  ".join(f"{name}={count}" for name, count in bins.items())
+        lines.append(f"  {point:<18}{cells}")
+    if holes:
+        lines.append("  holes: " + ", ".join(holes))
+    return "\n".join(lines)
+
+
+class ConstrainedRandom:
+    """
+    class ConstrainedRandom: draws batches aimed at a covergroup's holes
+
+    targets maps "point.bin" to generator(rng, n) -> stimulus dict; blind is
+    the unconstrained generator with the same signature. Each batch is split
+    evenly across the targetable holes.
+    """
+
+    def __init__(self, group, targets, blind, seed=None):
+        self.group = group
+        self.targets = targets
+        self.blind = blind
+        self.rng = np.random.default_rng(seed)
+
+    def next_batch(self, size):
+        aimed = [hole for hole in self.group.holes() if hole in self.targets]
+        if not aimed:
+            return self.blind(self.rng, size)
+        share = max(1, size // len(aimed))
+        parts = [self.targets[hole](self.rng, share) for hole in aimed]
+        return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+def close(group, generator, sample_fn, batch=256, budget=1 << 20):
+    """
+    Run generator batches straight through sample_fn (a model, no DUT) until
+    the group closes or `budget` vectors have been sampled; returns the
+    vectors used.
+    """
+    while group.holes() and group.vectors < budget:
+        group.sample(sample_fn(generator.next_batch(batch)))
+    return group.vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    merge = sub.add_parser("merge", help="merge saved runs of one covergroup")
+    merge.add_argument("output")
+    merge.add_argument("runs", nargs="+")
+    report = sub.add_parser("report", help="print a saved or merged run")
+    report.add_argument("runs", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "merge":
+        merged = merge_dicts(load(path) for path in args.runs)
+        with open(args.output, "w") as f:
+            json.dump(merged, f, indent=1)
+        print(format_report(merged))
+    else:
+        print(format_report(merge_dicts(load(path) for path in args.runs)))
+
+
+if __name__ == "__main__":
+    main()
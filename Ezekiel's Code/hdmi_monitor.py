@@ -0,0 +1,229 @@
+"""
+Frame-capture monitor for the pre-TMDS video path of either top_level.
+
+HdmiFrameMonitor samples the RGB going into the TMDS encoders together with
+hcount/vcount/active_draw on every pixel clock and assembles frames into a
+pool of preallocated buffers. Each active pixel costs three native-int reads
+and one store into a flat uint32 array; no BinaryValue or per-pixel tuple is
+created. Completed frames are handed to a background writer, so PPM/raw files
+are produced while the simulation keeps running, and can be diffed against a
+golden rendering as they arrive. The writer thread only computes the diffs;
+they are logged and checked back on the simulator thread.
+
+    taps = makar_top_level_taps(dut)
+    monitor = HdmiFrameMonitor(dut.clk_pixel, **taps, out_dir="frames", golden=golden_frames)
+    ...
+    await monitor.wait_frames(2)
+    monitor.check()
+"""
+import logging
+import os
+import queue
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import cocotb
+import numpy as np
+from cocotb.triggers import RisingEdge, Event
+
+from comb_sweep import fast_reader
+from video_timing import ACTIVE_H, ACTIVE_V
+
+
+FrameDiff = namedtuple("FrameDiff", ["mismatches", "bbox", "max_error"])
+
+
+def makar_top_level_taps(dut):
+    """Signals feeding the TMDS encoders in Makar's top_level (video_mux output, 8-stage aligned)."""
+    return dict(red=dut.red, green=dut.green, blue=dut.blue,
+                hcount=dut.hcount_hdmi_delayed[7], vcount=dut.vcount_hdmi_delayed[7],
+                active_draw=dut.active_draw_hdmi_delayed[7])
+
+
+def ezekiel_top_level_taps(dut):
+    """
+    Signals feeding the TMDS encoders in Ezekiel's top_level.
+
+    fb_red/fb_green/fb_blue are registered from the frame buffer stream while
+    hcount_hdmi/vcount_hdmi come straight from video_sig_gen, so the colour
+    lags the coordinates by one pixel clock.
+    """
+    return dict(red=dut.fb_red, green=dut.fb_green, blue=dut.fb_blue,
+                hcount=dut.hcount_hdmi, vcount=dut.vcount_hdmi, active_draw=dut.active_draw_hdmi,
+                pixel_latency=1)
+
+
+def unpack_frame(flat, width=ACTIVE_H, height=ACTIVE_V):
+    """Flat 0x00RRGGBB uint32 buffer -> (height, width, 3) uint8 image (a copy)."""
+    channels = flat.view(np.uint8).reshape(height, width, 4)
+    # little-endian words: byte 0 is blue, 2 is red
+    return np.ascontiguousarray(channels[..., 2::-1])
+
+
+def write_ppm(path, image):
+    """Binary PPM (P6): viewable everywhere and needs no imaging library."""
+    height, width, _ = image.shape
+    with open(path, "wb") as f:
+        f.write(f"P6 {width} {height} 255\n".encode())
+        f.write(np.ascontiguousarray(image, dtype=np.uint8).tobytes())
+
+
+def read_ppm(path):
+    with open(path, "rb") as f:
+        magic, width, height, maxval = f.readline().split()
+        assert magic == b"P6" and maxval == b"255", f"{path} is not an 8-bit binary PPM"
+        return np.frombuffer(f.read(), dtype=np.uint8).reshape(int(height), int(width), 3)
+
+
+def diff_frames(observed, golden):
+    """Compare two (h, w, 3) frames; bbox is (x0, y0, x1, y1) of differing pixels or None."""
+    delta = np.abs(observed.astype(np.int16) - golden.astype(np.int16))
+    bad = delta.any(axis=-1)
+    count = int(np.count_nonzero(bad))
+    if not count:
+        return FrameDiff(0, None, 0)
+    ys, xs = np.nonzero(bad)
+    return FrameDiff(count, (int(xs.min()), int(ys.min()), int(xs.max()), int(ys.max())), int(delta.max()))
+
+
+def diff_image(observed, golden):
+    """Golden frame dimmed to a quarter, with every differing pixel painted magenta."""
+    image = golden // 4
+    image[(observed != golden).any(axis=-1)] = (255, 0, 255)
+    return image
+
+
+class HdmiFrameMonitor:
+    """
+    class HdmiFrameMonitor: captures complete frames from the pre-TMDS video signals
+
+    golden may be a single (h, w, 3) frame, a sequence of frames, or a callable
+    frame_index -> frame; each captured frame is diffed against it. Files are
+    written to out_dir as frame_NNNNN.ppm (fmt="ppm") or .rgb (fmt="raw").
+    pixel_latency is how many clocks the colour lags hcount/vcount/active_draw.
+    When all buffers are waiting on the writer, sampling blocks until the
+    oldest frame is flushed. check() fails the test on any golden mismatch.
+    """
+
+    def __init__(self, clock, red, green, blue, hcount, vcount, active_draw,
+                 width=ACTIVE_H, height=ACTIVE_V, out_dir=None, fmt="ppm", golden=None,
+                 max_frames=None, buffers=3, pixel_latency=0):
+        self.clock = clock
+        self.width = width
+        self.height = height
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.golden = golden
+        self.max_frames = max_frames
+        self.pixel_latency = pixel_latency
+        self.log = logging.getLogger("cocotb.hdmi_monitor")
+
+        self._readers = [fast_reader(h) for h in (red, green, blue, hcount, vcount, active_draw)]
+        self._free = queue.Queue()
+        for _ in range(buffers):
+            self._free.put(np.zeros(width * height, dtype=np.uint32))
+        self._pending = deque()
+        self._writer = ThreadPoolExecutor(max_workers=1)
+        self._frame_done = Event()
+        self.frames_captured = 0
+        self.diffs = []
+
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        self._task = cocotb.start_soon(self._run())
+
+    async def _run(self):
+        red, green, blue, hcount, vcount, active = self._readers
+        width, last_x, last_y = self.width, self.width - 1, self.height - 1
+        edge = RisingEdge(self.clock)
+        flat = self._take_buffer()
+        # coordinates of the last pixel_latency clocks, oldest first; None when not drawing
+        history = deque([None] * self.pixel_latency)
+        while self.max_frames is None or self.frames_captured < self.max_frames:
+            await edge
+            here = (hcount(), vcount()) if active() else None
+            history.append(here)
+            position = history.popleft()
+            if position is None:
+                continue
+            x, y = position
+            if x > last_x or y > last_y:
+                continue
+            flat[y * width + x] = (red() << 16) | (green() << 8) | blue()
+            if x == last_x and y == last_y:
+                self._complete(flat)
+                flat = self._take_buffer()
+        self._free.put(flat)
+
+    def _take_buffer(self):
+        # blocks when the writer has fallen behind, until it recycles a buffer
+        return self._free.get()
+
+    def _complete(self, flat):
+        index = self.frames_captured
+        self.frames_captured += 1
+        self._pending.append(self._writer.submit(self._process, index, flat))
+        self._collect()
+        self._frame_done.set()
+
+    def _collect(self, wait=False):
+        """Record (and log) the diffs of frames the writer has finished, oldest first; simulator thread only."""
+        while self._pending and (wait or self._pending[0].done()):
+            index, result = self._pending.popleft().result()
+            if result is None:
+                continue
+            self.diffs.append((index, result))
+            if result.mismatches:
+                self.log.error(f"Frame {index}: {result.mismatches} pixels differ from golden, "
+                               f"bbox={result.bbox}, max error={result.max_error}")
+
+    def _process(self, index, flat):
+        """
+        Runs on the writer thread: unpack, save and diff one frame, then recycle its buffer.
+
+        Returns (index, FrameDiff or None); nothing here may touch the simulator, logging included.
+        """
+        result = None
+        try:
+            image = unpack_frame(flat, self.width, self.height)
+            if self.out_dir:
+                path = os.path.join(self.out_dir, f"frame_{index:05d}")
+                if self.fmt == "ppm":
+                    write_ppm(path + ".ppm", image)
+                else:
+                    image.tofile(path + ".rgb")
+            golden = self._golden_for(index)
+            if golden is not None:
+                result = diff_frames(image, golden)
+                if result.mismatches and self.out_dir:
+                    write_ppm(os.path.join(self.out_dir, f"diff_{index:05d}.ppm"), diff_image(image, golden))
+        finally:
+            self._free.put(flat)
+        return index, result
+
+    def _golden_for(self, index):
+        if self.golden is None:
+            return None
+        if callable(self.golden):
+            return self.golden(index)
+        if isinstance(self.golden, np.ndarray) and self.golden.ndim == 3:
+            return self.golden
+        return self.golden[index] if index < len(self.golden) else None
+
+    async def wait_frames(self, count):
+        """Wait until `count` frames in total have been captured."""
+        while self.frames_captured < count:
+            self._frame_done.clear()
+            await self._frame_done.wait()
+
+    def close(self):
+        """Stop sampling and flush outstanding writes; returns the list of (index, FrameDiff)."""
+        self._task.kill()
+        self._writer.shutdown(wait=True)
+        self._collect(wait=True)
+        return self.diffs
+
+    def check(self):
+        """close(), then fail if any captured frame differed from its golden frame."""
+        bad = [(index, diff.mismatches) for index, diff in self.close() if diff.mismatches]
+        assert not bad, f"(frame, differing pixels) against golden: {bad}"
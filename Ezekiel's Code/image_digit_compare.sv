@@ -0,0 +1,50 @@
+`timescale 1ns / 1ps
+`default_nettype none
+// Simulation shell that drives the case-based image_digit and the ROM-based
+// image_digit_rom from the same inputs, so test_image_digit_rom can compare
+// the ROM against the HDL it replaces. image_digit_rom registers its output
+// one pixel clock after image_digit. Do not add this file to the Vivado
+// project.
+module image_digit_compare #(
+  parameter WIDTH=100, HEIGHT=100) (
+  input wire pixel_clk_in,
+  input wire rst_in,
+  input wire [10:0] x_in,
+  input wire [10:0] hcount_in,
+  input wire [9:0] y_in,
+  input wire [9:0] vcount_in,
+  input wire [3:0] digit,
+  output logic [7:0] case_red_out,
+  output logic [7:0] rom_red_out
+  );
+
+  logic [7:0] case_green, case_blue, rom_green, rom_blue;
+
+  image_digit #(.WIDTH(WIDTH), .HEIGHT(HEIGHT)) case_digit (
+    .pixel_clk_in(pixel_clk_in),
+    .rst_in(rst_in),
+    .x_in(x_in),
+    .hcount_in(hcount_in),
+    .y_in(y_in),
+    .vcount_in(vcount_in),
+    .digit(digit),
+    .red_out(case_red_out),
+    .green_out(case_green),
+    .blue_out(case_blue)
+  );
+
+  image_digit_rom #(.WIDTH(WIDTH), .HEIGHT(HEIGHT)) rom_digit (
+    .pixel_clk_in(pixel_clk_in),
+    .rst_in(rst_in),
+    .x_in(x_in),
+    .hcount_in(hcount_in),
+    .y_in(y_in),
+    .vcount_in(vcount_in),
+    .digit(digit),
+    .red_out(rom_red_out),
+    .green_out(rom_green),
+    .blue_out(rom_blue)
+  );
+endmodule
+
+`default_nettype wire
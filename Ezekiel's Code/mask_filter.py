@@ -0,0 +1,260 @@
+"""
+Streaming golden model of a k x k mask filter between PixelClassification
+and center_of_mass.
+
+The classification mask arrives one pixel per clock in raster order, so a
+k x k window needs the k - 1 previous lines. LineBuffers keeps them the way
+bram_interface keeps its lines: a fixed set of slots written through a
+wrapping pointer and read back oldest first. MaskFilter takes one row at a
+time, stacks the stored lines on the new row, counts the set pixels in every
+k x k window (column sums, then a running sum along the row) and compares
+the count with a threshold:
+
+    erode      every pixel of the window set    threshold k * k
+    dilate     any pixel set                    threshold 1
+    majority   more than half set               threshold k * k // 2 + 1
+
+Pixels outside the frame count as clear. A row is emitted k // 2 rows after it
+arrives, and flush() pushes the k // 2 blank rows below the frame. The
+result is bit-exact against filter_reference(), the whole-frame sliding
+window, which makes it the reference for an HDL stage. FilterChain runs
+filters back to back (erode then dilate is an opening).
+
+    python mask_filter.py --frames 120 --noise 0.001
+    python mask_filter.py --sizes 3 5 --ops majority open --width 640 --height 360
+
+The report lists each filter's line-buffer memory, the latency it adds at
+720p timing, and the COM error and jitter on noisy moving-blob scenes next
+to the raw mask.
+"""
+import argparse
+from collections import namedtuple
+
+import numpy as np
+
+from com_model import center_of_mass_stream
+from scenes import moving_blob_centers, moving_blob_masks
+from video_timing import ACTIVE_H, ACTIVE_V, TOTAL_H
+
+
+OPS = ("erode", "dilate", "majority")
+# 18 Kb block RAM aspect ratios, depth x width
+BRAM18_SHAPES = ((16384, 1), (8192, 2), (4096, 4), (2048, 9), (1024, 18))
+
+FilterCost = namedtuple("FilterCost", ["line_buffers", "bits", "bram18", "latency_clocks", "adds_per_pixel"])
+JitterResult = namedtuple("JitterResult", ["name", "frames", "valid", "rms_error", "rms_jitter", "max_error"])
+
+
+def threshold_for(op, size):
+    if op not in OPS:
+        raise ValueError(f"unknown filter {op!r}, expected one of {OPS}")
+    return {"erode": size * size, "dilate": 1, "majority": size * size // 2 + 1}[op]
+
+
+def filter_reference(mask, size=3, op="majority", threshold=None):
+    """Whole-frame k x k filter with a zero border; what the streaming model must reproduce."""
+    threshold = threshold_for(op, size) if threshold is None else threshold
+    half = size // 2
+    padded = np.pad(np.asarray(mask, dtype=np.int32), half)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, (size, size))
+    return windows.sum(axis=(-2, -1)) >= threshold
+
+
+def bram18_count(depth, width):
+    """Fewest 18 Kb BRAMs holding depth words of width bits, over the primitive's aspect ratios."""
+    return min(-(-depth // d) * -(-width // w) for d, w in BRAM18_SHAPES)
+
+
+class LineBuffers:
+    """class LineBuffers: a ring of line slots, written through a wrapping pointer like bram_interface"""
+
+    def __init__(self, lines, width):
+        self.lines = lines
+        self.width = width
+        self.memory = np.zeros((lines, width), dtype=bool)
+        self.write_ptr = 0
+
+    def clear(self):
+        self.memory[:] = False
+        self.write_ptr = 0
+
+    def write(self, row):
+        if self.lines:
+            self.memory[self.write_ptr] = row
+            self.write_ptr = (self.write_ptr + 1) % self.lines
+
+    def read(self):
+        """Stored lines, oldest first."""
+        return self.memory[(self.write_ptr + np.arange(self.lines)) % self.lines]
+
+    @property
+    def bits(self):
+        return self.lines * self.width
+
+
+class MaskFilter:
+    """class MaskFilter: one k x k erosion/dilation/majority stage fed a row at a time"""
+
+    def __init__(self, width=ACTIVE_H, size=3, op="majority", threshold=None):
+        if size < 1 or size % 2 == 0:
+            raise ValueError(f"window size must be odd, got {size}")
+        self.width = width
+        self.size = size
+        self.op = op
+        self.half = size // 2
+        self.threshold = threshold_for(op, size) if threshold is None else threshold
+        self.name = f"{op}{size}" if threshold is None else f"{op}{size}>={threshold}"
+        self.buffers = LineBuffers(size - 1, width)
+        self.reset()
+
+    def reset(self):
+        """Start of frame: the stored lines become the blank rows above it."""
+        self.buffers.clear()
+        self.rows_in = 0
+
+    def push(self, row):
+        """One mask row in; the filtered row k // 2 rows earlier out, or None while the window fills."""
+        row = np.asarray(row, dtype=bool)
+        window = np.vstack([self.buffers.read(), row[None]])
+        self.buffers.write(row)
+        self.rows_in += 1
+        if self.rows_in <= self.half:
+            return None
+        columns = window.sum(axis=0, dtype=np.int32)
+        running = np.concatenate([np.zeros(self.half + 1, dtype=np.int32), columns,
+                                  np.zeros(self.half, dtype=np.int32)]).cumsum()
+        return running[self.size:] - running[:-self.size] >= self.threshold
+
+    def flush(self):
+        """The last k // 2 rows of the frame, filtered against the blank rows below it."""
+        blank = np.zeros(self.width, dtype=bool)
+        return [self.push(blank) for _ in range(self.half)]
+
+    def frame(self, mask):
+        self.reset()
+        rows = [out for out in (self.push(row) for row in mask) if out is not None]
+        return np.array(rows + self.flush())
+
+    def cost(self, line_clocks=TOTAL_H):
+        """Line-buffer memory and the latency this stage adds, in pixel clocks at the given line length."""
+        return FilterCost(
+            line_buffers=self.buffers.lines,
+            bits=self.buffers.bits,
+            # all k - 1 lines side by side: one (k - 1)-bit word per column
+            bram18=bram18_count(self.width, self.buffers.lines) if self.buffers.lines else 0,
+            # the window centre trails the newest pixel by k // 2 lines and k // 2 pixels, plus the output register
+            latency_clocks=self.half * line_clocks + self.half + 1,
+            # column count: k - 1 adds; running row sum: one add and one subtract
+            adds_per_pixel=self.size + 1,
+        )
+
+
+class FilterChain:
+    """class FilterChain: filters applied one after another, e.g. an opening (erode then dilate)"""
+
+    def __init__(self, filters, name=None):
+        self.filters = list(filters)
+        self.name = name or "+".join(f.name for f in self.filters)
+
+    def frame(self, mask):
+        for f in self.filters:
+            mask = f.frame(mask)
+        return mask
+
+    def cost(self, line_clocks=TOTAL_H):
+        costs = [f.cost(line_clocks) for f in self.filters]
+        return FilterCost(*(sum(column) for column in zip(*costs)))
+
+
+def make_filter(op, size, width):
+    """A named filter: one of OPS, or open/close as a chain of two."""
+    if op == "open":
+        return FilterChain([MaskFilter(width, size, "erode"), MaskFilter(width, size, "dilate")], f"open{size}")
+    if op == "close":
+        return FilterChain([MaskFilter(width, size, "dilate"), MaskFilter(width, size, "erode")], f"close{size}")
+    return MaskFilter(width, size, op)
+
+
+def filter_stream(masks, mask_filter):
+    """Yield each mask frame filtered; like the scenes generators, one frame in memory at a time."""
+    for mask in masks:
+        yield mask_filter.frame(mask)
+
+
+def com_tracking(coms, centers):
+    """JitterResult fields for a COM stream against the true object centres (single blob)."""
+    track, truth = [], []
+    valid = 0
+    frames = 0
+    for com, center in zip(coms, centers):
+        frames += 1
+        if com.valid:
+            valid += 1
+            track.append((com.x, com.y))
+            truth.append(center[0])
+    track = np.asarray(track, dtype=np.float64).reshape(-1, 2)
+    error = np.hypot(*(track - np.asarray(truth).reshape(-1, 2)).T)
+    # frame-to-frame wobble that is not motion: the second difference of the track
+    wobble = np.hypot(*np.diff(track, n=2, axis=0).T) if len(track) > 2 else np.zeros(1)
+    return frames, valid, float(np.sqrt(np.mean(error ** 2))) if len(error) else float("nan"), \
+        float(np.sqrt(np.mean(wobble ** 2))), float(error.max()) if len(error) else float("nan")
+
+
+def jitter_study(filters, n_frames=120, width=ACTIVE_H, height=ACTIVE_V, noise=0.001, radius=(20, 60),
+                 speed=8.0, seed=0):
+    """COM error and jitter on one noisy moving blob, for the raw mask and for each filter."""
+    def masks():
+        return moving_blob_masks(n_frames, width, height, n_blobs=1, radius=radius, speed=speed,
+                                 noise=noise, seed=seed)
+
+    def centers():
+        return moving_blob_centers(n_frames, width, height, n_blobs=1, radius=radius, speed=speed, seed=seed)
+
+    results = [JitterResult("raw", *com_tracking(center_of_mass_stream(masks()), centers()))]
+    for f in filters:
+        coms = center_of_mass_stream(filter_stream(masks(), f))
+        results.append(JitterResult(f.name, *com_tracking(coms, centers())))
+    return results
+
+
+def format_report(filters, results, width):
+    costs = {f.name: f.cost() for f in filters}
+    lines = [f"{'filter':<14}{'lines':>6}{'bits':>8}{'BRAM18':>7}{'latency':>9}{'adds/px':>8}"
+             f"{'COM err':>9}{'jitter':>8}{'max err':>9}{'valid':>7}"]
+    for r in results:
+        c = costs.get(r.name)
+        cost = (f"{c.line_buffers:>6}{c.bits:>8}{c.bram18:>7}{c.latency_clocks:>9}{c.adds_per_pixel:>8}" if c
+                else f"{0:>6}{0:>8}{0:>7}{0:>9}{0:>8}")
+        lines.append(f"{r.name:<14}{cost}{r.rms_error:>9.2f}{r.rms_jitter:>8.2f}{r.max_error:>9.2f}"
+                     f"{r.valid:>4}/{r.frames:<3}")
+    lines.append(f"latency in pixel clocks at {TOTAL_H} clocks per line; COM error and jitter (RMS of the "
+                 f"track's second difference) in pixels, width {width}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--width", type=int, default=ACTIVE_H)
+    parser.add_argument("--height", type=int, default=ACTIVE_V)
+    parser.add_argument("--noise", type=float, default=0.001, help="probability of a false-positive pixel")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3, 5])
+    parser.add_argument("--ops", nargs="+", default=["majority", "erode", "open"],
+                        choices=list(OPS) + ["open", "close"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check", action="store_true", help="also check streaming against filter_reference")
+    args = parser.parse_args()
+
+    filters = [make_filter(op, size, args.width) for size in args.sizes for op in args.ops]
+    if args.check:
+        mask = next(moving_blob_masks(1, args.width, args.height, noise=args.noise, seed=args.seed))
+        for f in filters:
+            if isinstance(f, MaskFilter):
+                assert (f.frame(mask) == filter_reference(mask, f.size, f.op)).all(), f"{f.name} differs"
+        print("streaming filters match filter_reference")
+    results = jitter_study(filters, args.frames, args.width, args.height, args.noise, seed=args.seed)
+    print(format_report(filters, results, args.width))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+`timescale 1ns / 1ps
+`default_nettype none
+// Simulation shell exposing a MIG user interface (app_*) as top-level ports
+// with nothing behind them: MigDDR answers as the memory and a cocotb master
+// (ddr_trace.TraceReplayer) issues the commands, so the DRAM models can be
+// exercised without the rest of the design. Do not add this file to the
+// Vivado project.
+module mig_app_stub #(parameter ADDR_WIDTH = 27,
+                      parameter DATA_WIDTH = 128)
+                     (input wire clk,
+                      input wire [ADDR_WIDTH-1:0] app_addr,
+                      input wire [2:0] app_cmd,
+                      input wire app_en,
+                      input wire [DATA_WIDTH-1:0] app_wdf_data,
+                      input wire app_wdf_end,
+                      input wire app_wdf_wren,
+                      input wire [(DATA_WIDTH/8)-1:0] app_wdf_mask,
+                      input wire app_rdy,
+                      input wire app_wdf_rdy,
+                      input wire [DATA_WIDTH-1:0] app_rd_data,
+                      input wire app_rd_data_valid);
+endmodule
+
+`default_nettype wire
@@ -0,0 +1,331 @@
+"""
+Motion predictor models for leading the servo ahead of the measured COM.
+
+VelocityDirectionCalc is a bit-exact model of velocity_direction_calc.sv. The
+predictors run in fixed point so whichever one wins can be dropped into HDL
+unchanged, and evaluate() replays synthetic trajectories to report pointing
+error against lookahead.
+
+Run directly for a report:
+    python motion_predictor.py --trajectory linear --noise 1.5 --servo-ms 10
+"""
+import argparse
+import math
+
+import numpy as np
+
+from video_timing import ACTIVE_H as FRAME_WIDTH, ACTIVE_V as FRAME_HEIGHT, FRAME_RATE, FRAME_CLOCKS
+
+
+CLOCK_COUNTER_BITS = 16
+
+
+def to_signed(value, bits):
+    """Reinterpret the low `bits` bits of value (int or array) as two's complement."""
+    value = np.asarray(value, dtype=np.int64) & ((1 << bits) - 1)
+    return np.where(value >= (1 << (bits - 1)), value - (1 << bits), value)
+
+
+class VelocityDirectionCalc:
+    """
+    class VelocityDirectionCalc: bit-exact model of velocity_direction_calc.sv
+
+    Works on scalars or on a batch of independent trackers (arrays). divider2
+    is an unsigned 32-bit divider, so the model reproduces the way the module
+    feeds it a sign-extended difference: backwards motion shows up as a huge
+    quotient truncated to 12/11 bits. Note that clock_counter is only 16 bits,
+    so at 720p60 delta_time wraps to (FRAME_CLOCKS - 1) % 65536 = 57851 and
+    forward motion below that many pixels per frame reads as zero velocity.
+    divisor holds the clocks the last vx/vy were divided by.
+    """
+
+    def __init__(self, batch=None):
+        shape = () if batch is None else (batch,)
+        self.prev_x = np.zeros(shape, dtype=np.int64)
+        self.prev_y = np.zeros(shape, dtype=np.int64)
+        self.delta_time = np.zeros(shape, dtype=np.int64)
+        self.divisor = np.ones(shape, dtype=np.int64)
+        self.clock_counter = np.zeros(shape, dtype=np.int64)
+        self.vx = np.zeros(shape, dtype=np.int64)
+        self.vy = np.zeros(shape, dtype=np.int64)
+        self.direction = np.zeros(shape, dtype=np.int64)
+
+    def tick(self, cycles=1):
+        """Advance clock_counter by cycles without valid_in."""
+        self.clock_counter = (self.clock_counter + cycles) & ((1 << CLOCK_COUNTER_BITS) - 1)
+
+    def update(self, x_com, y_com):
+        """Apply one valid_in cycle and return (vx, vy, direction)."""
+        x_com = np.asarray(x_com, dtype=np.int64) & 0x7FF
+        y_com = np.asarray(y_com, dtype=np.int64) & 0x3FF
+
+        # the divisor is the delta_time registered on the *previous* valid_in
+        divisor = np.where(self.delta_time != 0, self.delta_time, 1)
+        self.divisor = divisor
+        dx = (to_signed(x_com, 11) - to_signed(self.prev_x, 11)) & 0xFFFFFFFF
+        dy = (to_signed(y_com, 10) - to_signed(self.prev_y, 10)) & 0xFFFFFFFF
+
+        self.delta_time = self.clock_counter.copy()
+        self.clock_counter = np.zeros_like(self.clock_counter)
+        self.prev_x = x_com
+        self.prev_y = y_com
+
+        self.vx = to_signed((dx // divisor) & 0xFFF, 12)
+        self.vy = to_signed((dy // divisor) & 0x7FF, 11)
+        self.direction = (((self.vx > 0) << 3) | ((self.vx < 0) << 2) |
+                          ((self.vy > 0) << 1) | (self.vy < 0)).astype(np.int64)
+        return self.vx, self.vy, self.direction
+
+    def step(self, x_com, y_com, period=FRAME_CLOCKS):
+        """One COM update, `period` clocks after the previous one."""
+        self.tick(period - 1)
+        return self.update(x_com, y_com)
+
+
+class HoldPredictor:
+    """Points at the latest measurement; this is what the servo path does today."""
+    name = "hold"
+
+    def reset(self, batch):
+        self.position = np.zeros((batch, 2), dtype=np.int64)
+
+    def update(self, z):
+        self.position = np.asarray(z, dtype=np.int64)
+
+    def predict(self, lookahead):
+        return self.position.astype(np.float64)
+
+
+class HardwarePredictor:
+    """
+    class HardwarePredictor: leads the target using vx_out/vy_out exactly as velocity_direction_calc emits them
+
+    vx/vy are pixels per clock of the divisor the HDL used, which is the
+    wrapped 16-bit delta_time rather than the real frame period, so the lead
+    is v * divisor per frame. Predictions are clipped to the active area like
+    a servo target would be; backward motion still gives the truncated
+    quotient, which the clip pins to an edge.
+    """
+    name = "hardware"
+
+    def __init__(self, period=FRAME_CLOCKS):
+        self.period = period
+
+    def reset(self, batch):
+        self.calc = VelocityDirectionCalc(batch)
+        self.position = np.zeros((batch, 2), dtype=np.int64)
+
+    def update(self, z):
+        z = np.asarray(z, dtype=np.int64)
+        self.calc.step(z[:, 0], z[:, 1], self.period)
+        self.position = z
+
+    def predict(self, lookahead):
+        # velocity is in pixels per clock of the divisor the HDL used
+        clocks = lookahead * self.calc.divisor[:, None]
+        v = np.stack([self.calc.vx, self.calc.vy], axis=1)
+        limit = np.array([FRAME_WIDTH - 1, FRAME_HEIGHT - 1])
+        return np.clip(self.position + v * clocks, 0, limit).astype(np.float64)
+
+
+class ConstantVelocityPredictor:
+    """Finite-difference velocity in Q(frac_bits) pixels per frame, extrapolated linearly."""
+    name = "constant_velocity"
+
+    def __init__(self, frac_bits=8):
+        self.frac_bits = frac_bits
+
+    def reset(self, batch):
+        self.position = np.zeros((batch, 2), dtype=np.int64)
+        self.velocity = np.zeros((batch, 2), dtype=np.int64)
+        self.primed = False
+
+    def update(self, z):
+        z = np.asarray(z, dtype=np.int64) << self.frac_bits
+        if self.primed:
+            self.velocity = z - self.position
+        self.position = z
+        self.primed = True
+
+    def predict(self, lookahead):
+        lead = int(round(lookahead * (1 << self.frac_bits)))
+        x = self.position + ((self.velocity * lead) >> self.frac_bits)
+        return x / (1 << self.frac_bits)
+
+
+class AlphaBetaPredictor:
+    """
+    class AlphaBetaPredictor: alpha-beta tracker in fixed point
+
+    Position and velocity are held in Q(frac_bits) pixels and pixels/frame,
+    gains in Q(gain_bits). Every right shift is arithmetic, like >>> on a
+    signed register.
+    """
+    name = "alpha_beta"
+
+    def __init__(self, alpha=0.5, beta=0.1, frac_bits=8, gain_bits=8):
+        self.frac_bits = frac_bits
+        self.gain_bits = gain_bits
+        self.alpha = int(round(alpha * (1 << gain_bits)))
+        self.beta = int(round(beta * (1 << gain_bits)))
+
+    def reset(self, batch):
+        self.position = np.zeros((batch, 2), dtype=np.int64)
+        self.velocity = np.zeros((batch, 2), dtype=np.int64)
+        self.primed = False
+
+    def update(self, z):
+        z = np.asarray(z, dtype=np.int64) << self.frac_bits
+        if not self.primed:
+            self.position = z
+            self.primed = True
+            return
+        predicted = self.position + self.velocity
+        residual = z - predicted
+        self.position = predicted + ((self.alpha * residual) >> self.gain_bits)
+        self.velocity = self.velocity + ((self.beta * residual) >> self.gain_bits)
+
+    def predict(self, lookahead):
+        lead = int(round(lookahead * (1 << self.frac_bits)))
+        x = self.position + ((self.velocity * lead) >> self.frac_bits)
+        return x / (1 << self.frac_bits)
+
+
+def kalman_gains(process_noise, measurement_noise):
+    """Steady-state Kalman gains (alpha, beta) for a constant-velocity target, dt = 1 frame."""
+    # Kalata tracking index: acceleration noise vs measurement noise
+    lam = process_noise / measurement_noise
+    r = (4 + lam - math.sqrt(8 * lam + lam * lam)) / 4
+    alpha = 1 - r * r
+    beta = 2 * (2 - alpha) - 4 * math.sqrt(1 - alpha)
+    return alpha, beta
+
+
+class KalmanPredictor(AlphaBetaPredictor):
+    """Alpha-beta tracker with gains taken from the steady-state Kalman filter."""
+    name = "kalman"
+
+    def __init__(self, process_noise=0.5, measurement_noise=1.5, frac_bits=8, gain_bits=8):
+        alpha, beta = kalman_gains(process_noise, measurement_noise)
+        super().__init__(alpha, beta, frac_bits, gain_bits)
+
+
+def synthetic_trajectories(kind, n_frames, batch=64, seed=0):
+    """Ground-truth object positions, shape (batch, n_frames, 2), in pixels."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_frames, dtype=np.float64)[None, :]
+    size = np.array([FRAME_WIDTH - 1, FRAME_HEIGHT - 1], dtype=np.float64)
+
+    if kind == "linear":
+        # constant velocity, bouncing off the frame edges
+        start = rng.uniform(0, 1, (batch, 1, 2)) * size
+        velocity = rng.uniform(-12, 12, (batch, 1, 2))
+        raw = start + velocity * t[..., None]
+        period = 2 * size
+        folded = np.mod(raw, period)
+        return np.where(folded > size, period - folded, folded)
+    if kind == "circular":
+        center = size / 2 + rng.uniform(-100, 100, (batch, 1, 2))
+        radius = rng.uniform(50, 300, (batch, 1))
+        omega = rng.uniform(0.02, 0.15, (batch, 1)) * rng.choice([-1, 1], (batch, 1))
+        phase = rng.uniform(0, 2 * np.pi, (batch, 1))
+        angle = omega * t + phase
+        return center + radius[..., None] * np.stack([np.cos(angle), np.sin(angle)], axis=-1)
+    if kind == "random_accel":
+        accel = rng.normal(0, 0.6, (batch, n_frames, 2))
+        velocity = np.cumsum(accel, axis=1)
+        position = size / 2 + np.cumsum(velocity, axis=1)
+        return np.clip(position, 0, size)
+    raise ValueError(f"Unknown trajectory kind '{kind}'")
+
+
+def measure(truth, noise=1.0, seed=1):
+    """Quantized noisy COM measurements, as center_of_mass would report them."""
+    rng = np.random.default_rng(seed)
+    z = np.rint(truth + rng.normal(0, noise, truth.shape))
+    limit = np.array([FRAME_WIDTH - 1, FRAME_HEIGHT - 1])
+    return np.clip(z, 0, limit).astype(np.int64)
+
+
+def default_predictors(noise=1.5):
+    return [
+        HoldPredictor(),
+        HardwarePredictor(),
+        ConstantVelocityPredictor(),
+        AlphaBetaPredictor(alpha=0.5, beta=0.1),
+        KalmanPredictor(process_noise=0.5, measurement_noise=noise),
+    ]
+
+
+def evaluate(predictors, truth, measurements, lookaheads, warmup=10):
+    """
+    Replay measurements through each predictor and score it against truth.
+
+    lookaheads are in frames and may be fractional. Returns
+    {name: array of shape (len(lookaheads), 3)} holding RMS, 95th percentile
+    and max pointing error in pixels for each lookahead.
+    """
+    batch, n_frames, _ = truth.shape
+    lookaheads = np.asarray(lookaheads, dtype=np.float64)
+    horizon = int(math.ceil(lookaheads.max()))
+    results = {}
+
+    for predictor in predictors:
+        predictor.reset(batch)
+        errors = [[] for _ in lookaheads]
+        for k in range(n_frames - horizon - 1):
+            predictor.update(measurements[:, k])
+            if k < warmup:
+                continue
+            for i, lead in enumerate(lookaheads):
+                target_t = k + lead
+                # linear interpolation of the ground truth at a fractional frame
+                lo = int(math.floor(target_t))
+                frac = target_t - lo
+                target = truth[:, lo] * (1 - frac) + truth[:, lo + 1] * frac
+                error = np.hypot(*(predictor.predict(lead) - target).T)
+                errors[i].append(error)
+        stats = np.zeros((len(lookaheads), 3))
+        for i, err in enumerate(errors):
+            err = np.concatenate(err)
+            stats[i] = (np.sqrt(np.mean(err ** 2)), np.percentile(err, 95), err.max())
+        results[predictor.name] = stats
+    return results
+
+
+def format_report(results, lookaheads):
+    """Table of RMS / p95 / max pointing error per predictor and lookahead."""
+    lines = [f"{'predictor':<20}{'lookahead':>10}{'rms_px':>12}{'p95_px':>12}{'max_px':>12}"]
+    for name, stats in results.items():
+        for lead, (rms, p95, worst) in zip(lookaheads, stats):
+            lines.append(f"{name:<20}{lead:>10.2f}{rms:>12.6g}{p95:>12.6g}{worst:>12.6g}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare motion predictors on synthetic trajectories.")
+    parser.add_argument("--trajectory", default="linear", choices=["linear", "circular", "random_accel"])
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--noise", type=float, default=1.5, help="COM measurement noise (pixels, 1 sigma)")
+    parser.add_argument("--servo-ms", type=float, default=10.0,
+                        help="servo latency on top of one camera frame (pwm period is 10 ms)")
+    parser.add_argument("--lookahead", type=float, nargs="*",
+                        help="lookaheads in frames (default: sweep around the system latency)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    system_latency = 1 + args.servo_ms * FRAME_RATE / 1000
+    lookaheads = args.lookahead or sorted({0.0, 0.5, 1.0, round(system_latency, 2), 2.0, 3.0})
+
+    truth = synthetic_trajectories(args.trajectory, args.frames, args.batch, args.seed)
+    measurements = measure(truth, args.noise, args.seed + 1)
+    results = evaluate(default_predictors(args.noise), truth, measurements, lookaheads)
+
+    print(f"trajectory={args.trajectory} frames={args.frames} batch={args.batch} "
+          f"noise={args.noise}px system latency={system_latency:.2f} frames")
+    print(format_report(results, lookaheads))
+
+
+if __name__ == "__main__":
+    main()
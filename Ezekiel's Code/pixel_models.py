@@ -0,0 +1,143 @@
+"""
+Vectorized bit-exact models of the per-pixel classification datapath.
+
+Every function takes NumPy arrays (any shape, colour channels on the last axis
+where there are channels) and reproduces the SystemVerilog integer semantics:
+operand widths, signed/unsigned mixing and truncation. Values are returned as
+int64 arrays holding the register contents; signed registers are sign
+extended, unsigned ones are not.
+
+    BrightnessDistortion       -> brightness_distortion()
+    BrightnessDistortion2      -> brightness_distortion2()
+    ChromaticityDistortionTest -> chromaticity_distortion()
+    CordicSqrt                 -> cordic_sqrt()
+    PixelClassification        -> pixel_classification()
+
+The chromaticity model gives the steady-state result for inputs held on
+valid_in; the HDL pipeline stages are all enabled by valid_in, so back-to-back
+pixels mix between stages.
+"""
+import numpy as np
+
+
+ITERATIONS = 16
+K1 = K2 = K3 = 2
+E_ALPHA = 1 << 16
+
+BACKGROUND = 0
+FOREGROUND = 1
+SHADOW = 2
+HIGHLIGHT = 3
+
+MASK32 = np.uint64((1 << 32) - 1)
+
+
+def to_signed(value, bits):
+    """Reinterpret the low `bits` of an integer array as two's complement."""
+    value = np.asarray(value).astype(np.int64) & ((1 << bits) - 1)
+    return np.where(value >= 1 << (bits - 1), value - (1 << bits), value)
+
+
+def cordic_sqrt(value, iterations=ITERATIONS):
+    """
+    CordicSqrt (Newton-Raphson): Q16.16 square root of a 32-bit input.
+
+    x and x_next update on alternate cycles, so the recurrence uses the
+    estimate from two steps back; when x reaches 0 only x_next is cleared.
+    """
+    v = np.asarray(value, dtype=np.uint64) & MASK32
+    seed = np.where(v > 0, v >> np.uint64(1), np.uint64(1))
+    x = seed.copy()
+    x_next = seed.copy()
+    for _ in range(iterations):
+        nonzero = x != 0
+        temp = (x * x) >> np.uint64(16)
+        temp = (temp + v) << np.uint64(16)
+        quotient = (temp // np.where(nonzero, x, np.uint64(1))) >> np.uint64(1)
+        new_next = np.where(nonzero, quotient & MASK32, np.uint64(0))
+        x = np.where(nonzero, x_next, x)
+        x_next = new_next
+    return x_next.astype(np.int64)
+
+
+def _safe_sigma(sigma):
+    sigma = np.asarray(sigma, dtype=np.uint64) & np.uint64(0xFFFF)
+    return np.where(sigma == 0, np.uint64(1), sigma)
+
+
+def _alpha(N, D):
+    # (N << 16) / D on signed 64-bit registers; both are non-negative here
+    N = (N << np.uint64(16)).astype(np.int64)
+    D = D.astype(np.int64)
+    alpha = np.where(D != 0, N // np.where(D != 0, D, 1), 0)
+    return to_signed(alpha, 32)
+
+
+def brightness_terms(I, E, sigma):
+    """BrightnessDistortion's N and D registers (unsigned 64-bit)."""
+    I = np.asarray(I, dtype=np.uint64) & np.uint64(0xFF)
+    E = np.asarray(E, dtype=np.uint64) & np.uint64(0xFFFF)
+    sigma = _safe_sigma(sigma)
+    N = ((I * E) << np.uint64(16)) // sigma
+    D = ((E * E) << np.uint64(16)) // sigma
+    return N.sum(axis=-1, dtype=np.uint64), D.sum(axis=-1, dtype=np.uint64)
+
+
+def brightness_distortion(I, E, sigma):
+    """BrightnessDistortion: alpha (Q16.16) from (..., 3) I, E and sigma."""
+    return _alpha(*brightness_terms(I, E, sigma))
+
+
+def brightness_distortion2(I, E, sigma):
+    """BrightnessDistortion2: (alpha, SD_alpha), SD_alpha = sqrt(mean sigma^2) << 8."""
+    alpha = brightness_distortion(I, E, sigma)
+    sigma = _safe_sigma(sigma)
+    sigma_sum_sq = (sigma * sigma).sum(axis=-1, dtype=np.uint64)
+    sd_alpha = (cordic_sqrt(sigma_sum_sq // np.uint64(3)) << 8) & ((1 << 32) - 1)
+    return alpha, sd_alpha
+
+
+def chromaticity_terms(I, E, alpha):
+    """
+    ChromaticityDistortionTest's intermediate registers as a dict: alpha_E,
+    numerator, delta and delta_sq per channel, and sum_deltas.
+    """
+    I = np.asarray(I, dtype=np.uint64) & np.uint64(0xFF)
+    E = np.asarray(E, dtype=np.uint64) & np.uint64(0xFFFF)
+    alpha = (np.asarray(alpha, dtype=np.int64) & 0xFFFFFFFF).astype(np.uint64)[..., None]
+    # alpha * E mixes signed and unsigned, so the product and the >>> are unsigned
+    alpha_E = ((alpha * E) & MASK32) >> np.uint64(16)
+    numerator = ((I << np.uint64(16)) - alpha_E) & MASK32
+    delta = np.where(E != 0, numerator // np.where(E != 0, E, np.uint64(1)), np.uint64(0))
+    delta = to_signed(delta, 32)
+    delta_sq = to_signed(delta * delta, 48)
+    sum_deltas = to_signed(delta_sq.sum(axis=-1), 48) >> 16
+    return {"alpha_E": alpha_E, "numerator": numerator, "delta": delta,
+            "delta_sq": delta_sq, "sum_deltas": sum_deltas}
+
+
+def chromaticity_distortion(I, E, alpha):
+    """ChromaticityDistortionTest: CD from (..., 3) I and E and a per-pixel alpha."""
+    return cordic_sqrt(chromaticity_terms(I, E, alpha)["sum_deltas"] & 0xFFFFFFFF)
+
+
+def pixel_classification(alpha, cd, sd_alpha, sd_cd):
+    """PixelClassification: 0 background, 1 foreground, 2 shadow, 3 highlight."""
+    sd_alpha = np.asarray(sd_alpha, dtype=np.int64)
+    a_lo = to_signed(E_ALPHA - K1 * sd_alpha, 32)
+    a_hi = to_signed(E_ALPHA + K2 * sd_alpha, 32)
+    b = to_signed(K3 * np.asarray(sd_cd, dtype=np.int64), 32)
+    alpha = to_signed(alpha, 32)
+    cd = to_signed(cd, 32)
+    classes = np.full(np.broadcast(alpha, cd, a_lo, b).shape, BACKGROUND, dtype=np.uint8)
+    classes[alpha > a_hi] = HIGHLIGHT
+    classes[alpha < a_lo] = SHADOW
+    classes[cd > b] = FOREGROUND
+    return classes
+
+
+def classify(I, E, sigma, sd_alpha, sd_cd):
+    """Full chain: brightness -> chromaticity -> classification."""
+    alpha = brightness_distortion(I, E, sigma)
+    cd = chromaticity_distortion(I, E, alpha)
+    return pixel_classification(alpha, cd, sd_alpha, sd_cd)
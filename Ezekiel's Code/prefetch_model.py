@@ -0,0 +1,295 @@
+"""
+Prefetch sizing for BackgroundModelReader at pixel rate.
+
+The reader in top_level fetches one 128-bit background-model word (E, SD, CD,
+alpha) per displayed pixel: active_draw_hdmi and pixel_index say which pixel
+is drawn, and the word has to be in the reader's FIFO by then or the pixel is
+classified against stale data. This model replays that request stream at 720p
+HDMI timing against the shared MIG port, event by event in UI cycles:
+
+    demand   one word per active pixel, due on its clk_pixel cycle, plus the
+             clk_pixel synchronizer lag on the returned data
+    reads    issued in pixel order whenever the port is ready, at most `lead`
+             words ahead of the pixel being drawn; the MIG returns them in
+             order after a MigLatency delay
+    writes   the camera frame data competing for the same port (one word per
+             `write_every` camera pixels); as in the traffic generator they
+             go first once more than `write_pile` are waiting, and take any
+             cycle the reader cannot use
+
+Idle stretches (the reader at its lead with no write waiting) are skipped to
+the next consumed pixel or write, so a run costs about one step per command.
+A word that arrives after its pixel was drawn is an underrun. The FIFO depth
+a lead needs is the highest number of returned-but-undrawn words seen.
+
+    python prefetch_model.py --trials 3
+    python prefetch_model.py --profile ddr3 --leads 64 256 1024 --worst 5
+
+The report sweeps the lead, gives the smallest one with no underrun in any
+trial and its FIFO depth, and per-line latency tails for that lead. A lead
+is only sized from a run of at least a full frame, and not at all when the
+port cannot carry the frame-average demand: the FIFO then drains however
+deep it is, and a shorter window only hides that. The
+BackgroundModelReader source is not in this tree. The port arbitration and
+the pipeline slack after pixel_index are assumptions, to be checked against
+the RTL.
+"""
+import argparse
+from collections import namedtuple
+
+import numpy as np
+
+from ddr_fifo_model import DEFAULT_PROG_EMPTY, SYNC_STAGES, UI_CLOCK_HZ, MigLatency
+from video_timing import ACTIVE_H, ACTIVE_V, PIXEL_CLOCK_HZ, TOTAL_H, TOTAL_V
+
+
+WORD_BITS = 128
+FRAME_PIXELS_PER_WORD = 8
+# simple dual-port 36 Kb block RAM at its widest: 512 x 72
+BRAM36_DEPTH = 512
+BRAM36_WIDTH = 72
+
+ReaderResult = namedtuple("ReaderResult", ["lead", "words", "underruns", "fifo_depth", "write_backlog",
+                                           "reads", "writes", "ui_cycles", "lines"])
+LineStats = namedtuple("LineStats", ["line", "underruns", "p50_ns", "p99_ns", "max_ns", "min_slack_ns"])
+SweepRow = namedtuple("SweepRow", ["lead", "p_underrun", "underruns", "fifo_depth", "bram36", "write_backlog"])
+
+
+def bram36_count(depth, width=WORD_BITS):
+    return -(-depth // BRAM36_DEPTH) * -(-width // BRAM36_WIDTH)
+
+
+def active_pixel_cycles(lines, start_line=ACTIVE_V, width=ACTIVE_H, height=ACTIVE_V, total_h=TOTAL_H,
+                        total_v=TOTAL_V, every=1):
+    """
+    clk_pixel cycles and lines of the active pixels (every `every`-th one) in the raster.
+
+    The raster starts at the beginning of line `start_line`, by default the
+    first line of vertical blanking, and runs until `lines` active lines are done.
+    """
+    blank = (total_v - start_line) % total_v if start_line >= height else 0
+    cycle = np.arange((blank + lines) * total_h) + start_line * total_h
+    h = cycle % total_h
+    v = (cycle // total_h) % total_v
+    keep = (h < width) & (v < height) & (h % every == every - 1)
+    return np.flatnonzero(keep), v[keep]
+
+
+def simulate_reader(lead, lines=64, mig=None, pixel_hz=PIXEL_CLOCK_HZ, ui_hz=UI_CLOCK_HZ, write_every=8,
+                    write_pile=DEFAULT_PROG_EMPTY, camera_line=0, other_load=0.0, pipeline_clocks=0,
+                    sync_stages=SYNC_STAGES, seed=0, details=False):
+    """
+    One run of the reader for `lines` active lines after the vertical blanking.
+
+    camera_line is the camera raster's line when the display enters blanking
+    (the two are not locked; 0 keeps the camera writing the whole run), and
+    write_every=0 turns the writes off. other_load is the fraction of UI
+    cycles taken by other masters, e.g. the display read path. With
+    details=True also returns per-word (line, issue, arrival, due) arrays in
+    UI cycles for line_stats().
+    """
+    rng = np.random.default_rng(seed)
+    mig = mig or MigLatency.migddr()
+    ui_per_pixel = ui_hz / pixel_hz
+    pixel_cycles, line_of = active_pixel_cycles(lines)
+    phase = rng.random()
+    due = (pixel_cycles + pipeline_clocks + phase) * ui_per_pixel
+    # returned data crosses into clk_pixel before the reader can present it
+    sync = sync_stages * ui_per_pixel
+    n_ui = int(np.ceil(due[-1])) + 1
+    if write_every:
+        camera, _ = active_pixel_cycles(lines + TOTAL_V, start_line=camera_line, every=write_every)
+        write_at = np.ceil((camera + phase) * ui_per_pixel).astype(np.int64)
+        write_at = write_at[write_at < n_ui].tolist()
+    else:
+        write_at = []
+    rdy, wdf_rdy, latency = mig.sample(n_ui, rng)
+    if other_load:
+        rdy &= rng.random(n_ui) >= other_load
+    rdy, wdf_rdy, latency = rdy.tolist(), wdf_rdy.tolist(), latency.tolist()
+
+    due_list = due.tolist()
+    n_words = len(due_list)
+    n_writes = len(write_at)
+    issue = np.full(n_words, -1, dtype=np.int64)
+    arrival = np.full(n_words, np.inf)
+    issued = consumed = written = queued = 0
+    backlog = 0
+    last_return = 0
+    u = 0
+    while u < n_ui and (issued < n_words or written < n_writes):
+        while consumed < n_words and due_list[consumed] <= u:
+            consumed += 1
+        while queued < n_writes and write_at[queued] <= u:
+            queued += 1
+        pending = queued - written
+        backlog = max(backlog, pending)
+        can_read = issued < n_words and issued - consumed < lead
+        if rdy[u]:
+            if pending and wdf_rdy[u] and (pending > write_pile or not can_read):
+                written += 1
+            elif can_read:
+                # the MIG returns reads in order
+                last_return = max(u + latency[u], last_return)
+                issue[issued] = u
+                arrival[issued] = last_return
+                issued += 1
+            elif not pending:
+                u = _next_event(u, issued, lead, due_list, write_at, queued)
+                continue
+        u += 1
+
+    arrival += sync
+    late = arrival > due
+    # a word occupies the FIFO from its arrival until its pixel is drawn; late words are dropped
+    on_time = ~late
+    events = np.concatenate([arrival[on_time], due[on_time]])
+    steps = np.concatenate([np.ones(on_time.sum(), dtype=np.int64), -np.ones(on_time.sum(), dtype=np.int64)])
+    order = np.lexsort((-steps, events))
+    depth = int(np.cumsum(steps[order]).max()) if len(order) else 0
+    result = ReaderResult(lead, n_words, int(late.sum()), depth, backlog, issued, written, u, lines)
+    if details:
+        return result, (line_of, issue, arrival, due)
+    return result
+
+
+def _next_event(u, issued, lead, due, write_at, queued):
+    """The reader is at its lead and no write is waiting: jump to the next consumed pixel or write."""
+    candidates = []
+    if issued < len(due) and issued >= lead:
+        candidates.append(int(np.ceil(due[issued - lead])))
+    if queued < len(write_at):
+        candidates.append(write_at[queued])
+    return max(u + 1, min(candidates)) if candidates else u + 1
+
+
+def line_stats(details, ui_hz=UI_CLOCK_HZ):
+    """Per active line: underruns, read latency p50/p99/max and the least slack before the pixel, in ns."""
+    line_of, issue, arrival, due = details
+    ns = 1e9 / ui_hz
+    latency = (arrival - issue) * ns
+    slack = (due - arrival) * ns
+    rows = []
+    for line in np.unique(line_of):
+        sel = line_of == line
+        lat = latency[sel & (issue >= 0)]
+        if not len(lat):
+            lat = np.array([np.inf])
+        p50, p99 = np.percentile(lat, [50, 99])
+        rows.append(LineStats(int(line), int((slack[sel] < 0).sum()), float(p50), float(p99), float(lat.max()),
+                              float(slack[sel].min())))
+    return rows
+
+
+def sweep(leads=(32, 64, 128, 256, 512, 1024, 2048, 4096), trials=3, **kwargs):
+    """One SweepRow per lead over `trials` seeds; fifo_depth and write_backlog are the worst seen."""
+    rows = []
+    for lead in leads:
+        results = [simulate_reader(lead, seed=seed, **kwargs) for seed in range(trials)]
+        depth = max(r.fifo_depth for r in results)
+        rows.append(SweepRow(lead, sum(r.underruns > 0 for r in results) / trials,
+                             sum(r.underruns for r in results), depth, bram36_count(max(depth, 1)),
+                             max(r.write_backlog for r in results)))
+    return rows
+
+
+def minimum_lead(rows):
+    """The smallest lead with no underrun in any trial, or None."""
+    safe = [row for row in rows if row.p_underrun == 0]
+    return min(safe, key=lambda row: row.lead) if safe else None
+
+
+def sizing_problem(lines, frame_demand, supply):
+    """Why a sweep cannot size the lead, or None: a sustained port deficit, or a window shorter than a frame."""
+    if frame_demand > supply:
+        return (f"infeasible: {frame_demand:.2f} words/UI cycle needed over a frame but {supply:.2f} available, "
+                f"so no finite lead or FIFO depth avoids underrun")
+    if lines < ACTIVE_V:
+        return (f"{lines} lines is shorter than a frame; run --lines {ACTIVE_V} or more before taking a lead "
+                f"and FIFO depth from the sweep")
+    return None
+
+
+def port_load(mig, pixel_hz=PIXEL_CLOCK_HZ, ui_hz=UI_CLOCK_HZ, write_every=8, other_load=0.0):
+    """(words the reader and writes need per UI cycle over a frame, during an active line; what the port gives)."""
+    per_pixel = 1 + (1 / write_every if write_every else 0)
+    active = ACTIVE_H * ACTIVE_V / (TOTAL_H * TOTAL_V)
+    supply = mig.ready_chance * (1 - other_load)
+    if mig.refresh_interval:
+        supply *= 1 - mig.refresh_cycles / mig.refresh_interval
+    return per_pixel * active * pixel_hz / ui_hz, per_pixel * pixel_hz / ui_hz, supply
+
+
+def format_report(rows):
+    lines = [f"{'lead':>7}{'P(under)':>10}{'underruns':>11}{'FIFO depth':>12}{'BRAM36':>8}{'write backlog':>15}"]
+    for r in rows:
+        lines.append(f"{r.lead:>7}{r.p_underrun:>10.2f}{r.underruns:>11}{r.fifo_depth:>12}{r.bram36:>8}"
+                     f"{r.write_backlog:>15}")
+    return "\n".join(lines)
+
+
+def format_lines(stats, worst=8):
+    stats = sorted(stats, key=lambda s: (s.min_slack_ns, -s.p99_ns))[:worst]
+    lines = [f"{'line':>6}{'underruns':>11}{'p50 ns':>9}{'p99 ns':>9}{'max ns':>9}{'min slack ns':>14}"]
+    for s in stats:
+        lines.append(f"{s.line:>6}{s.underruns:>11}{s.p50_ns:>9.0f}{s.p99_ns:>9.0f}{s.max_ns:>9.0f}"
+                     f"{s.min_slack_ns:>14.0f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=ACTIVE_V,
+                        help="active lines simulated after vertical blanking (a frame or more to size the lead)")
+    parser.add_argument("--trials", type=int, default=3)
+    parser.add_argument("--leads", type=int, nargs="+", default=[32, 64, 128, 256, 512, 1024, 2048, 4096])
+    parser.add_argument("--pixel-hz", type=float, default=PIXEL_CLOCK_HZ)
+    parser.add_argument("--ui-hz", type=float, default=UI_CLOCK_HZ)
+    parser.add_argument("--profile", choices=["migddr", "ddr3"], default="migddr")
+    parser.add_argument("--latency", type=int, nargs="+",
+                        help="fixed latency, a lo hi range, or three or more samples (UI cycles)")
+    parser.add_argument("--ready", type=float, help="probability app_rdy is high (backpressure)")
+    parser.add_argument("--write-every", type=int, default=FRAME_PIXELS_PER_WORD,
+                        help="camera pixels per written word; 1 for model training writes, 0 for none")
+    parser.add_argument("--write-pile", type=int, default=DEFAULT_PROG_EMPTY)
+    parser.add_argument("--camera-line", type=int, default=0)
+    parser.add_argument("--other-load", type=float, default=0.0,
+                        help="fraction of UI cycles used by other masters (e.g. the display read path)")
+    parser.add_argument("--pipeline-clocks", type=int, default=0,
+                        help="clk_pixel cycles between pixel_index and the classifier needing the word")
+    parser.add_argument("--worst", type=int, default=8, help="lines shown in the latency-tail table")
+    args = parser.parse_args()
+
+    mig = MigLatency.migddr() if args.profile == "migddr" else MigLatency.ddr3(args.ui_hz)
+    if args.latency:
+        mig.latency = args.latency[0] if len(args.latency) == 1 else args.latency
+    if args.ready is not None:
+        mig.ready_chance = args.ready
+    kwargs = dict(lines=args.lines, mig=mig, pixel_hz=args.pixel_hz, ui_hz=args.ui_hz,
+                  write_every=args.write_every, write_pile=args.write_pile, camera_line=args.camera_line,
+                  other_load=args.other_load, pipeline_clocks=args.pipeline_clocks)
+
+    frame, line, supply = port_load(mig, args.pixel_hz, args.ui_hz, args.write_every, args.other_load)
+    print(f"port: {frame:.2f} words/UI cycle needed over a frame, {line:.2f} during an active line, "
+          f"{supply:.2f} available")
+    rows = sweep(args.leads, args.trials, **kwargs)
+    print(format_report(rows))
+    problem = sizing_problem(args.lines, frame, supply)
+    if problem:
+        print(f"\n{problem}")
+        return
+    best = minimum_lead(rows)
+    if best:
+        print(f"\nminimum lead {best.lead} words: FIFO depth {best.fifo_depth} x {WORD_BITS} bits "
+              f"({best.bram36} BRAM36), write backlog {best.write_backlog}")
+        lead = best.lead
+    else:
+        lead = max(args.leads)
+        print(f"\nno lead up to {lead} words was underrun free")
+    result, details = simulate_reader(lead, details=True, **kwargs)
+    print(f"\nworst lines at lead {lead} (seed 0, {result.underruns} underruns):")
+    print(format_lines(line_stats(details, args.ui_hz), args.worst))
+
+
+if __name__ == "__main__":
+    main()
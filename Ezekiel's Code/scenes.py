@@ -0,0 +1,158 @@
+"""
+Frame sources for the golden models: synthetic scenes and lazy readers for
+recorded raw video. Every source is a generator that yields one frame at a
+time so long sequences never sit in memory at once.
+"""
+import numpy as np
+
+from video_timing import ACTIVE_H, ACTIVE_V
+
+
+def read_raw_frames(path, width=ACTIVE_H, height=ACTIVE_V, channels=1, dtype=np.uint8, start=0, count=None):
+    """
+    Yield frames from a headerless raw file (frame after frame, row major).
+
+    The file is memory mapped, so only the pages of the frame being consumed
+    are ever read from disk. Frames are yielded as read-only views.
+    """
+    shape = (height, width) if channels == 1 else (height, width, channels)
+    frame_items = int(np.prod(shape))
+    data = np.memmap(path, dtype=dtype, mode="r")
+    available = data.size // frame_items
+    stop = available if count is None else min(available, start + count)
+    for index in range(start, stop):
+        yield data[index * frame_items:(index + 1) * frame_items].reshape(shape)
+
+
+def read_mask_frames(path, width=ACTIVE_H, height=ACTIVE_V, foreground=None, **kwargs):
+    """
+    Yield boolean masks from a recorded raw file.
+
+    With foreground=None any non-zero byte is a mask pixel; otherwise the file
+    holds PixelClassification codes and only that class counts (1 = foreground).
+    """
+    for frame in read_raw_frames(path, width, height, **kwargs):
+        yield frame != 0 if foreground is None else frame == foreground
+
+
+def moving_blob_masks(n_frames, width=ACTIVE_H, height=ACTIVE_V, n_blobs=1, radius=(20, 60),
+                      speed=8.0, noise=0.0, seed=0):
+    """
+    Yield masks of disc-shaped objects bouncing around the frame.
+
+    noise is the probability of an isolated false-positive pixel, which is what
+    the classification stage produces on a real camera. Only the mask is
+    yielded; moving_blob_centers() gives the matching ground truth.
+    """
+    for mask, _ in _moving_blobs(n_frames, width, height, n_blobs, radius, speed, noise, seed):
+        yield mask
+
+
+def moving_blob_centers(n_frames, width=ACTIVE_H, height=ACTIVE_V, n_blobs=1, radius=(20, 60),
+                        speed=8.0, noise=0.0, seed=0):
+    """Ground-truth (n_blobs, 2) centers matching moving_blob_masks() with the same arguments."""
+    for _, centers in _moving_blobs(n_frames, width, height, n_blobs, radius, speed, noise, seed,
+                                    render=False):
+        yield centers
+
+
+def _moving_blobs(n_frames, width, height, n_blobs, radius, speed, noise, seed, render=True):
+    rng = np.random.default_rng(seed)
+    size = np.array([width - 1, height - 1], dtype=np.float64)
+    radii = rng.uniform(radius[0], radius[1], n_blobs)
+    position = rng.uniform(0.2, 0.8, (n_blobs, 2)) * size
+    angle = rng.uniform(0, 2 * np.pi, n_blobs)
+    velocity = speed * np.stack([np.cos(angle), np.sin(angle)], axis=1)
+    noise_rng = np.random.default_rng(seed + 1)
+
+    yy = np.arange(height)[:, None]
+    xx = np.arange(width)[None, :]
+    for _ in range(n_frames):
+        mask = None
+        if render:
+            mask = np.zeros((height, width), dtype=bool)
+            for (cx, cy), r in zip(position, radii):
+                # only touch the bounding box of each disc
+                x0, x1 = max(int(cx - r), 0), min(int(cx + r) + 1, width)
+                y0, y1 = max(int(cy - r), 0), min(int(cy + r) + 1, height)
+                mask[y0:y1, x0:x1] |= (xx[:, x0:x1] - cx) ** 2 + (yy[y0:y1] - cy) ** 2 <= r * r
+            if noise > 0:
+                mask |= noise_rng.random((height, width)) < noise
+        yield mask, position.copy()
+
+        position += velocity
+        # bounce off the frame edges
+        low, high = position < 0, position > size
+        velocity[low | high] *= -1
+        position = np.clip(position, 0, size)
+
+
+def read_rgb_frames(path, width=ACTIVE_H, height=ACTIVE_V, **kwargs):
+    """Yield (height, width, 3) uint8 frames from a recorded raw RGB888 file."""
+    return read_raw_frames(path, width, height, channels=3, dtype=np.uint8, **kwargs)
+
+
+def static_background(width=ACTIVE_H, height=ACTIVE_V, seed=0):
+    """A smooth, colourful float background: a few random gradients plus low-frequency texture."""
+    rng = np.random.default_rng(seed)
+    yy = np.linspace(0, 1, height)[:, None, None]
+    xx = np.linspace(0, 1, width)[None, :, None]
+    base = rng.uniform(40, 200, 3) + rng.uniform(-40, 40, 3) * xx + rng.uniform(-40, 40, 3) * yy
+    phase = rng.uniform(0, 2 * np.pi, (2, 3))
+    texture = 15 * np.sin(2 * np.pi * 3 * xx + phase[0]) * np.sin(2 * np.pi * 2 * yy + phase[1])
+    return np.clip(base + texture, 0, 255)
+
+
+def rgb_scene_frames(n_frames, width=ACTIVE_H, height=ACTIVE_V, n_blobs=1, radius=(20, 60), speed=8.0,
+                     noise_sigma=2.0, shadow=0.5, seed=0, background=None, lighting=None):
+    """
+    Yield uint8 RGB frames of a static background with sensor noise, moving
+    coloured discs, and (if shadow > 0) a darkened shadow disc trailing each one.
+
+    n_blobs=0 gives pure background frames for training a model. The disc
+    centres match moving_blob_centers() with the same geometry arguments, and
+    rgb_scene_truth() gives the matching object and shadow masks. lighting is
+    an optional (n_frames, 3) array of per-channel gains applied to the whole
+    scene before the sensor noise.
+    """
+    background = static_background(width, height, seed) if background is None else background
+    rng = np.random.default_rng(seed + 2)
+    colours = rng.uniform(0, 255, (max(n_blobs, 1), 3))
+    yy = np.arange(height)[:, None]
+    xx = np.arange(width)[None, :]
+    blobs = _moving_blobs(n_frames, width, height, n_blobs, radius, speed, 0.0, seed, render=False)
+    radii = np.random.default_rng(seed).uniform(radius[0], radius[1], n_blobs)
+    for index, (_, centers) in enumerate(blobs):
+        frame = background.copy()
+        for (cx, cy), r, colour in zip(centers, radii, colours):
+            if shadow > 0:
+                # offset down-right, like light from the upper left
+                sx, sy = cx + r / 2, cy + r / 2
+                disc = (xx - sx) ** 2 + (yy - sy) ** 2 <= r * r
+                frame[disc] *= 1 - shadow
+            disc = (xx - cx) ** 2 + (yy - cy) ** 2 <= r * r
+            frame[disc] = colour
+        if lighting is not None:
+            frame = frame * lighting[index]
+        if noise_sigma > 0:
+            frame = frame + rng.normal(0, noise_sigma, frame.shape)
+        yield np.clip(np.rint(frame), 0, 255).astype(np.uint8)
+
+
+def rgb_scene_truth(n_frames, width=ACTIVE_H, height=ACTIVE_V, n_blobs=1, radius=(20, 60), speed=8.0,
+                    shadow=0.5, seed=0):
+    """
+    Yield (objects, shadows) boolean masks matching rgb_scene_frames() with the
+    same geometry arguments. shadows excludes pixels an object covers.
+    """
+    yy = np.arange(height)[:, None]
+    xx = np.arange(width)[None, :]
+    radii = np.random.default_rng(seed).uniform(radius[0], radius[1], n_blobs)
+    for _, centers in _moving_blobs(n_frames, width, height, n_blobs, radius, speed, 0.0, seed, render=False):
+        objects = np.zeros((height, width), dtype=bool)
+        shadows = np.zeros((height, width), dtype=bool)
+        for (cx, cy), r in zip(centers, radii):
+            if shadow > 0:
+                shadows |= (xx - cx - r / 2) ** 2 + (yy - cy - r / 2) ** 2 <= r * r
+            objects |= (xx - cx) ** 2 + (yy - cy) ** 2 <= r * r
+        yield objects, shadows & ~objects
@@ -8,6 +8,7 @@ import os
 import sys
 from pathlib import Path
 from cocotb.runner import get_runner
+from wave_window import WaveRunner
 
 
 
@@ -184,22 +185,20 @@ def is_runner():
     build_test_args = ["-Wall"]
     parameters = {}
     sys.path.append(str(proj_path / "sim"))
-    runner = get_runner(sim)
+    runner = WaveRunner(get_runner(sim))
     runner.build(
         sources=sources,
         hdl_toplevel="BackgroundModelTest",
         always=True,
         build_args=build_test_args,
         parameters=parameters,
-        timescale=('1ns','1ps'),
-        waves=True
+        timescale=('1ns','1ps')
     )
     run_test_args = []
     runner.test(
         hdl_toplevel="BackgroundModelTest",
         test_module="test_background_model",
-        test_args=run_test_args,
-        waves=True
+        test_args=run_test_args
     )
 
 if __name__ == "__main__":
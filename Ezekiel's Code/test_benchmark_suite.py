@@ -0,0 +1,246 @@
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, FallingEdge, ClockCycles, ReadOnly
+import numpy as np
+import random
+from benchmark_suite import WORKLOADS, Measurement, run, format_report
+from bg_format_study import train_background
+from comb_sweep import fast_reader
+from ddr_trace import RECORD, TraceRecorder, TraceReplayer
+from ddr_address_map import CMD_READ, CMD_WRITE, UNITS_PER_WORD
+from MigDDR import MigDDR
+from pixel_models import brightness_distortion, chromaticity_distortion, cordic_sqrt, pixel_classification
+from scenes import rgb_scene_frames
+from test_pixel_classification import stream_classification
+from video_timing import ACTIVE_H
+
+
+CLK_PERIOD = 10
+TILE_ROWS = 16
+DRAM_WORDS = 2048
+UART_CLOCK_HZ = 100_000_000
+UART_BAUD = 115200
+UART_FRAMES = 4
+UART_BURSTS = 2
+SQRT_RANDOM = 1500
+
+
+async def start_clock(clock, period=CLK_PERIOD):
+    cocotb.start_soon(Clock(clock, period, units="ns").start())
+    await FallingEdge(clock)
+
+
+def tile_stimulus(width=ACTIVE_H, height=TILE_ROWS, seed=0):
+    """alpha/CD/SD ports for one scene tile, from a background trained on the same tile."""
+    radius = (height // 4, height // 2)
+    stats = train_background(rgb_scene_frames(8, width, height, n_blobs=0, seed=seed))
+    frame = next(rgb_scene_frames(1, width, height, n_blobs=4, radius=radius, seed=seed))
+    E = np.floor(stats.mean).astype(np.int64)
+    sigma = np.floor(stats.sd).astype(np.int64)
+    alpha = brightness_distortion(frame, E, sigma)
+    return {
+        "alpha": alpha.ravel(),
+        "CD": chromaticity_distortion(frame, E, alpha).ravel(),
+        "SD_alpha": np.floor(stats.sd_alpha).astype(np.int64).ravel(),
+        "SD_CD": np.floor(stats.sd_cd).astype(np.int64).ravel(),
+    }
+
+
+@cocotb.test()
+async def test_bench_classification_tile(dut):
+    """A full-width tile of a scene through PixelClassification at one pixel per clock."""
+    await start_clock(dut.clk)
+    dut.rst.value = 1
+    dut.valid_in.value = 0
+    for name in ("I_R", "I_G", "I_B", "E_R", "E_G", "E_B", "SD_alpha", "SD_CD", "alpha", "CD"):
+        getattr(dut, name).value = 0
+    await ClockCycles(dut.clk, 5)
+    dut.rst.value = 0
+    dut.valid_in.value = 1
+    stimulus = tile_stimulus()
+    expected = pixel_classification(stimulus["alpha"], stimulus["CD"], stimulus["SD_alpha"], stimulus["SD_CD"])
+
+    bench = Measurement("classification_tile", CLK_PERIOD, "pixels")
+    bench.start()
+    observed = await stream_classification(dut, stimulus)
+    bad = np.flatnonzero(observed != expected)
+    assert len(bad) == 0, f"{len(bad)} of {len(expected)} pixels misclassified, first at {bad[0]}"
+    record = bench.stop(len(expected), classes=np.bincount(expected, minlength=4).tolist())
+    dut._log.info(f"{record['throughput']:.3f} pixels/cycle, {record['cycles_per_second']:.0f} cycles/s")
+
+
+@cocotb.test()
+async def test_bench_background_training(dut):
+    """NUM_FRAMES frames into BackgroundModelTest at one pixel per clock, then the first model output."""
+    parameters = next(w.parameters for w in WORKLOADS if w.name == "background_training")
+    width, height, n_frames = parameters["WIDTH"], parameters["HEIGHT"], parameters["NUM_FRAMES"]
+    await start_clock(dut.clk)
+    dut.rst.value = 1
+    dut.valid_in.value = 0
+    dut.btn0.value = 0
+    for name in ("I_R", "I_G", "I_B"):
+        getattr(dut, name).value = 0
+    await ClockCycles(dut.clk, 5)
+    await FallingEdge(dut.clk)
+    dut.rst.value = 0
+    frames = np.stack(list(rgb_scene_frames(n_frames, width, height, n_blobs=0, seed=1))).astype(np.int64)
+    rows = frames.reshape(n_frames * width * height, 3).tolist()
+
+    bench = Measurement("background_training", CLK_PERIOD, "pixels")
+    bench.start()
+    dut.valid_in.value = 1
+    for r, g, b in rows:
+        dut.I_R.value, dut.I_G.value, dut.I_B.value = r, g, b
+        await FallingEdge(dut.clk)
+    dut.valid_in.value = 0
+    valid = fast_reader(dut.valid_out)
+    for latency in range(1000):
+        await FallingEdge(dut.clk)
+        if valid():
+            break
+    assert valid(), "no valid_out within 1000 cycles of the last training pixel"
+    # pixel 0 is the one whose mean and SD come out first
+    sums = frames[:, 0, 0].sum(axis=0)
+    expected = [(int(s) << 16) // n_frames for s in sums]
+    observed = [int(dut.E_R.value), int(dut.E_G.value), int(dut.E_B.value)]
+    assert observed == expected, f"pixel 0 mean {observed}, expected {expected}"
+    record = bench.stop(len(rows), drain_cycles=latency + 1)
+    dut._log.info(f"{record['throughput']:.3f} pixels/cycle, first output {latency + 1} cycles after training")
+
+
+def rmw_records(n_words, base=0):
+    """A read then a write of each of n_words consecutive words, as a replayable trace."""
+    records = np.zeros(2 * n_words, dtype=RECORD)
+    records["cycle"] = np.arange(2 * n_words)
+    records["cmd"][0::2] = CMD_READ
+    records["cmd"][1::2] = CMD_WRITE
+    records["addr"] = base + np.repeat(np.arange(n_words), 2) * UNITS_PER_WORD
+    records["data_lo"][1::2] = np.arange(n_words, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    records["data_hi"][1::2] = np.arange(n_words, dtype=np.uint64)
+    return records
+
+
+@cocotb.test()
+async def test_bench_dram_stream(dut):
+    """Read-modify-write of background-model words through MigDDR, issued as fast as app_rdy allows."""
+    random.seed(0)
+    await start_clock(dut.clk)
+    recorder = TraceRecorder(capacity=4 * DRAM_WORDS)
+    dram = MigDDR(dut, dut.clk, trace=recorder, verbose=False)
+    records = rmw_records(DRAM_WORDS)
+
+    bench = Measurement("dram_stream", CLK_PERIOD, "commands")
+    bench.start()
+    slip = await TraceReplayer(dut, dut.clk, records, timing="asap").run()
+    await ClockCycles(dut.clk, dram._read_cycles + 2, rising=False)
+    seen = recorder.records()
+    reads = int(np.count_nonzero(seen["cmd"] == CMD_READ))
+    assert reads == DRAM_WORDS, f"{reads} of {DRAM_WORDS} reads returned"
+    writes = records[records["cmd"] == CMD_WRITE]
+    for addr, lo, hi in zip(writes["addr"].tolist(), writes["data_lo"].tolist(), writes["data_hi"].tolist()):
+        assert dram.memory.get(addr // UNITS_PER_WORD) == (hi << 64) | lo, f"write to {addr:#x} lost"
+    record = bench.stop(2 * DRAM_WORDS, mean_slip=float(slip.mean()))
+    dut._log.info(f"{record['throughput']:.3f} commands/cycle, mean slip {record['mean_slip']:.2f} cycles")
+
+
+def lidar_frame(distance, strength, temperature):
+    """One 9-byte LiDAR frame: 0x59 0x59, three little-endian words and the byte-sum checksum."""
+    body = [0x59, 0x59] + [b for word in (distance, strength, temperature) for b in (word & 0xFF, word >> 8)]
+    return body + [sum(body) & 0xFF]
+
+
+async def uart_send(rx, clock, data, bit_cycles):
+    """8N1, LSB first, back to back."""
+    for byte in data:
+        for bit in [0] + [(byte >> i) & 1 for i in range(8)] + [1]:
+            rx.value = bit
+            await ClockCycles(clock, bit_cycles, rising=False)
+
+
+async def uart_collect(dut, received):
+    while True:
+        await RisingEdge(dut.new_data_out)
+        await ReadOnly()
+        received.append(int(dut.data_byte_out.value))
+
+
+@cocotb.test()
+async def test_bench_uart_burst(dut):
+    """Bursts of back-to-back LiDAR frames into uart_lidar_receive."""
+    bit_cycles = UART_CLOCK_HZ // UART_BAUD
+    await start_clock(dut.clk_in)
+    dut.rst_in.value = 1
+    dut.rx_wire_in.value = 1
+    dut.rst_frame_cnt.value = 0
+    await ClockCycles(dut.clk_in, 5, rising=False)
+    dut.rst_in.value = 0
+    await ClockCycles(dut.clk_in, bit_cycles, rising=False)
+    received = []
+    cocotb.start_soon(uart_collect(dut, received))
+    rng = np.random.default_rng(0)
+    sent = []
+
+    bench = Measurement("uart_burst", CLK_PERIOD, "bytes")
+    bench.start()
+    for _ in range(UART_BURSTS):
+        burst = [b for _ in range(UART_FRAMES)
+                 for b in lidar_frame(*rng.integers(0, 1 << 16, 3).tolist())]
+        await uart_send(dut.rx_wire_in, dut.clk_in, burst, bit_cycles)
+        sent += burst
+        # idle line between bursts, like the sensor between measurements
+        await ClockCycles(dut.clk_in, 10 * bit_cycles, rising=False)
+    assert received == sent, (f"received {len(received)} of {len(sent)} bytes, first difference at "
+                              f"{next((i for i, (a, b) in enumerate(zip(received, sent)) if a != b), len(received))}")
+    record = bench.stop(len(sent), bit_cycles=bit_cycles)
+    dut._log.info(f"{len(sent)} bytes, {record['cycles_per_second']:.0f} cycles/s")
+
+
+def sqrt_inputs(n_random, seed=0):
+    """Zero, powers of two and their neighbours, then random 32-bit words."""
+    powers = [1 << k for k in range(32)]
+    edges = sorted({v + d for v in powers for d in (-1, 0, 1) if 0 <= v + d < 1 << 32} | {0, (1 << 32) - 1})
+    rng = np.random.default_rng(seed)
+    return np.array(edges + rng.integers(0, 1 << 32, n_random, dtype=np.uint64).tolist(), dtype=np.uint64)
+
+
+@cocotb.test()
+async def test_bench_sqrt_sweep(dut):
+    """CordicSqrt back to back: a new start on the falling edge after each ready."""
+    await start_clock(dut.clk)
+    dut.rst.value = 1
+    dut.start.value = 0
+    dut.input_value.value = 0
+    await ClockCycles(dut.clk, 5, rising=False)
+    dut.rst.value = 0
+    values = sqrt_inputs(SQRT_RANDOM)
+    expected = cordic_sqrt(values)
+    ready = fast_reader(dut.ready)
+    out = fast_reader(dut.sqrt_out)
+    observed = np.empty(len(values), dtype=np.int64)
+
+    bench = Measurement("sqrt_sweep", CLK_PERIOD, "results")
+    bench.start()
+    for i, value in enumerate(values.tolist()):
+        dut.input_value.value = value
+        dut.start.value = 1
+        await FallingEdge(dut.clk)
+        dut.start.value = 0
+        while not ready():
+            await FallingEdge(dut.clk)
+        observed[i] = out()
+    bad = np.flatnonzero(observed != expected)
+    assert len(bad) == 0, (f"{len(bad)} of {len(values)} results differ from the model, first "
+                           f"sqrt({values[bad[0]]}) = {observed[bad[0]]}, expected {expected[bad[0]]}")
+    record = bench.stop(len(values))
+    dut._log.info(f"{record['throughput']:.4f} results/cycle ({1 / record['throughput']:.1f} cycles each)")
+
+
+# Runner function to build and run the test
+def is_runner():
+    """Benchmark suite: every workload, one simulator run each."""
+    result = run()
+    print(format_report(result))
+    print(f"saved {result['path']}")
+
+if __name__ == "__main__":
+    is_runner()
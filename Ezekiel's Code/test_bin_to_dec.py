@@ -0,0 +1,46 @@
+import cocotb
+import os
+import sys
+from pathlib import Path
+from cocotb.runner import get_runner
+from wave_window import WaveRunner
+from comb_sweep import exhaustive, run_sweep, bin_to_dec_model
+
+
+@cocotb.test()
+async def test_bin_to_dec_exhaustive(dut):
+    """Sweep all 65,536 inputs of bin_to_dec against the double-dabble model."""
+    stimulus = exhaustive(binary_in=16)
+    result = await run_sweep(dut, stimulus, bin_to_dec_model, ["bcd_out"])
+    assert result.mismatches == 0, f"{result.mismatches} of {result.vectors} vectors mismatched"
+
+
+# Runner function to build and run the test
+def is_runner():
+    """bin_to_dec Tester."""
+    hdl_toplevel_lang = os.getenv("HDL_TOPLEVEL_LANG", "verilog")
+    sim = os.getenv("SIM", "icarus")
+    proj_path = Path(__file__).resolve().parent.parent
+    sys.path.append(str(proj_path / "sim" / "model"))
+    sources = [proj_path / "hdl" / "bin_to_dec.sv"]
+    build_test_args = ["-Wall"]
+    parameters = {"INPUT_WIDTH": 16, "DECIMAL_DIGITS": 5}
+    sys.path.append(str(proj_path / "sim"))
+    runner = WaveRunner(get_runner(sim))
+    runner.build(
+        sources=sources,
+        hdl_toplevel="bin_to_dec",
+        always=True,
+        build_args=build_test_args,
+        parameters=parameters,
+        timescale=('1ns','1ps')
+    )
+    run_test_args = []
+    runner.test(
+        hdl_toplevel="bin_to_dec",
+        test_module="test_bin_to_dec",
+        test_args=run_test_args
+    )
+
+if __name__ == "__main__":
+    is_runner()
@@ -0,0 +1,244 @@
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import FallingEdge, ReadOnly, ClockCycles
+import numpy as np
+import os
+import sys
+import time
+from pathlib import Path
+from cocotb.runner import get_runner
+from wave_window import WaveRunner
+from bram_model import BramModel
+from comb_sweep import fast_reader
+
+
+DATA_WIDTH = 16
+BRAM_DEPTH = 4096
+BRAM_DELAY = 2
+N_LINES = 3000
+STREAM_CYCLES = 10000
+
+
+class RingBufferModel:
+    """
+    class RingBufferModel: what bram_interface should play back in generator mode
+
+    Stored lines come out in write order and wrap around forever; the BRAM
+    delay only decides whether the hardware uses GENERATOR_MODE (more lines
+    than its prefetch buffer) or SIMPLE_MODE (the whole set fits in it).
+    """
+
+    def __init__(self, buff_len):
+        self.buff_len = buff_len
+        self.lines = []
+        self.position = 0
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def clear(self):
+        self.lines = []
+        self.position = 0
+
+    @property
+    def mode(self):
+        if not self.lines:
+            return "error"
+        return "generator" if len(self.lines) > self.buff_len else "simple"
+
+    def take(self, n):
+        """The next n (addresses, lines) a consumer pulling `next` should see."""
+        addrs = (self.position + np.arange(n)) % len(self.lines)
+        self.position = (self.position + n) % len(self.lines)
+        return addrs, np.asarray(self.lines, dtype=np.uint64)[addrs]
+
+
+async def reset(dut):
+    dut.rst.value = 1
+    dut.addr.value = 0
+    dut.line_in.value = 0
+    dut.we.value = 0
+    dut.en.value = 0
+    dut.generator_mode.value = 0
+    dut.clr_bram.value = 0
+    dut.next.value = 0
+    await ClockCycles(dut.clk, 3)
+    await FallingEdge(dut.clk)
+    dut.rst.value = 0
+
+
+async def write_lines(dut, lines):
+    """WRITE_MODE: one line per clock at consecutive addresses."""
+    dut.en.value = 1
+    dut.we.value = 1
+    for i, line in enumerate(lines):
+        dut.addr.value = i
+        dut.line_in.value = int(line)
+        await ReadOnly()
+        assert dut.write_rdy.value == 1, f"write_rdy dropped at line {i}"
+        await FallingEdge(dut.clk)
+    dut.en.value = 0
+    dut.we.value = 0
+
+
+async def stream(dut, pulls):
+    """
+    Drive `next` from the boolean array `pulls`, one entry per clock.
+
+    Returns (addresses, lines) of every line consumed, i.e. every cycle with
+    valid_line_out and next both high.
+    """
+    valid = fast_reader(dut.valid_line_out)
+    line_out = fast_reader(dut.line_out)
+    gen_addr = fast_reader(dut.generator_addr)
+    addrs = np.empty(len(pulls), dtype=np.int64)
+    lines = np.empty(len(pulls), dtype=np.uint64)
+    taken = np.zeros(len(pulls), dtype=bool)
+    for i, pull in enumerate(pulls.tolist()):
+        dut.next.value = int(pull)
+        await ReadOnly()
+        taken[i] = pull and valid()
+        addrs[i] = gen_addr()
+        lines[i] = line_out()
+        await FallingEdge(dut.clk)
+    dut.next.value = 0
+    return addrs[taken], lines[taken]
+
+
+async def enter_generator(dut, limit=50):
+    """Raise generator_mode and wait for valid_line_out; returns the cycles it took."""
+    dut.generator_mode.value = 1
+    for cycle in range(limit):
+        await ReadOnly()
+        if dut.valid_line_out.value == 1:
+            await FallingEdge(dut.clk)
+            return cycle
+        await FallingEdge(dut.clk)
+    return None
+
+
+def check_stream(dut, name, model, addrs, lines):
+    exp_addrs, exp_lines = model.take(len(addrs))
+    bad = np.flatnonzero((addrs != exp_addrs) | (lines != exp_lines))
+    assert len(bad) == 0, (f"{name}: {len(bad)} wrong lines, first at pull {bad[0]}: "
+                           f"addr {addrs[bad[0]]} line {lines[bad[0]]:#x}, "
+                           f"expected addr {exp_addrs[bad[0]]} line {exp_lines[bad[0]]:#x}")
+
+
+@cocotb.test()
+async def test_generator_stream(dut):
+    """Write thousands of lines, then stream them back at one line per clock in GENERATOR_MODE."""
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    bram = BramModel(dut.bram, dut.clk, latency=BRAM_DELAY, depth=BRAM_DEPTH, width=DATA_WIDTH)
+    cocotb.start_soon(bram.run())
+    await reset(dut)
+
+    rng = np.random.default_rng(37)
+    data = rng.integers(0, 1 << DATA_WIDTH, N_LINES, dtype=np.uint64)
+    model = RingBufferModel(BRAM_DELAY + 1)
+    for line in data:
+        model.write(line)
+    assert model.mode == "generator"
+
+    await write_lines(dut, data)
+    assert int(dut.lines_stored.value) == N_LINES, f"lines_stored = {int(dut.lines_stored.value)}"
+    assert (bram.contents(0, N_LINES) == data).all(), "BRAM contents differ from the written lines"
+
+    fill = await enter_generator(dut)
+    assert fill is not None, "valid_line_out never rose"
+    dut._log.info(f"GENERATOR_MODE valid after {fill} cycles")
+
+    start = time.perf_counter()
+    addrs, lines = await stream(dut, np.ones(STREAM_CYCLES, dtype=bool))
+    seconds = time.perf_counter() - start
+    check_stream(dut, "full rate", model, addrs, lines)
+    rate = len(lines) / STREAM_CYCLES
+    dut._log.info(f"Sustained {rate:.4f} lines/clock over {STREAM_CYCLES} cycles "
+                  f"({len(lines) / seconds:.0f} lines/s simulated)")
+    assert rate == 1.0, f"generator fell below one line per clock ({rate:.4f})"
+
+    # a bursty consumer must see the same order with no skipped or repeated lines
+    pulls = rng.random(STREAM_CYCLES // 4) < 0.5
+    addrs, lines = await stream(dut, pulls)
+    check_stream(dut, "throttled", model, addrs, lines)
+    assert len(lines) == pulls.sum(), f"{pulls.sum() - len(lines)} pulls were not served"
+
+    # clr_bram empties the store and hands control back to WRITE_MODE
+    dut.clr_bram.value = 1
+    dut.generator_mode.value = 0
+    await ClockCycles(dut.clk, 3)
+    await FallingEdge(dut.clk)
+    dut.clr_bram.value = 0
+    await ReadOnly()
+    assert int(dut.lines_stored.value) == 0, "clr_bram left lines stored"
+    assert dut.write_rdy.value == 1, "not back in WRITE_MODE after clr_bram"
+    assert not bram.collisions, f"BRAM collisions: {bram.collisions[:10]}"
+
+
+@cocotb.test()
+async def test_simple_mode(dut):
+    """A store no longer than the prefetch buffer plays back from the buffer in SIMPLE_MODE."""
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    bram = BramModel(dut.bram, dut.clk, latency=BRAM_DELAY, depth=BRAM_DEPTH, width=DATA_WIDTH)
+    cocotb.start_soon(bram.run())
+    await reset(dut)
+
+    # with nothing stored the interface must never claim a valid line
+    assert await enter_generator(dut, limit=20) is None, "valid_line_out with no lines stored"
+    assert int(dut.line_out.value) == 0
+    dut.generator_mode.value = 0
+    await ClockCycles(dut.clk, 3)
+    await FallingEdge(dut.clk)
+
+    model = RingBufferModel(BRAM_DELAY + 1)
+    for n_lines in range(1, BRAM_DELAY + 2):
+        data = np.arange(1, n_lines + 1, dtype=np.uint64) * 0x1111
+        model.clear()
+        for line in data:
+            model.write(line)
+        assert model.mode == "simple"
+        await write_lines(dut, data)
+        assert await enter_generator(dut) is not None, f"valid_line_out never rose with {n_lines} lines"
+        addrs, lines = await stream(dut, np.ones(STREAM_CYCLES // 10, dtype=bool))
+        check_stream(dut, f"{n_lines} lines", model, addrs, lines)
+        assert len(lines) == STREAM_CYCLES // 10
+        dut._log.info(f"SIMPLE_MODE with {n_lines} lines: 1 line/clock")
+
+        dut.clr_bram.value = 1
+        dut.generator_mode.value = 0
+        await ClockCycles(dut.clk, 3)
+        await FallingEdge(dut.clk)
+        dut.clr_bram.value = 0
+    assert not bram.collisions, f"BRAM collisions: {bram.collisions[:10]}"
+
+
+# Runner function to build and run the test
+def is_runner():
+    """bram_interface Tester."""
+    hdl_toplevel_lang = os.getenv("HDL_TOPLEVEL_LANG", "verilog")
+    sim = os.getenv("SIM", "icarus")
+    proj_path = Path(__file__).resolve().parent.parent
+    sys.path.append(str(proj_path / "sim" / "model"))
+    # bram_stub.sv stands in for the vendor BRAM; bram_model.BramModel supplies its behaviour
+    sources = [proj_path / "hdl" / "bram_stub.sv", proj_path / "hdl" / "bram_interface.sv"]
+    build_test_args = ["-Wall"]
+    parameters = {"DATA_WIDTH": DATA_WIDTH, "BRAM_DEPTH": BRAM_DEPTH, "BRAM_DELAY": BRAM_DELAY}
+    sys.path.append(str(proj_path / "sim"))
+    runner = WaveRunner(get_runner(sim))
+    runner.build(
+        sources=sources,
+        hdl_toplevel="bram_interface",
+        always=True,
+        build_args=build_test_args,
+        parameters=parameters,
+        timescale=('1ns','1ps')
+    )
+    run_test_args = []
+    runner.test(
+        hdl_toplevel="bram_interface",
+        test_module="test_bram_interface",
+        test_args=run_test_args
+    )
+
+if __name__ == "__main__":
+    is_runner()
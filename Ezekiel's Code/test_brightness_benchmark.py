@@ -0,0 +1,239 @@
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import FallingEdge, ClockCycles
+import numpy as np
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from cocotb.runner import get_runner
+from comb_sweep import fast_reader
+from pixel_models import brightness_distortion2, to_signed
+from scenes import rgb_scene_frames
+
+
+VARIANTS = ["BrightnessDistortion", "BrightnessDistortion2"]
+CHANNELS = ("R", "G", "B")
+N_VECTORS = 2000
+MAX_CYCLES = 8000
+II_CANDIDATES = [1, 2, 4, 8, 12, 16, 17, 18, 19, 20, 21, 22, 24, 32]
+ENV_VAR = "BRIGHTNESS_BENCH_DIR"
+
+
+def scene_stimulus(n, seed=0, width=64, height=48):
+    """
+    Pixels from a synthetic scene with moving objects and shadows, with E and
+    sigma trained on background-only frames of the same scene. Both variants
+    get exactly these arrays, (n, 3) each.
+    """
+    training = np.stack(list(rgb_scene_frames(16, width, height, n_blobs=0, seed=seed))).astype(np.float64)
+    E = np.floor(training.mean(axis=0)).astype(np.int64).reshape(-1, 3)
+    sigma = np.floor(training.std(axis=0)).astype(np.int64).reshape(-1, 3)
+    n_frames = -(-n // (width * height))
+    frames = rgb_scene_frames(n_frames, width, height, n_blobs=2, radius=(5, 12), speed=3.0, seed=seed)
+    I = np.concatenate([frame.reshape(-1, 3).astype(np.int64) for frame in frames])[:n]
+    reps = -(-n // len(E))
+    return I, np.tile(E, (reps, 1))[:n], np.tile(sigma, (reps, 1))[:n]
+
+
+def ideal(I, E, sigma):
+    """Real-valued alpha and SD_alpha in Q16.16 LSBs, with the HDL's zero-sigma guard."""
+    safe = np.where(sigma == 0, 1, sigma).astype(np.float64)
+    N = (I * E / safe).sum(axis=-1)
+    D = (E * E.astype(np.float64) / safe).sum(axis=-1)
+    alpha = np.where(D > 0, N / np.where(D > 0, D, 1), 0) * (1 << 16)
+    sd_alpha = np.sqrt((safe * safe).sum(axis=-1) / 3) * (1 << 16)
+    return alpha, sd_alpha
+
+
+async def reset(dut):
+    dut.rst.value = 1
+    dut.valid_in.value = 0
+    for prefix in ("I", "E", "sigma"):
+        for c in CHANNELS:
+            getattr(dut, f"{prefix}_{c}").value = 0
+    await ClockCycles(dut.clk, 5)
+    await FallingEdge(dut.clk)
+    dut.rst.value = 0
+
+
+async def run_stream(dut, I, E, sigma, ii, latency=None, drain=64):
+    """
+    Offer a new vector every `ii` cycles (valid_in on its first cycle, inputs
+    held until the next one) and record every valid_out.
+
+    Returns (output cycles, alpha, SD_alpha or None, cycles run). Cycles are
+    counted in falling edges from the first vector, and outputs are read on
+    the falling edge after the rising edge that produced them.
+    """
+    has_sd = hasattr(dut, "SD_alpha")
+    handles = [getattr(dut, f"{prefix}_{c}") for prefix in ("I", "E", "sigma") for c in CHANNELS]
+    rows = np.concatenate([I, E, sigma], axis=1).tolist()
+    valid = fast_reader(dut.valid_out)
+    alpha = fast_reader(dut.alpha)
+    sd = fast_reader(dut.SD_alpha) if has_sd else None
+    n_cycles = len(rows) * ii + (latency if latency is not None else 0) + drain
+    out_cycles, alphas, sds = [], [], []
+    for t in range(n_cycles):
+        await FallingEdge(dut.clk)
+        if t and valid():
+            out_cycles.append(t)
+            alphas.append(alpha())
+            sds.append(sd() if has_sd else 0)
+        index, phase = divmod(t, ii)
+        if phase == 0 and index < len(rows):
+            for handle, value in zip(handles, rows[index]):
+                handle.value = value
+            dut.valid_in.value = 1
+        else:
+            dut.valid_in.value = 0
+    return (np.array(out_cycles, dtype=np.int64), to_signed(np.array(alphas, dtype=np.int64), 32),
+            np.array(sds, dtype=np.int64) if has_sd else None, n_cycles)
+
+
+def score(out_cycles, alpha, sd_alpha, I, E, sigma, ii, latency, cycles):
+    """Line outputs up with the vector issued `latency` cycles earlier and compare with the models."""
+    golden_alpha, golden_sd = brightness_distortion2(I, E, sigma)
+    ideal_alpha, ideal_sd = ideal(I, E, sigma)
+    issued = out_cycles - latency
+    aligned = (issued >= 0) & (issued % ii == 0) & (issued // ii < len(I))
+    index = issued[aligned] // ii
+    exact = alpha[aligned] == golden_alpha[index]
+    if sd_alpha is not None:
+        exact &= sd_alpha[aligned] == golden_sd[index]
+    correct = np.unique(index[exact])
+    result = {
+        "ii": ii,
+        "vectors": len(I),
+        "cycles": cycles,
+        "outputs": len(out_cycles),
+        "served": len(np.unique(index)),
+        "exact": len(correct),
+        "pixels_per_cycle": len(correct) / cycles,
+    }
+    if len(correct):
+        result["alpha_max_err"] = float(np.abs(golden_alpha[correct] - ideal_alpha[correct]).max())
+        result["alpha_mean_err"] = float(np.abs(golden_alpha[correct] - ideal_alpha[correct]).mean())
+        if sd_alpha is not None:
+            result["sd_max_err"] = float(np.abs(golden_sd[correct] - ideal_sd[correct]).max())
+    return result
+
+
+@cocotb.test()
+async def test_brightness_benchmark(dut):
+    """Latency, initiation interval, sustained rate and accuracy of one brightness variant."""
+    variant = dut._name
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    await reset(dut)
+    I, E, sigma = scene_stimulus(N_VECTORS)
+
+    # latency: one isolated vector, then idle until valid_out
+    out_cycles, _, _, _ = await run_stream(dut, I[:1], E[:1], sigma[:1], ii=1, drain=100)
+    assert len(out_cycles), f"{variant}: no valid_out within 100 cycles"
+    latency = int(out_cycles[0])
+    dut._log.info(f"{variant}: latency {latency} cycles")
+
+    runs = []
+    start = time.perf_counter()
+    for ii in II_CANDIDATES:
+        n = min(N_VECTORS, MAX_CYCLES // ii)
+        await reset(dut)
+        stream = await run_stream(dut, I[:n], E[:n], sigma[:n], ii, latency)
+        result = score(*stream[:3], I[:n], E[:n], sigma[:n], ii, latency, stream[3])
+        runs.append(result)
+        dut._log.info(f"{variant} II={ii}: {result['outputs']} outputs for {n} vectors, "
+                      f"{result['exact']} exact, {result['pixels_per_cycle']:.3f} pixels/cycle")
+        if result["exact"] == n:
+            break
+    seconds = time.perf_counter() - start
+
+    passing = [run for run in runs if run["exact"] == run["vectors"]]
+    summary = {
+        "variant": variant,
+        "latency": latency,
+        "ii": passing[0]["ii"] if passing else None,
+        "max_pixels_per_cycle": 1 / passing[0]["ii"] if passing else 0.0,
+        "full_rate": runs[0],
+        "runs": runs,
+        "sim_seconds": seconds,
+    }
+    out_dir = Path(os.getenv(ENV_VAR, "."))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with open(out_dir / f"{variant}.json", "w") as f:
+        json.dump(summary, f, indent=1)
+    assert passing, f"{variant} never produced every vector exactly, up to II={II_CANDIDATES[-1]}"
+
+
+def format_side_by_side(results):
+    """Text table with one column per variant."""
+    names = [r["variant"] for r in results]
+    rows = [
+        ("latency (cycles)", lambda r: r["latency"]),
+        ("initiation interval", lambda r: r["ii"]),
+        ("max sustained pixels/cycle", lambda r: f"{r['max_pixels_per_cycle']:.3f}"),
+        ("full rate: outputs/vectors", lambda r: f"{r['full_rate']['outputs']}/{r['full_rate']['vectors']}"),
+        ("full rate: exact outputs", lambda r: r["full_rate"]["exact"]),
+        ("full rate: good pixels/cycle", lambda r: f"{r['full_rate']['pixels_per_cycle']:.3f}"),
+        ("alpha max |err| vs real (LSB)", lambda r: _best(r, "alpha_max_err")),
+        ("alpha mean |err| vs real (LSB)", lambda r: _best(r, "alpha_mean_err")),
+        ("SD_alpha max |err| vs real (LSB)", lambda r: _best(r, "sd_max_err")),
+    ]
+    width = max(len(n) for n in names) + 2
+    lines = [f"{'':<34}" + "".join(f"{n:>{width}}" for n in names)]
+    for label, get in rows:
+        lines.append(f"{label:<34}" + "".join(f"{str(get(r)):>{width}}" for r in results))
+    return "\n".join(lines)
+
+
+def _best(result, key):
+    values = [run[key] for run in result["runs"] if key in run]
+    return f"{values[-1]:.2f}" if values else "-"
+
+
+# Runner function to build and run the test
+def is_runner():
+    """Brightness variant benchmark."""
+    hdl_toplevel_lang = os.getenv("HDL_TOPLEVEL_LANG", "verilog")
+    sim = os.getenv("SIM", "icarus")
+    proj_path = Path(__file__).resolve().parent.parent
+    sys.path.append(str(proj_path / "sim" / "model"))
+    sources = [
+        proj_path / "hdl" / "brightness_distortion.sv",
+        proj_path / "hdl" / "brightness_distortion2.sv",
+        proj_path / "hdl" / "cordic_sqrt.sv",
+    ]
+    build_test_args = ["-Wall"]
+    parameters = {}
+    sys.path.append(str(proj_path / "sim"))
+    results_dir = proj_path / "sim_build" / "brightness_benchmark"
+    runner = get_runner(sim)
+    for variant in VARIANTS:
+        build_dir = proj_path / "sim_build" / variant
+        runner.build(
+            sources=sources,
+            hdl_toplevel=variant,
+            always=True,
+            build_args=build_test_args,
+            parameters=parameters,
+            timescale=('1ns','1ps'),
+            build_dir=build_dir,
+            waves=False
+        )
+        run_test_args = []
+        runner.test(
+            hdl_toplevel=variant,
+            test_module="test_brightness_benchmark",
+            test_args=run_test_args,
+            build_dir=build_dir,
+            extra_env={ENV_VAR: str(results_dir)},
+            waves=False
+        )
+    results = []
+    for variant in VARIANTS:
+        with open(results_dir / f"{variant}.json") as f:
+            results.append(json.load(f))
+    print(format_side_by_side(results))
+
+if __name__ == "__main__":
+    is_runner()
@@ -1,6 +1,6 @@
 import cocotb
 from cocotb.clock import Clock
-from cocotb.triggers import RisingEdge, ClockCycles, ReadOnly
+from cocotb.triggers import RisingEdge, FallingEdge, ClockCycles, ReadOnly
 import numpy as np
 import math
 from cocotb.binary import BinaryValue
@@ -8,6 +8,11 @@ import os
 import sys
 from pathlib import Path
 from cocotb.runner import get_runner
+from wave_window import WaveRunner, WaveWindow
+from comb_sweep import fast_reader
+from distortion_coverage import CHANNELS, generator
+from func_coverage import save_run
+from pixel_models import brightness_distortion, to_signed
 
 
 
@@ -118,6 +123,58 @@ async def test_brightness_distortion(dut):
 
     dut._log.info("All test cases passed!")
 
+COVERAGE_BATCH = 256
+COVERAGE_BUDGET = 20000
+
+
+@cocotb.test()
+async def test_brightness_distortion_coverage(dut):
+    """Close the brightness covergroup at one vector per clock (alpha is two edges behind the inputs)."""
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    names = [f"{prefix}_{c}" for prefix in ("I", "E", "sigma") for c in CHANNELS]
+    dut.rst.value = 1
+    dut.valid_in.value = 0
+    for name in names:
+        getattr(dut, name).value = 0
+    await ClockCycles(dut.clk, 5)
+    dut.rst.value = 0
+    dut.valid_in.value = 1
+
+    seed = cocotb.RANDOM_SEED
+    group, sample_fn, stimulus = generator("brightness", seed)
+    handles = [getattr(dut, name) for name in names]
+    read = fast_reader(dut.alpha)
+    windows = WaveWindow(dut.clk, 10, dut._log)
+    mismatches = 0
+    while group.holes() and group.vectors < COVERAGE_BUDGET:
+        batch = stimulus.next_batch(COVERAGE_BATCH)
+        rows = list(zip(*(batch[name].tolist() for name in names)))
+        observed = np.empty(len(rows), dtype=np.int64)
+        start = windows.cycle()
+        for t in range(len(rows) + 2):
+            await FallingEdge(dut.clk)
+            if t >= 2:
+                observed[t - 2] = read()
+            if t < len(rows):
+                for handle, value in zip(handles, rows[t]):
+                    handle.value = value
+        observed = to_signed(observed, 32)
+        I, E, sigma = (np.stack([batch[f"{p}_{c}"] for c in CHANNELS], axis=-1) for p in ("I", "E", "sigma"))
+        expected = brightness_distortion(I, E, sigma)
+        bad = np.flatnonzero(observed != expected)
+        for i in bad[:10]:
+            dut._log.error(f"I={I[i].tolist()} E={E[i].tolist()} sigma={sigma[i].tolist()}: "
+                           f"alpha {observed[i]}, expected {expected[i]}")
+        for i in bad:
+            windows.mismatch(start + i + 2, f"alpha {observed[i]}, expected {expected[i]}")
+        mismatches += len(bad)
+        group.sample(sample_fn(batch, observed))
+
+    dut._log.info(f"Coverage saved to {save_run(group, seed)}\n{group.report()}")
+    assert mismatches == 0, f"{mismatches} wrong alpha values"
+    assert not group.holes(), f"coverage not closed in {group.vectors} vectors: {group.holes()}"
+
+
 # Runner function to build and run the test
 def is_runner():
     """brightnessModelDRAM Tester."""
@@ -132,22 +189,20 @@ def is_runner():
     build_test_args = ["-Wall"]
     parameters = {}
     sys.path.append(str(proj_path / "sim"))
-    runner = get_runner(sim)
+    runner = WaveRunner(get_runner(sim))
     runner.build(
         sources=sources,
         hdl_toplevel="BrightnessDistortion",
         always=True,
         build_args=build_test_args,
         parameters=parameters,
-        timescale=('1ns','1ps'),
-        waves=True
+        timescale=('1ns','1ps')
     )
     run_test_args = []
     runner.test(
         hdl_toplevel="BrightnessDistortion",
         test_module="test_brightness_distortion",
-        test_args=run_test_args,
-        waves=True
+        test_args=run_test_args
     )
 
 if __name__ == "__main__":
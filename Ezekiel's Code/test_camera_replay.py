@@ -0,0 +1,96 @@
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import ClockCycles
+import numpy as np
+import os
+import sys
+import tempfile
+from pathlib import Path
+from cocotb.runner import get_runner
+from wave_window import WaveRunner
+from camera_replay import CameraReplay, CameraTiming, PixelMonitor, pixel_reconstruct_ports, pixel_reconstruct_outputs
+from frame_packing import rgb_to_565
+from scenes import rgb_scene_frames
+
+
+CLK_PERIOD = 5  # clk_camera, 200 MHz
+WIDTH = 64
+HEIGHT = 12
+N_FRAMES = 3
+# short blanking keeps the run small; the byte timing within a line is the camera's
+TIMING = CameraTiming(pclk_hz=50_000_000, h_blank=40, v_blank=2)
+
+
+async def reset(dut):
+    cocotb.start_soon(Clock(dut.clk_in, CLK_PERIOD, units="ns").start())
+    dut.rst_in.value = 1
+    await ClockCycles(dut.clk_in, 5)
+    dut.rst_in.value = 0
+
+
+@cocotb.test()
+async def test_replay_raw_file(dut):
+    """Frames memory mapped from a raw RGB888 file come out of pixel_reconstruct pixel for pixel."""
+    frames = np.stack(list(rgb_scene_frames(N_FRAMES, WIDTH, HEIGHT, n_blobs=2, radius=(2, 5), seed=3)))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "scene.rgb"
+        frames.tofile(path)
+        replay = CameraReplay(**pixel_reconstruct_ports(dut), source=path, width=WIDTH, height=HEIGHT,
+                              timing=TIMING)
+        monitor = PixelMonitor(dut.clk_in, **pixel_reconstruct_outputs(dut), replay=replay, keep=True)
+        await reset(dut)
+        sent = await replay.play()
+    assert sent == N_FRAMES, f"{sent} of {N_FRAMES} frames replayed"
+    await monitor.wait_frames(N_FRAMES)
+    assert not monitor.errors, f"(pixel, expected (h, v, data), got): {monitor.errors}"
+    for index, captured in enumerate(monitor.captured):
+        assert (captured == rgb_to_565(frames[index])).all(), f"frame {index} differs"
+    for t in monitor.frame_times:
+        dut._log.info(f"frame {t.index}: {t.pixels} pixels in {t.last_ns - t.first_ns:.0f} ns "
+                      f"(bus frame period {replay.frame_period_ns():.0f} ns)")
+
+
+@cocotb.test()
+async def test_replay_565_frames(dut):
+    """An iterable of RGB565 frames, extreme values included, with back-to-back frames."""
+    rng = np.random.default_rng(7)
+    frames = [rng.integers(0, 1 << 16, (HEIGHT, WIDTH), dtype=np.uint16) for _ in range(2)]
+    frames[0][0, :2] = (0x0000, 0xFFFF)
+    replay = CameraReplay(**pixel_reconstruct_ports(dut), source=iter(frames), width=WIDTH, height=HEIGHT,
+                          timing=TIMING._replace(v_blank=0))
+    monitor = PixelMonitor(dut.clk_in, **pixel_reconstruct_outputs(dut), replay=replay)
+    await reset(dut)
+    await replay.play(count=2)
+    await monitor.wait_frames(2)
+    assert not monitor.errors, f"(pixel, expected (h, v, data), got): {monitor.errors}"
+
+
+# Runner function to build and run the test
+def is_runner():
+    """pixel_reconstruct camera replay Tester."""
+    hdl_toplevel_lang = os.getenv("HDL_TOPLEVEL_LANG", "verilog")
+    sim = os.getenv("SIM", "icarus")
+    proj_path = Path(__file__).resolve().parent.parent
+    sys.path.append(str(proj_path / "sim" / "model"))
+    sources = [proj_path / "hdl" / "pixel_reconstruct.sv"]
+    build_test_args = ["-Wall"]
+    parameters = {}
+    sys.path.append(str(proj_path / "sim"))
+    runner = WaveRunner(get_runner(sim))
+    runner.build(
+        sources=sources,
+        hdl_toplevel="pixel_reconstruct",
+        always=True,
+        build_args=build_test_args,
+        parameters=parameters,
+        timescale=('1ns','1ps')
+    )
+    run_test_args = []
+    runner.test(
+        hdl_toplevel="pixel_reconstruct",
+        test_module="test_camera_replay",
+        test_args=run_test_args
+    )
+
+if __name__ == "__main__":
+    is_runner()
@@ -0,0 +1,55 @@
+import cocotb
+import numpy as np
+import os
+import sys
+from pathlib import Path
+from cocotb.runner import get_runner
+from wave_window import WaveRunner
+from comb_sweep import exhaustive, run_sweep, check_sum_model
+
+
+@cocotb.test()
+async def test_check_sum_sweep(dut):
+    """Cover every (frame1_data, checksum) pair with randomized remaining fields."""
+    # The full input space is 72 bits, but checksum_valid only depends on the
+    # low byte of the field sum, so sweeping frame1_data against checksum
+    # exhaustively reaches every (sum residue, checksum) combination.
+    stimulus = exhaustive(frame1_data=8, checksum=8)
+    n = len(stimulus["checksum"])
+    rng = np.random.default_rng(0)
+    stimulus["frame2_data"] = rng.integers(0, 1 << 8, n, dtype=np.uint64)
+    for name in ("distance", "strength", "temperature"):
+        stimulus[name] = rng.integers(0, 1 << 16, n, dtype=np.uint64)
+    result = await run_sweep(dut, stimulus, check_sum_model, ["checksum_valid"])
+    assert result.mismatches == 0, f"{result.mismatches} of {result.vectors} vectors mismatched"
+
+
+# Runner function to build and run the test
+def is_runner():
+    """check_sum Tester."""
+    hdl_toplevel_lang = os.getenv("HDL_TOPLEVEL_LANG", "verilog")
+    sim = os.getenv("SIM", "icarus")
+    proj_path = Path(__file__).resolve().parent.parent
+    sys.path.append(str(proj_path / "sim" / "model"))
+    sources = [proj_path / "hdl" / "check_sum.sv"]
+    build_test_args = ["-Wall"]
+    parameters = {}
+    sys.path.append(str(proj_path / "sim"))
+    runner = WaveRunner(get_runner(sim))
+    runner.build(
+        sources=sources,
+        hdl_toplevel="check_sum",
+        always=True,
+        build_args=build_test_args,
+        parameters=parameters,
+        timescale=('1ns','1ps')
+    )
+    run_test_args = []
+    runner.test(
+        hdl_toplevel="check_sum",
+        test_module="test_check_sum",
+        test_args=run_test_args
+    )
+
+if __name__ == "__main__":
+    is_runner()
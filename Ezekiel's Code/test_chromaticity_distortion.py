@@ -1,6 +1,6 @@
 import cocotb
 from cocotb.clock import Clock
-from cocotb.triggers import RisingEdge, ClockCycles, ReadOnly
+from cocotb.triggers import RisingEdge, FallingEdge, ClockCycles, ReadOnly
 import numpy as np
 import math
 from cocotb.binary import BinaryValue
@@ -8,6 +8,10 @@ import os
 import sys
 from pathlib import Path
 from cocotb.runner import get_runner
+from wave_window import WaveRunner, WaveWindow
+from distortion_coverage import CHANNELS, generator
+from func_coverage import save_run
+from pixel_models import chromaticity_distortion
 
 
 
@@ -171,6 +175,64 @@ async def test_chromaticity_distortion(dut):
 
 
 
+COVERAGE_BATCH = 64
+COVERAGE_BUDGET = 2000
+
+
+@cocotb.test()
+async def test_chromaticity_distortion_coverage(dut):
+    """Close the chromaticity covergroup; the iterative square root takes one vector at a time."""
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    names = [f"{prefix}_{c}" for prefix in ("I", "E") for c in CHANNELS] + ["alpha"]
+    dut.rst.value = 1
+    dut.valid_in.value = 0
+    for name in names:
+        getattr(dut, name).value = 0
+    await ClockCycles(dut.clk, 5)
+    dut.rst.value = 0
+
+    seed = cocotb.RANDOM_SEED
+    group, sample_fn, stimulus = generator("chromaticity", seed)
+    handles = [getattr(dut, name) for name in names]
+    windows = WaveWindow(dut.clk, 10, dut._log)
+    mismatches = 0
+    while group.holes() and group.vectors < COVERAGE_BUDGET:
+        batch = stimulus.next_batch(COVERAGE_BATCH)
+        rows = list(zip(*(batch[name].tolist() for name in names)))
+        observed = np.empty(len(rows), dtype=np.int64)
+        done = np.empty(len(rows), dtype=np.int64)
+        for t, row in enumerate(rows):
+            await FallingEdge(dut.clk)
+            for handle, value in zip(handles, row):
+                handle.value = value
+            # same protocol as the directed test: hold for five cycles, then wait for the sqrt
+            dut.valid_in.value = 1
+            await ClockCycles(dut.clk, 5)
+            dut.valid_in.value = 0
+            for _ in range(64):
+                await RisingEdge(dut.clk)
+                if dut.valid_out.value == 1:
+                    break
+            else:
+                assert False, f"valid_out never rose for vector {t}"
+            observed[t] = dut.CD.value.integer
+            done[t] = windows.cycle()
+        I, E = (np.stack([batch[f"{p}_{c}"] for c in CHANNELS], axis=-1) for p in ("I", "E"))
+        expected = chromaticity_distortion(I, E, batch["alpha"])
+        bad = np.flatnonzero(observed != expected)
+        for i in bad[:10]:
+            dut._log.error(f"I={I[i].tolist()} E={E[i].tolist()} alpha={batch['alpha'][i]}: "
+                           f"CD {observed[i]}, expected {expected[i]}")
+        for i in bad:
+            windows.mismatch(done[i], f"CD {observed[i]}, expected {expected[i]}")
+        mismatches += len(bad)
+        group.sample(sample_fn(batch, observed))
+
+    dut._log.info(f"Coverage saved to {save_run(group, seed)}\n{group.report()}")
+    assert mismatches == 0, f"{mismatches} wrong CD values"
+    assert not group.holes(), f"coverage not closed in {group.vectors} vectors: {group.holes()}"
+
+
 # Runner function to build and run the test
 def is_runner():
     """BackgroundModelDRAM Tester."""
@@ -185,22 +247,20 @@ def is_runner():
     build_test_args = ["-Wall"]
     parameters = {}
     sys.path.append(str(proj_path / "sim"))
-    runner = get_runner(sim)
+    runner = WaveRunner(get_runner(sim))
     runner.build(
         sources=sources,
         hdl_toplevel="ChromaticityDistortionTest",
         always=True,
         build_args=build_test_args,
         parameters=parameters,
-        timescale=('1ns','1ps'),
-        waves=True
+        timescale=('1ns','1ps')
     )
     run_test_args = []
     runner.test(
         hdl_toplevel="ChromaticityDistortionTest",
         test_module="test_chromaticity_distortion",
-        test_args=run_test_args,
-        waves=True
+        test_args=run_test_args
     )
 
 if __name__ == "__main__":
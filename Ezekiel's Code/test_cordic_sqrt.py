@@ -7,6 +7,7 @@ import os
 import sys
 from pathlib import Path
 from cocotb.runner import get_runner
+from wave_window import WaveRunner
 
 
 @cocotb.test()
@@ -111,22 +112,20 @@ def is_runner():
     build_test_args = ["-Wall"]
     parameters = {}
     sys.path.append(str(proj_path / "sim"))
-    runner = get_runner(sim)
+    runner = WaveRunner(get_runner(sim))
     runner.build(
         sources=sources,
         hdl_toplevel="CordicSqrt",
         always=True,
         build_args=build_test_args,
         parameters=parameters,
-        timescale=('1ns','1ps'),
-        waves=True
+        timescale=('1ns','1ps')
     )
     run_test_args = []
     runner.test(
         hdl_toplevel="CordicSqrt",
         test_module="test_cordic_sqrt",
-        test_args=run_test_args,
-        waves=True
+        test_args=run_test_args
     )
 
 if __name__ == "__main__":
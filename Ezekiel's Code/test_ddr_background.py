@@ -4,14 +4,17 @@ from cocotb.triggers import RisingEdge, Timer, ReadOnly
 import numpy as np
 import math
 from MigDDR import MigDDR
+from cocotb_profiler import profile_test
 from pathlib import Path
 import os
 import sys
 from cocotb.runner import get_runner
+from wave_window import WaveRunner
 
 
 
 @cocotb.test()
+@profile_test
 async def test_combined_background_model(dut):
     """Revised Test CombinedBackgroundModel with DRAM simulation."""
 
@@ -195,22 +198,20 @@ def is_runner():
     build_test_args = ["-Wall"]
     parameters = {}
     sys.path.append(str(proj_path / "sim"))
-    runner = get_runner(sim)
+    runner = WaveRunner(get_runner(sim))
     runner.build(
         sources=sources,
         hdl_toplevel="CombinedBackgroundModel",
         always=True,
         build_args=build_test_args,
         parameters=parameters,
-        timescale=('1ns','1ps'),
-        waves=True
+        timescale=('1ns','1ps')
     )
     run_test_args = []
     runner.test(
         hdl_toplevel="CombinedBackgroundModel",
         test_module="test_ddr_background",
-        test_args=run_test_args,
-        waves=True
+        test_args=run_test_args
     )
 
 if __name__ == "__main__":
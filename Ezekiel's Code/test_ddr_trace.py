@@ -0,0 +1,47 @@
+import os
+import tempfile
+import numpy as np
+from ddr_trace import TraceRecorder, load
+
+
+def recorded(capacity, count, path=None):
+    recorder = TraceRecorder(path, capacity=capacity)
+    for cycle in range(count):
+        recorder.record(cycle, 0, 1, 8 * cycle, data=cycle)
+    return recorder
+
+
+def test_ring_below_capacity():
+    records = recorded(4, 3).records()
+    assert records["cycle"].tolist() == [0, 1, 2]
+
+
+def test_ring_at_capacity():
+    """Exactly `capacity` records: the write index has wrapped to 0 but nothing was overwritten."""
+    records = recorded(4, 4).records()
+    assert records["cycle"].tolist() == [0, 1, 2, 3]
+
+
+def test_ring_wrapped():
+    records = recorded(4, 6).records()
+    assert records["cycle"].tolist() == [2, 3, 4, 5]
+
+
+def test_spill_keeps_everything():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trace.npz")
+        recorded(4, 10, path).close()
+        records = load(path)
+    assert records["cycle"].tolist() == list(range(10))
+    assert (records["addr"] == 8 * np.arange(10)).all()
+
+
+# Runner function to run the tests without pytest
+def is_runner():
+    """TraceRecorder ring and spill Tester."""
+    for test in (test_ring_below_capacity, test_ring_at_capacity, test_ring_wrapped, test_spill_keeps_everything):
+        test()
+        print(f"{test.__name__} passed")
+
+if __name__ == "__main__":
+    is_runner()
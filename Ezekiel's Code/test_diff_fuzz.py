@@ -0,0 +1,230 @@
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, FallingEdge, ClockCycles
+import numpy as np
+import os
+from comb_sweep import fast_reader
+import tempfile
+from pathlib import Path
+from diff_fuzz import (TARGETS, TARGET_VAR, CASE_VAR, SEED_VAR, CASES_VAR, OUT_VAR, MISMATCH_VAR, DEFAULT_CASES,
+                       SimOracle, cases, expected, fuzz, load_case, make_case, params, regressions, replay,
+                       save_case, shrink)
+from distortion_coverage import CHANNELS
+from pixel_models import to_signed
+from test_pixel_classification import stream_classification
+
+
+CLK_PERIOD = 10
+
+
+async def reset(dut, ports, rst="rst"):
+    getattr(dut, rst).value = 1
+    for name in ports:
+        getattr(dut, name).value = 0
+    await ClockCycles(dut.clk, 5, rising=False)
+    getattr(dut, rst).value = 0
+
+
+async def drive_brightness(dut, stimulus):
+    """One vector per clock; alpha is two edges behind the inputs."""
+    names = [f"{prefix}_{c}" for prefix in ("I", "E", "sigma") for c in CHANNELS]
+    await reset(dut, names + ["valid_in"])
+    dut.valid_in.value = 1
+    handles = [getattr(dut, name) for name in names]
+    rows = list(zip(*(stimulus[name].tolist() for name in names)))
+    read = fast_reader(dut.alpha)
+    observed = np.empty(len(rows), dtype=np.int64)
+    for t in range(len(rows) + 2):
+        await FallingEdge(dut.clk)
+        if t >= 2:
+            observed[t - 2] = read()
+        if t < len(rows):
+            for handle, value in zip(handles, rows[t]):
+                handle.value = value
+    return to_signed(observed, 32)
+
+
+async def drive_chromaticity(dut, stimulus):
+    """One vector at a time: hold for five cycles, then wait for the square root."""
+    names = [f"{prefix}_{c}" for prefix in ("I", "E") for c in CHANNELS] + ["alpha"]
+    await reset(dut, names + ["valid_in"])
+    handles = [getattr(dut, name) for name in names]
+    rows = list(zip(*(stimulus[name].tolist() for name in names)))
+    observed = np.empty(len(rows), dtype=np.int64)
+    for t, row in enumerate(rows):
+        await FallingEdge(dut.clk)
+        for handle, value in zip(handles, row):
+            handle.value = value
+        dut.valid_in.value = 1
+        await ClockCycles(dut.clk, 5)
+        dut.valid_in.value = 0
+        for _ in range(64):
+            await RisingEdge(dut.clk)
+            if dut.valid_out.value == 1:
+                break
+        else:
+            assert False, f"valid_out never rose for vector {t}"
+        observed[t] = dut.CD.value.integer
+    return observed
+
+
+async def drive_classification(dut, stimulus):
+    await reset(dut, ["I_R", "I_G", "I_B", "E_R", "E_G", "E_B", "SD_alpha", "SD_CD", "alpha", "CD", "valid_in"])
+    dut.valid_in.value = 1
+    return await stream_classification(dut, stimulus)
+
+
+async def drive_sqrt(dut, stimulus):
+    """A new start on the falling edge after each ready."""
+    await reset(dut, ["start", "input_value"])
+    ready = fast_reader(dut.ready)
+    out = fast_reader(dut.sqrt_out)
+    values = stimulus["input_value"].tolist()
+    observed = np.empty(len(values), dtype=np.int64)
+    for i, value in enumerate(values):
+        dut.input_value.value = value
+        dut.start.value = 1
+        await FallingEdge(dut.clk)
+        dut.start.value = 0
+        while not ready():
+            await FallingEdge(dut.clk)
+        observed[i] = out()
+    return observed
+
+
+async def drive_background(dut, stimulus):
+    """NUM_FRAMES frames at one pixel per clock, then the first E_R/E_G/E_B out."""
+    await reset(dut, ["I_R", "I_G", "I_B", "valid_in", "btn0"])
+    frames = stimulus["frames"]
+    rows = frames.reshape(-1, 3).tolist()
+    dut.valid_in.value = 1
+    for r, g, b in rows:
+        dut.I_R.value, dut.I_G.value, dut.I_B.value = r, g, b
+        await FallingEdge(dut.clk)
+    dut.valid_in.value = 0
+    valid = fast_reader(dut.valid_out)
+    for _ in range(1000):
+        await FallingEdge(dut.clk)
+        if valid():
+            break
+    assert valid(), "no valid_out within 1000 cycles of the last training pixel"
+    return np.array([int(dut.E_R.value), int(dut.E_G.value), int(dut.E_B.value)], dtype=np.int64)
+
+
+DRIVERS = {
+    "brightness": drive_brightness,
+    "chromaticity": drive_chromaticity,
+    "classification": drive_classification,
+    "sqrt": drive_sqrt,
+    "background": drive_background,
+}
+
+
+def fuzz_target(dut):
+    return os.getenv(TARGET_VAR) or next(t.name for t in TARGETS.values() if t.toplevel == dut._name)
+
+
+async def check(dut, case):
+    """Drive one case from reset; returns the number of outputs that differ from the model."""
+    observed = await DRIVERS[case["target"]](dut, case["stimulus"])
+    want = expected(case)
+    bad = np.flatnonzero(observed != want)
+    for i in bad[:10]:
+        if "frames" in case["stimulus"]:
+            inputs = params(case)
+        else:
+            inputs = {name: values[i].tolist() for name, values in case["stimulus"].items()}
+        dut._log.error(f"{case['target']} {case['kind']} seed {case['seed']} output {i}: {inputs} "
+                       f"got {observed[i]}, expected {want[i]}")
+    return len(bad)
+
+
+@cocotb.test()
+async def test_fuzz_search(dut):
+    """Seeded random and scene cases against the golden model; the first failure is saved for shrinking."""
+    cocotb.start_soon(Clock(dut.clk, CLK_PERIOD, units="ns").start())
+    target = fuzz_target(dut)
+    seed = int(os.getenv(SEED_VAR, cocotb.RANDOM_SEED))
+    count = int(os.getenv(CASES_VAR, DEFAULT_CASES))
+    for case in cases(target, seed, count):
+        bad = await check(dut, case)
+        if bad:
+            if os.getenv(OUT_VAR):
+                save_case(case, os.getenv(OUT_VAR))
+            assert False, f"{case['kind']} case seed {case['seed']}: {bad} outputs differ from the model"
+    dut._log.info(f"{target}: {count} cases from seed {seed} match the model")
+
+
+@cocotb.test()
+async def test_fuzz_replay(dut):
+    """
+    Replay FUZZ_CASE, or every saved regression vector of this target.
+
+    With FUZZ_MISMATCHES set, the number of outputs that differ from the model
+    is written there once every vector has been compared; a run that times out
+    or crashes first leaves no count, which the shrinker reads as "does not
+    reproduce".
+    """
+    cocotb.start_soon(Clock(dut.clk, CLK_PERIOD, units="ns").start())
+    target = fuzz_target(dut)
+    paths = [os.getenv(CASE_VAR)] if os.getenv(CASE_VAR) else regressions(target)
+    failed = []
+    mismatches = 0
+    for path in paths:
+        case = load_case(path)
+        if not np.array_equal(case["recorded"], expected(case)):
+            dut._log.warning(f"{path}: the golden model has changed since this vector was saved")
+        bad = await check(dut, case)
+        mismatches += bad
+        if bad:
+            failed.append(str(path))
+    if os.getenv(MISMATCH_VAR):
+        Path(os.getenv(MISMATCH_VAR)).write_text(str(mismatches))
+    dut._log.info(f"{len(paths) - len(failed)} of {len(paths)} regression vectors pass")
+    assert not failed, f"failing regression vectors: {failed}"
+
+
+def test_shrink_frame_case():
+    """
+    Shrink a background frame case through SimOracle.fails without a simulator.
+
+    The stand-in run mismatches while pixel 0 of the first frame has red above
+    100 and "times out" (writes no count) on one-column tiles, so every crop
+    must get its own build directory and only real mismatches may be kept.
+    """
+    class ModelOracle(SimOracle):
+        def build(self, parameters):
+            return self.build_dir(parameters)
+
+        def run(self, testcase, parameters, env):
+            self.runs += 1
+            case = load_case(env[CASE_VAR])
+            frames = case["stimulus"]["frames"]
+            if frames.shape[2] == 1:
+                return False
+            Path(env[MISMATCH_VAR]).write_text(str(int(frames[0, 0, 0, 0] > 100)))
+            return frames[0, 0, 0, 0] <= 100
+
+    case = make_case("background", 1, "random")
+    case["stimulus"]["frames"][0, 0, 0, 0] = 200
+    with tempfile.TemporaryDirectory() as tmp:
+        oracle = ModelOracle("background", runner="model", proj_path=tmp)
+        assert oracle.fails(case)
+        small, runs = shrink(case, oracle.fails, log=lambda message: None)
+        assert oracle.fails(small), "the shrunk case no longer reproduces"
+    frames = small["stimulus"]["frames"]
+    assert frames[0, 0, 0, 0] > 100 and frames.shape[2] > 1, f"kept a non-reproducing case: {params(small)}"
+    assert frames.size < case["stimulus"]["frames"].size, f"nothing was shrunk in {runs} runs"
+    print(f"frame case shrunk to {params(small)} in {runs} candidate runs")
+
+
+# Runner function to build and run the test
+def is_runner():
+    """Differential fuzz of every target; failures are shrunk and saved, saved vectors are replayed."""
+    test_shrink_frame_case()
+    found = [fuzz(name) for name in TARGETS]
+    failed = [path for name in TARGETS for path in regressions(name) if not replay(path)]
+    print(f"{sum(map(bool, found))} new reproducers, {len(failed)} failing regression vectors")
+
+if __name__ == "__main__":
+    is_runner()
@@ -0,0 +1,101 @@
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, FallingEdge, ClockCycles
+import numpy as np
+import os
+import sys
+from pathlib import Path
+from cocotb.runner import get_runner
+from wave_window import WaveRunner
+from digit_rom import render_glyphs, pack_rom, write_mem, render_case_frame
+
+
+X_IN = 10
+Y_IN = 10
+MARGIN = 20
+
+
+@cocotb.test()
+async def test_image_digit_rom(dut):
+    """Compare image_digit_rom pixel for pixel with the case-based image_digit it replaces."""
+
+    clock = Clock(dut.pixel_clk_in, 10, units="ns")
+    cocotb.start_soon(clock.start())
+
+    dut.rst_in.value = 1
+    dut.x_in.value = X_IN
+    dut.y_in.value = Y_IN
+    dut.hcount_in.value = 0
+    dut.vcount_in.value = 0
+    dut.digit.value = 0
+    await ClockCycles(dut.pixel_clk_in, 3)
+    dut.rst_in.value = 0
+
+    width = int(dut.WIDTH.value)
+    height = int(dut.HEIGHT.value)
+    span_w = X_IN + width + MARGIN
+    span_h = Y_IN + height + MARGIN
+    hcount = np.tile(np.arange(span_w), span_h).tolist()
+    vcount = np.repeat(np.arange(span_h), span_w).tolist()
+
+    for digit in range(16):
+        dut.digit.value = digit
+        case = np.zeros(span_w * span_h, dtype=bool)
+        rom = np.zeros(span_w * span_h, dtype=bool)
+        # inputs change on the falling edge; by the next one image_digit still shows the held pixel
+        # and image_digit_rom has registered it
+        for i in range(len(hcount) + 1):
+            await FallingEdge(dut.pixel_clk_in)
+            if i > 0:
+                case[i - 1] = dut.case_red_out.value.integer != 0
+                rom[i - 1] = dut.rom_red_out.value.integer != 0
+            if i < len(hcount):
+                dut.hcount_in.value = hcount[i]
+                dut.vcount_in.value = vcount[i]
+            await RisingEdge(dut.pixel_clk_in)
+
+        case = case.reshape(span_h, span_w)
+        rom = rom.reshape(span_h, span_w)
+        bad = np.argwhere(rom != case)
+        dut._log.info(f"Digit {digit}: {len(bad)} pixels differ from image_digit")
+        assert len(bad) == 0, f"Digit {digit} differs from image_digit at (y, x) = {bad[:10].tolist()}"
+        # digit_rom.verify() checks ROM images against this Python mirror of the case statement
+        model = render_case_frame([digit], [(X_IN, Y_IN)], width, height, frame_width=span_w, frame_height=span_h)
+        bad = np.argwhere(model != case)
+        assert len(bad) == 0, f"render_case_frame differs from image_digit for {digit} at {bad[:10].tolist()}"
+
+
+# Runner function to build and run the test
+def is_runner():
+    """image_digit_rom against image_digit Tester."""
+    hdl_toplevel_lang = os.getenv("HDL_TOPLEVEL_LANG", "verilog")
+    sim = os.getenv("SIM", "icarus")
+    proj_path = Path(__file__).resolve().parent.parent
+    sys.path.append(str(proj_path / "sim" / "model"))
+    sources = [proj_path / "hdl" / "image_digit.sv", proj_path / "hdl" / "image_digit_rom.sv",
+               proj_path / "hdl" / "image_digit_compare.sv"]
+    # the ROM image is generated from the same geometry the reference uses
+    data_path = proj_path / "data"
+    data_path.mkdir(exist_ok=True)
+    write_mem(data_path / "digits.mem", pack_rom(render_glyphs(100, 100, 3)))
+    build_test_args = ["-Wall"]
+    parameters = {"WIDTH": 100, "HEIGHT": 100}
+    sys.path.append(str(proj_path / "sim"))
+    runner = WaveRunner(get_runner(sim))
+    runner.build(
+        sources=sources,
+        hdl_toplevel="image_digit_compare",
+        always=True,
+        build_args=build_test_args,
+        parameters=parameters,
+        timescale=('1ns','1ps')
+    )
+    run_test_args = []
+    runner.test(
+        hdl_toplevel="image_digit_compare",
+        test_module="test_image_digit_rom",
+        test_args=run_test_args
+    )
+
+if __name__ == "__main__":
+    is_runner()
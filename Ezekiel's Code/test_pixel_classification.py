@@ -1,6 +1,6 @@
 import cocotb
 from cocotb.clock import Clock
-from cocotb.triggers import RisingEdge, ClockCycles, ReadOnly
+from cocotb.triggers import RisingEdge, FallingEdge, ClockCycles, ReadOnly
 import numpy as np
 import math
 from cocotb.binary import BinaryValue
@@ -8,7 +8,12 @@ import os
 import sys
 from pathlib import Path
 from cocotb.runner import get_runner
+from wave_window import WaveRunner, WaveWindow
 import random
+from comb_sweep import fast_reader
+from distortion_coverage import generator
+from func_coverage import save_run
+from pixel_models import pixel_classification
 
 
 
@@ -116,6 +121,68 @@ async def test_pixel_classification(dut):
     dut._log.info("All test cases completed.")
 
 
+COVERAGE_BATCH = 256
+COVERAGE_BUDGET = 20000
+
+
+async def stream_classification(dut, stimulus):
+    """
+    One vector per clock. The thresholds come from SD_* registered twice while
+    alpha and CD are compared unregistered, so alpha/CD are driven two cycles
+    after their SD_* and the class is read four falling edges after SD_*.
+    """
+    n = len(stimulus["alpha"])
+    sd = list(zip(stimulus["SD_alpha"].tolist(), stimulus["SD_CD"].tolist()))
+    distortion = list(zip(stimulus["alpha"].tolist(), stimulus["CD"].tolist()))
+    read = fast_reader(dut.classification)
+    observed = np.empty(n, dtype=np.int64)
+    for t in range(n + 4):
+        await FallingEdge(dut.clk)
+        if t >= 4:
+            observed[t - 4] = read()
+        if t < n:
+            dut.SD_alpha.value, dut.SD_CD.value = sd[t]
+        if 2 <= t < n + 2:
+            dut.alpha.value, dut.CD.value = distortion[t - 2]
+    return observed
+
+
+@cocotb.test()
+async def test_pixel_classification_coverage(dut):
+    """Close the classification covergroup with targeted constrained-random vectors."""
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    dut.rst.value = 1
+    dut.valid_in.value = 0
+    for name in ("I_R", "I_G", "I_B", "E_R", "E_G", "E_B", "SD_alpha", "SD_CD", "alpha", "CD"):
+        getattr(dut, name).value = 0
+    await ClockCycles(dut.clk, 5)
+    dut.rst.value = 0
+    # valid_buffered never clears once set, so every stage runs every cycle from here on
+    dut.valid_in.value = 1
+
+    seed = cocotb.RANDOM_SEED
+    group, sample_fn, stimulus = generator("classification", seed)
+    windows = WaveWindow(dut.clk, 10, dut._log)
+    mismatches = 0
+    while group.holes() and group.vectors < COVERAGE_BUDGET:
+        batch = stimulus.next_batch(COVERAGE_BATCH)
+        start = windows.cycle()
+        observed = await stream_classification(dut, batch)
+        expected = pixel_classification(batch["alpha"], batch["CD"], batch["SD_alpha"], batch["SD_CD"])
+        bad = np.flatnonzero(observed != expected)
+        for i in bad[:10]:
+            dut._log.error(f"alpha={batch['alpha'][i]} CD={batch['CD'][i]} SD_alpha={batch['SD_alpha'][i]} "
+                           f"SD_CD={batch['SD_CD'][i]}: got {observed[i]}, expected {expected[i]}")
+        for i in bad:
+            windows.mismatch(start + i + 4, f"class {observed[i]}, expected {expected[i]}")
+        mismatches += len(bad)
+        group.sample(sample_fn(batch, observed))
+
+    dut._log.info(f"Coverage saved to {save_run(group, seed)}\n{group.report()}")
+    assert mismatches == 0, f"{mismatches} misclassified vectors"
+    assert not group.holes(), f"coverage not closed in {group.vectors} vectors: {group.holes()}"
+
+
 # Runner function to build and run the test
 def is_runner():
     """BackgroundModelDRAM Tester."""
@@ -130,22 +197,20 @@ def is_runner():
     build_test_args = ["-Wall"]
     parameters = {}
     sys.path.append(str(proj_path / "sim"))
-    runner = get_runner(sim)
+    runner = WaveRunner(get_runner(sim))
     runner.build(
         sources=sources,
         hdl_toplevel="PixelClassification",
         always=True,
         build_args=build_test_args,
         parameters=parameters,
-        timescale=('1ns','1ps'),
-        waves=True
+        timescale=('1ns','1ps')
     )
     run_test_args = []
     runner.test(
         hdl_toplevel="PixelClassification",
         test_module="test_pixel_classification",
-        test_args=run_test_args,
-        waves=True
+        test_args=run_test_args
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,46 @@
+import cocotb
+import os
+import sys
+from pathlib import Path
+from cocotb.runner import get_runner
+from wave_window import WaveRunner
+from comb_sweep import exhaustive, run_sweep, predict_model
+
+
+@cocotb.test()
+async def test_predict_exhaustive(dut):
+    """Sweep all 2^21 (x_in, y_in) pairs of predict against the reference model."""
+    stimulus = exhaustive(x_in=11, y_in=10)
+    result = await run_sweep(dut, stimulus, predict_model, ["pwm_x", "pwm_y"])
+    assert result.mismatches == 0, f"{result.mismatches} of {result.vectors} vectors mismatched"
+
+
+# Runner function to build and run the test
+def is_runner():
+    """predict Tester."""
+    hdl_toplevel_lang = os.getenv("HDL_TOPLEVEL_LANG", "verilog")
+    sim = os.getenv("SIM", "icarus")
+    proj_path = Path(__file__).resolve().parent.parent
+    sys.path.append(str(proj_path / "sim" / "model"))
+    sources = [proj_path / "hdl" / "predict.sv"]
+    build_test_args = ["-Wall"]
+    parameters = {}
+    sys.path.append(str(proj_path / "sim"))
+    runner = WaveRunner(get_runner(sim))
+    runner.build(
+        sources=sources,
+        hdl_toplevel="predict",
+        always=True,
+        build_args=build_test_args,
+        parameters=parameters,
+        timescale=('1ns','1ps')
+    )
+    run_test_args = []
+    runner.test(
+        hdl_toplevel="predict",
+        test_module="test_predict",
+        test_args=run_test_args
+    )
+
+if __name__ == "__main__":
+    is_runner()
@@ -187,8 +187,10 @@ module top_level
   // ** DRAM Interface for Background Model **
 
   // Memory map addresses for background model storage, makes sure they don't overlap
-  localparam BG_MODEL_BASE_ADDR = 27'd0; // Starting address in DRAM for background model
-  localparam FRAME_DATA_BASE_ADDR = 27'd100_000; 
+  // (planned by ddr_address_map.py; ddr_address_map_pkg.sv must be in the build ahead of this file)
+  // The frame and display regions are addressed inside traffic_generator_with_bg_model, which takes
+  // no base address yet; its FRAME_DATA/DISPLAY_DATA addresses must match the package.
+  localparam BG_MODEL_BASE_ADDR = ddr_address_map_pkg::BG_MODEL_BASE_ADDR; // Starting address in DRAM for background model
 
 
   logic [26:0]  bg_app_addr;
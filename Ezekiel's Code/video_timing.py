@@ -0,0 +1,19 @@
+"""
+720p60 timing shared by the Python models, matching video_sig_gen.
+"""
+
+ACTIVE_H = 1280
+H_FRONT_PORCH = 110
+H_SYNC_WIDTH = 40
+H_BACK_PORCH = 220
+TOTAL_H = ACTIVE_H + H_FRONT_PORCH + H_SYNC_WIDTH + H_BACK_PORCH  # 1650
+
+ACTIVE_V = 720
+V_FRONT_PORCH = 5
+V_SYNC_WIDTH = 5
+V_BACK_PORCH = 20
+TOTAL_V = ACTIVE_V + V_FRONT_PORCH + V_SYNC_WIDTH + V_BACK_PORCH  # 750
+
+PIXEL_CLOCK_HZ = 74_250_000
+FRAME_RATE = 60
+FRAME_CLOCKS = TOTAL_H * TOTAL_V
@@ -0,0 +1,274 @@
+"""
+Waveform capture off by default, with dumps limited to trigger windows.
+
+The runners used to pass waves=True to build and test, which dumps every
+signal for the whole run. Each runner now wraps its cocotb runner in
+WaveRunner, and the WAVES environment variable picks what is recorded:
+
+    WAVES unset / off   no dump at all (the default)
+    WAVES=window        wave_window.sv is compiled in as a second root and
+                        only the windows the testbench opens are dumped, as
+                        FST, to <build_dir>/<toplevel>_window.fst
+    WAVES=full          the old behaviour: the whole run, every signal
+
+    WAVES=window python test_pixel_classification.py
+    WAVES=window WAVE_WINDOWS=1200:1500,9000:9100 python test_cordic_sqrt.py
+
+Windows are opened from the testbench with a WaveWindow. In off mode it still
+logs mismatches but schedules nothing, so leaving the calls in costs nothing:
+
+    windows = WaveWindow(dut.clk, 10)
+    windows.cycles(1000, 1200)                     # a cycle range
+    windows.pixels(dut.hcount, 100, 140)           # a pixel-index range
+    windows.when(lambda: dut.state.value == 3, post=20)   # a signal condition
+    windows.mismatch(cycle, "CD 114021, expected 114020") # a scoreboard miss
+
+A cycle is simulation time over the clock period, so it counts from time zero
+across every test in the run. When a run with waves off fails, WaveRunner
+reads the mismatches the scoreboards logged, rebuilds with the window module
+into <build_dir>/waves and reruns the same tests with the same seed, dumping
+only RERUN_PRE cycles before to RERUN_POST cycles after each mismatch. Icarus
+cannot save and restore a simulation, so the rerun starts from time zero: the
+seed makes it replay the failing run exactly, and everything outside the
+windows runs with dumping off. Set WAVE_RERUN=0 to skip the rerun.
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+import cocotb
+from cocotb.handle import SimHandle
+from cocotb.triggers import ClockCycles, RisingEdge
+from cocotb.utils import get_sim_time
+
+
+MODE_VAR = "WAVES"
+WINDOWS_VAR = "WAVE_WINDOWS"
+LOG_VAR = "WAVE_LOG"
+RERUN_VAR = "WAVE_RERUN"
+MODES = ("off", "window", "full")
+ROOT = "wave_window"
+RERUN_PRE = 200
+RERUN_POST = 50
+MISMATCH_POST = 20
+
+
+def wave_mode():
+    """The capture mode from WAVES: off, window or full."""
+    mode = os.getenv(MODE_VAR, "off").strip().lower() or "off"
+    if mode in ("0", "no", "false"):
+        return "off"
+    if mode in ("1", "yes", "true"):
+        return "full"
+    if mode not in MODES:
+        raise ValueError(f"{MODE_VAR}={mode!r}, expected one of {MODES}")
+    return mode
+
+
+def parse_windows(text):
+    """'start:stop,start:stop' in cycles -> [(start, stop)], sorted."""
+    windows = []
+    for part in (text or "").split(","):
+        if part.strip():
+            start, stop = (int(v) for v in part.split(":"))
+            windows.append((start, stop))
+    return sorted(windows)
+
+
+def format_windows(windows):
+    return ",".join(f"{start}:{stop}" for start, stop in windows)
+
+
+def merge_windows(windows):
+    """Union of overlapping or touching (start, stop) ranges."""
+    merged = []
+    for start, stop in sorted(windows):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+        else:
+            merged.append((start, stop))
+    return merged
+
+
+def read_mismatches(path):
+    """The mismatch records a run appended to its WAVE_LOG file."""
+    path = Path(path)
+    if not path.is_file():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+
+def rerun_windows(mismatches, pre=RERUN_PRE, post=RERUN_POST):
+    return merge_windows((max(0, m["cycle"] - pre), m["cycle"] + post) for m in mismatches)
+
+
+class WaveRunner:
+    """class WaveRunner: a cocotb runner whose waves follow WAVES and which reruns failures to capture them"""
+
+    def __init__(self, runner, mode=None):
+        self.runner = runner
+        self.mode = mode or wave_mode()
+        self._build = None
+
+    def _window_sources(self):
+        return [Path(__file__).resolve().parent.parent / "hdl" / "wave_window.sv"]
+
+    def _build_args(self, kwargs, mode):
+        kwargs = dict(kwargs)
+        if kwargs.pop("waves", False):
+            mode = "full"
+        kwargs["waves"] = mode == "full"
+        if mode == "window":
+            kwargs["sources"] = list(kwargs["sources"]) + self._window_sources()
+            kwargs["build_args"] = list(kwargs.get("build_args", [])) + ["-s", ROOT]
+            kwargs["defines"] = dict(kwargs.get("defines") or {}, WAVE_TOP=kwargs["hdl_toplevel"])
+        return kwargs
+
+    def build(self, **kwargs):
+        """runner.build with the wave options of the current mode; waves=True still forces a full dump."""
+        self._build = dict(kwargs)
+        if kwargs.get("waves"):
+            self.mode = "full"
+        self.runner.build(**self._build_args(kwargs, self.mode))
+
+    def _test_args(self, kwargs, mode, build_dir, windows=None):
+        kwargs = dict(kwargs)
+        kwargs.pop("waves", None)
+        kwargs["waves"] = mode == "full"
+        env = dict(kwargs.get("extra_env") or {}, **{LOG_VAR: str(build_dir / "wave_mismatches.jsonl")})
+        if mode == "window":
+            wave_file = build_dir / f"{kwargs['hdl_toplevel']}_window.fst"
+            kwargs["plusargs"] = list(kwargs.get("plusargs", [])) + ["-fst", f"+wave_file={wave_file}"]
+            if windows:
+                env[WINDOWS_VAR] = format_windows(windows)
+        kwargs["extra_env"] = env
+        return kwargs
+
+    def test(self, **kwargs):
+        """
+        runner.test with the wave options of the current mode. The seed is
+        fixed up front so that a failing run with waves off can be replayed
+        with the window module compiled in, dumping only around the logged
+        mismatches. Returns the results file of the first run.
+        """
+        from cocotb.runner import get_results
+
+        kwargs.setdefault("seed", int(os.getenv("RANDOM_SEED", time.time())))
+        build_dir = Path(kwargs.get("build_dir") or self.runner.build_dir)
+        log = build_dir / "wave_mismatches.jsonl"
+        log.unlink(missing_ok=True)
+        results = self.runner.test(**self._test_args(kwargs, self.mode, build_dir))
+
+        mismatches = read_mismatches(log)
+        if (self.mode != "off" or os.getenv(RERUN_VAR, "1") == "0" or self._build is None
+                or not mismatches or get_results(Path(results))[1] == 0):
+            return results
+        windows = rerun_windows(mismatches)
+        rerun_dir = build_dir / "waves"
+        print(f"{len(mismatches)} mismatches logged, rerunning seed {kwargs['seed']} "
+              f"to capture cycles {format_windows(windows)}")
+        self.runner.build(**self._build_args(dict(self._build, build_dir=rerun_dir), "window"))
+        self.runner.test(**self._test_args(dict(kwargs, build_dir=rerun_dir), "window", rerun_dir, windows))
+        print(f"failing windows in {rerun_dir / (kwargs['hdl_toplevel'] + '_window.fst')}")
+        return results
+
+
+class WaveWindow:
+    """class WaveWindow: opens and closes dump windows from inside a cocotb test"""
+
+    def __init__(self, clock, period_ns, log=None):
+        self.clock = clock
+        self.period_ns = period_ns
+        self.log = log or cocotb.log
+        self.path = os.getenv(LOG_VAR)
+        try:
+            self._dump_on = SimHandle(cocotb.simulator.get_root_handle(ROOT)).dump_on
+        except Exception:
+            self._dump_on = None
+        self._reasons = []
+        self.windows = []
+        for start, stop in parse_windows(os.getenv(WINDOWS_VAR)):
+            self.cycles(start, stop)
+
+    @property
+    def enabled(self):
+        """True when wave_window.sv is compiled in, so windows reach the dump."""
+        return self._dump_on is not None
+
+    def cycle(self):
+        """Clock cycles since time zero."""
+        return int(get_sim_time("ns") // self.period_ns)
+
+    def open(self, reason="manual"):
+        if not self.enabled:
+            return
+        if not self._reasons:
+            self._dump_on.value = 1
+            self.windows.append([self.cycle(), None, reason])
+            self.log.info(f"wave window open at cycle {self.cycle()} ({reason})")
+        self._reasons.append(reason)
+
+    def close(self, reason="manual"):
+        if reason not in self._reasons:
+            return
+        self._reasons.remove(reason)
+        if not self._reasons:
+            self._dump_on.value = 0
+            self.windows[-1][1] = self.cycle()
+            self.log.info(f"wave window closed at cycle {self.cycle()}")
+
+    async def _span(self, start, stop, reason):
+        now = self.cycle()
+        if stop <= now:
+            return
+        if start > now:
+            await ClockCycles(self.clock, start - now)
+        self.open(reason)
+        await ClockCycles(self.clock, stop - max(start, now))
+        self.close(reason)
+
+    def cycles(self, start, stop):
+        """Dump from cycle start up to cycle stop."""
+        if self.enabled:
+            cocotb.start_soon(self._span(start, stop, f"cycles {start}:{stop}"))
+
+    async def _watch(self, condition, post, reason):
+        remaining = 0
+        while True:
+            await RisingEdge(self.clock)
+            if condition():
+                remaining = post + 1
+                self.open(reason)
+            elif remaining:
+                remaining -= 1
+                if not remaining:
+                    self.close(reason)
+
+    def when(self, condition, post=0, reason=None):
+        """Dump while condition() is true at the rising edge, and post cycles after."""
+        if self.enabled:
+            cocotb.start_soon(self._watch(condition, post, reason or f"condition {condition!r}"))
+
+    def pixels(self, index, start, stop, post=0):
+        """Dump while a pixel index (a signal or a callable) is in [start, stop)."""
+        if not self.enabled:
+            return
+        if not callable(index):
+            from comb_sweep import fast_reader
+            index = fast_reader(index)
+        self.when(lambda: start <= index() < stop, post, f"pixels {start}:{stop}")
+
+    def mismatch(self, cycle=None, note="", post=MISMATCH_POST):
+        """
+        Record a scoreboard mismatch at cycle (default now). The log lets a
+        rerun capture the cycles before it; when windows are enabled the next
+        post cycles are dumped straight away.
+        """
+        cycle = self.cycle() if cycle is None else int(cycle)
+        if self.path:
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"cycle": cycle, "note": note}) + "\n")
+        if self.enabled:
+            now = self.cycle()
+            cocotb.start_soon(self._span(now, max(now, cycle) + post, f"mismatch at {cycle}"))
@@ -0,0 +1,30 @@
+`timescale 1ns / 1ps
+`default_nettype none
+// Simulation-only second root for windowed waveform capture (Icarus). It
+// registers every signal under `WAVE_TOP for dumping but keeps dumping off;
+// the testbench (wave_window.WaveWindow) drives dump_on to open and close
+// windows, so only those stretches of the run reach the file. The file name
+// comes from +wave_file=...; pass -fst to vvp for FST instead of VCD.
+// Compiled in by wave_window.WaveRunner with -s wave_window and
+// -DWAVE_TOP=<toplevel>. Do not add this file to the Vivado project.
+module wave_window;
+    reg dump_on = 1'b0;
+    string wave_file;
+
+    initial begin
+        if (!$value$plusargs("wave_file=%s", wave_file))
+            wave_file = "wave_window.fst";
+        $dumpfile(wave_file);
+        $dumpvars(0, `WAVE_TOP);
+        $dumpoff;
+    end
+
+    always @(dump_on) begin
+        if (dump_on)
+            $dumpon;
+        else
+            $dumpoff;
+    end
+endmodule
+
+`default_nettype wire
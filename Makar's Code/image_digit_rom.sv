@@ -0,0 +1,59 @@
+`timescale 1ns / 1ps
+`default_nettype none
+
+`ifdef SYNTHESIS
+`define FPATH(X) `"X`"
+`else /* ! SYNTHESIS */
+`define FPATH(X) `"../../data/X`"
+`endif  /* ! SYNTHESIS */
+
+// ROM-based drop-in for image_digit: the glyphs are read from a 1-bit ROM
+// generated by digit_rom.py instead of being decoded from the case statement.
+// Output is registered, so it lags image_digit by one pixel clock.
+module image_digit_rom #(
+  parameter WIDTH=100, HEIGHT=100, NUM_DIGITS=10) (
+  input wire pixel_clk_in,
+  input wire rst_in,
+  input wire [10:0] x_in,
+  input wire [10:0] hcount_in,
+  input wire [9:0] y_in,
+  input wire [9:0] vcount_in,
+  input wire [3:0] digit,
+  output logic [7:0] red_out,
+  output logic [7:0] green_out,
+  output logic [7:0] blue_out
+  );
+
+  localparam ROM_DEPTH = NUM_DIGITS*WIDTH*HEIGHT;
+
+  logic glyph_rom [0:ROM_DEPTH-1];
+  initial $readmemh(`FPATH(digits.mem), glyph_rom);
+
+  logic in_sprite;
+  assign in_sprite = ((hcount_in >= x_in && hcount_in < (x_in + WIDTH)) &&
+                      (vcount_in >= y_in && vcount_in < (y_in + HEIGHT)) &&
+                      (digit < NUM_DIGITS));
+
+  // calculate rom address
+  logic [$clog2(ROM_DEPTH)-1:0] image_addr;
+  assign image_addr = digit*(WIDTH*HEIGHT) + (vcount_in - y_in)*WIDTH + (hcount_in - x_in);
+
+  logic pixel_value;
+  logic in_sprite_pipe;
+
+  always_ff @(posedge pixel_clk_in) begin
+    if (rst_in) begin
+      in_sprite_pipe <= 1'b0;
+      pixel_value <= 1'b0;
+    end else begin
+      in_sprite_pipe <= in_sprite;
+      pixel_value <= in_sprite ? glyph_rom[image_addr] : 1'b0;
+    end
+  end
+
+  assign red_out =    (in_sprite_pipe && pixel_value)? 8'hff : 8'h00;
+  assign green_out =  (in_sprite_pipe && pixel_value)? 8'hff : 8'h00;
+  assign blue_out =   (in_sprite_pipe && pixel_value)? 8'hff : 8'h00;
+endmodule
+
+`default_nettype wire